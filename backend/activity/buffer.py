@@ -0,0 +1,95 @@
+"""
+Buffered ActivityLog writes.
+
+Inside a buffered_activity() scope (every request gets one from
+ActivityBufferMiddleware; long jobs can open their own), log_activity and
+log_activity_bulk queue their entries instead of INSERTing them one call at
+a time, and the scope writes them with one bulk_create when it ends.
+
+Entries logged inside a transaction join the buffer only when that
+transaction commits (transaction.on_commit), so work that is rolled back
+leaves no log behind. A scope that ends with a transaction still open
+flushes from on_commit too, after the entries it is waiting for.
+
+The buffer is flushed early once it holds ACTIVITY_LOG_BUFFER_SIZE
+entries, so long-running jobs don't hold their whole history in memory.
+Outside any scope (shell, background threads) entries are written
+straight away, as before.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import ActivityLog
+
+DEFAULT_ACTIVITY_LOG_BUFFER_SIZE = 500
+
+_current = ContextVar('activity_buffer', default=None)
+
+
+def buffer_size():
+    return getattr(settings, 'ACTIVITY_LOG_BUFFER_SIZE', DEFAULT_ACTIVITY_LOG_BUFFER_SIZE)
+
+
+class ActivityBuffer:
+    """Committed ActivityLog entries waiting to be written."""
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size or buffer_size()
+        self.entries = []
+        self.closed = False
+
+    def add(self, entries):
+        self.entries.extend(entries)
+        if self.closed or len(self.entries) >= self.max_size:
+            self.flush()
+
+    def flush(self):
+        entries, self.entries = self.entries, []
+        if entries:
+            ActivityLog.objects.bulk_create(entries, batch_size=self.max_size)
+        return len(entries)
+
+    def close(self):
+        self.closed = True
+        self.flush()
+
+
+def record(entries):
+    """Write unsaved ActivityLog entries, through the current buffer if there is one."""
+    entries = list(entries)
+    if not entries:
+        return
+    buffer = _current.get()
+    if buffer is None:
+        ActivityLog.objects.bulk_create(entries, batch_size=buffer_size())
+    elif connection.in_atomic_block:
+        transaction.on_commit(lambda: buffer.add(entries))
+    else:
+        buffer.add(entries)
+
+
+@contextmanager
+def buffered_activity(max_size=None):
+    """
+    Buffer activity entries logged in the block; they are written with one
+    bulk_create when it exits (or every `max_size` entries). Nested scopes
+    share the outermost buffer.
+    """
+    if _current.get() is not None:
+        yield _current.get()
+        return
+
+    buffer = ActivityBuffer(max_size)
+    token = _current.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _current.reset(token)
+        if connection.in_atomic_block:
+            # Registered after the entries' own callbacks, so it runs last
+            transaction.on_commit(buffer.close)
+        else:
+            buffer.close()
@@ -0,0 +1,41 @@
+"""
+Archive activity log months older than the retention window
+(ACTIVITY_LOG_RETENTION_DAYS, 365 by default) to gzipped NDJSON files in
+ACTIVITY_LOG_ARCHIVE_DIR, then remove them from the database. On
+PostgreSQL it first creates the partitions for the coming months
+(ACTIVITY_LOG_PARTITIONS_AHEAD). Run it daily from cron.
+
+    python manage.py archive_activity_logs
+    python manage.py archive_activity_logs --days 180 --dir /var/backups/activity
+    python manage.py archive_activity_logs --dry-run
+"""
+from django.core.management.base import BaseCommand
+
+from activity.partitions import archive_expired, ensure_partitions, expired_months, month_rows, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = 'Archive and remove activity logs past the retention window.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Retention in days (default: ACTIVITY_LOG_RETENTION_DAYS).')
+        parser.add_argument('--dir', help='Archive directory (default: ACTIVITY_LOG_ARCHIVE_DIR).')
+        parser.add_argument('--batch-size', type=int, help='Rows per read / delete batch.')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the months that would be archived.')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            for month in expired_months(retention_cutoff(options['days'])):
+                self.stdout.write(f'{month:%Y-%m}: {month_rows(month).count()} entries')
+            return
+
+        for name in ensure_partitions():
+            self.stdout.write(f'Created partition {name}')
+
+        def progress(month, path, rows):
+            self.stdout.write(f'{month:%Y-%m}: {rows} entries' + (f' -> {path}' if path else ''))
+
+        archived = archive_expired(options['days'], options['dir'], options['batch_size'], progress)
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {sum(rows for _, _, rows in archived)} activity entries from {len(archived)} months.'
+        ))
@@ -0,0 +1,112 @@
+# Generated by Django 6.0.2 on 2026-10-18 08:08
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# PostgreSQL only: rebuild activity_activitylog as a table range-partitioned
+# by created_at, one partition per UTC month plus a DEFAULT partition (see
+# activity.partitions). The primary key has to include the partition key,
+# so it becomes (id, created_at); the model still treats id as its primary
+# key. Other databases keep the plain table and its created_at index.
+FORWARD_SQL = [
+    'ALTER TABLE activity_activitylog RENAME TO activity_activitylog_unpartitioned',
+    'ALTER TABLE activity_activitylog_unpartitioned RENAME CONSTRAINT activity_activitylog_pkey TO activity_activitylog_unpartitioned_pkey',
+    'DROP INDEX activity_ac_target__16e969_idx',
+    'DROP INDEX activity_ac_actor_i_3a6bb7_idx',
+    'DROP INDEX activitylog_created',
+    """
+    CREATE TABLE activity_activitylog (LIKE activity_activitylog_unpartitioned INCLUDING DEFAULTS)
+    PARTITION BY RANGE (created_at)
+    """,
+    'ALTER TABLE activity_activitylog ADD PRIMARY KEY (id, created_at)',
+    'CREATE INDEX activity_ac_target__16e969_idx ON activity_activitylog (target_type, target_id)',
+    'CREATE INDEX activity_ac_actor_i_3a6bb7_idx ON activity_activitylog (actor_id, created_at DESC)',
+    'CREATE INDEX activitylog_created ON activity_activitylog (created_at)',
+    """
+    ALTER TABLE activity_activitylog ADD CONSTRAINT activity_activitylog_actor_id_fk_users_user_id
+    FOREIGN KEY (actor_id) REFERENCES users_user (id) DEFERRABLE INITIALLY DEFERRED
+    """,
+    'CREATE TABLE activity_activitylog_default PARTITION OF activity_activitylog DEFAULT',
+]
+
+COPY_SQL = [
+    'INSERT INTO activity_activitylog SELECT * FROM activity_activitylog_unpartitioned',
+    'DROP TABLE activity_activitylog_unpartitioned',
+]
+
+REVERSE_SQL = [
+    'ALTER TABLE activity_activitylog RENAME TO activity_activitylog_partitioned',
+    'DROP INDEX activity_ac_target__16e969_idx',
+    'DROP INDEX activity_ac_actor_i_3a6bb7_idx',
+    'DROP INDEX activitylog_created',
+    'CREATE TABLE activity_activitylog (LIKE activity_activitylog_partitioned INCLUDING DEFAULTS)',
+    'INSERT INTO activity_activitylog SELECT * FROM activity_activitylog_partitioned',
+    'DROP TABLE activity_activitylog_partitioned CASCADE',
+    'ALTER TABLE activity_activitylog ADD PRIMARY KEY (id)',
+    'CREATE INDEX activity_ac_target__16e969_idx ON activity_activitylog (target_type, target_id)',
+    'CREATE INDEX activity_ac_actor_i_3a6bb7_idx ON activity_activitylog (actor_id, created_at DESC)',
+    'CREATE INDEX activitylog_created ON activity_activitylog (created_at)',
+    'CREATE INDEX activity_activitylog_actor_id ON activity_activitylog (actor_id)',
+    """
+    ALTER TABLE activity_activitylog ADD CONSTRAINT activity_activitylog_actor_id_fk_users_user_id
+    FOREIGN KEY (actor_id) REFERENCES users_user (id) DEFERRABLE INITIALLY DEFERRED
+    """,
+]
+
+PARTITIONS_AHEAD = 3
+
+
+def months(first, count):
+    month = first.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(count):
+        yield month
+        month = month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def partition_activity_log(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in FORWARD_SQL:
+        schema_editor.execute(statement)
+
+    # A partition for every month from the oldest entry to a few months ahead
+    now = datetime.datetime.now(datetime.timezone.utc)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT min(created_at) FROM activity_activitylog_unpartitioned')
+        oldest = (cursor.fetchone()[0] or now).astimezone(datetime.timezone.utc)
+    count = (now.year - oldest.year) * 12 + now.month - oldest.month + PARTITIONS_AHEAD + 1
+    bounds = list(months(oldest, count + 1))
+    for month, following in zip(bounds, bounds[1:]):
+        schema_editor.execute(
+            f'CREATE TABLE activity_activitylog_y{month.year}m{month.month:02d} PARTITION OF activity_activitylog '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        )
+
+    for statement in COPY_SQL:
+        schema_editor.execute(statement)
+
+
+def unpartition_activity_log(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in REVERSE_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0002_alter_activitylog_action'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['created_at'], name='activitylog_created'),
+        ),
+        migrations.RunPython(partition_activity_log, unpartition_activity_log),
+    ]
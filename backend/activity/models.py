@@ -3,6 +3,17 @@ from django.db import models
 from django.conf import settings
 
 
+class ActivityLogQuerySet(models.QuerySet):
+    def recent(self):
+        """
+        Entries within the retention period. Older ones are archived (see
+        activity.partitions); on PostgreSQL the created_at bound also keeps
+        expired partitions out of the query plan.
+        """
+        from .partitions import retention_cutoff
+        return self.filter(created_at__gte=retention_cutoff())
+
+
 class ActivityLog(models.Model):
     ACTION_CHOICES = [
         ('created', 'Created'),
@@ -32,11 +43,15 @@ class ActivityLog(models.Model):
     description = models.TextField()  # Human-readable
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ActivityLogQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['target_type', 'target_id']),
             models.Index(fields=['actor', '-created_at']),
+            # Retention scans by month (activity.partitions)
+            models.Index(fields=['created_at'], name='activitylog_created'),
         ]
 
     def __str__(self):
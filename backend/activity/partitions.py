@@ -0,0 +1,232 @@
+"""
+Monthly storage for ActivityLog: partitions, retention and cold archive.
+
+On PostgreSQL activity_activitylog is range-partitioned by created_at
+(migration 0003), one partition per UTC month plus a DEFAULT partition
+that catches rows outside them. The ActivityLog model queries the parent
+table as before; the planner skips partitions a created_at filter rules
+out, which is what ActivityLog.objects.recent() is for.
+ensure_partitions() creates the coming months' partitions ahead of time.
+On other databases the table is a single table with a created_at index,
+and ensure_partitions() does nothing.
+
+Rows older than ACTIVITY_LOG_RETENTION_DAYS are expired a whole month at a
+time: archive_expired() writes each month to
+ACTIVITY_LOG_ARCHIVE_DIR/activity-YYYY-MM.ndjson.gz (one JSON object per
+row, oldest first), syncs it to disk, and only then removes the month, by
+dropping its partition on PostgreSQL or deleting it in batches elsewhere.
+
+archive_activity_logs runs both (schedule it daily).
+"""
+import datetime
+import gzip
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import ActivityLog
+
+DEFAULT_RETENTION_DAYS = 365
+DEFAULT_PARTITIONS_AHEAD = 3
+DEFAULT_ARCHIVE_BATCH_SIZE = 5000
+
+# Columns written to the archive, in order
+ARCHIVE_FIELDS = (
+    'id', 'created_at', 'actor_id', 'action', 'target_type', 'target_id', 'target_title', 'delta', 'description',
+)
+
+
+def retention_days():
+    return getattr(settings, 'ACTIVITY_LOG_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+
+
+def archive_dir():
+    return Path(getattr(settings, 'ACTIVITY_LOG_ARCHIVE_DIR', settings.BASE_DIR / 'archive' / 'activity'))
+
+
+def month_start(value):
+    """First instant of value's UTC month."""
+    value = value.astimezone(datetime.timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(month):
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def retention_cutoff(days=None):
+    """
+    Start of the oldest month still retained: rows before it have expired.
+    Whole months expire together, so nothing younger than `days` is archived.
+    """
+    days = retention_days() if days is None else days
+    return month_start(timezone.now() - datetime.timedelta(days=days))
+
+
+# PostgreSQL partitions
+
+def partition_name(month):
+    return f'{ActivityLog._meta.db_table}_y{month.year}m{month.month:02d}'
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [ActivityLog._meta.db_table]
+        )
+        return cursor.fetchone() is not None
+
+
+def partitions():
+    """Names of the tables attached to the partitioned ActivityLog table."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = to_regclass(%s)', [ActivityLog._meta.db_table]
+        )
+        return {name for name, in cursor.fetchall()}
+
+
+def create_partition(month):
+    """
+    Attach the partition for `month`. Rows for that month already in the
+    DEFAULT partition are moved into it first, or the attach would fail.
+    """
+    parent, name = ActivityLog._meta.db_table, partition_name(month)
+    quote = connection.ops.quote_name
+    bounds = [month.isoformat(), next_month(month).isoformat()]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {quote(name)} (LIKE {quote(parent)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {quote(parent + "_default")} '
+            f'WHERE created_at >= %s AND created_at < %s RETURNING *) '
+            f'INSERT INTO {quote(name)} SELECT * FROM moved', bounds,
+        )
+        # Partition bounds must be literals; both are generated here
+        cursor.execute(
+            f"ALTER TABLE {quote(parent)} ATTACH PARTITION {quote(name)} "
+            f"FOR VALUES FROM ('{bounds[0]}') TO ('{bounds[1]}')"
+        )
+    return name
+
+
+def ensure_partitions(ahead=None):
+    """Create partitions for this month and the next `ahead`; returns the new ones."""
+    if not is_partitioned():
+        return []
+    ahead = getattr(settings, 'ACTIVITY_LOG_PARTITIONS_AHEAD', DEFAULT_PARTITIONS_AHEAD) if ahead is None else ahead
+    existing, created = partitions(), []
+    month = month_start(timezone.now())
+    for _ in range(ahead + 1):
+        if partition_name(month) not in existing:
+            created.append(create_partition(month))
+        month = next_month(month)
+    return created
+
+
+def drop_partition(month):
+    """Detach and drop the partition for `month`; False when it has none."""
+    name = partition_name(month)
+    if not is_partitioned() or name not in partitions():
+        return False
+    quote = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {quote(ActivityLog._meta.db_table)} DETACH PARTITION {quote(name)}')
+        cursor.execute(f'DROP TABLE {quote(name)}')
+    return True
+
+
+# Retention
+
+def month_rows(month):
+    return ActivityLog.objects.filter(created_at__gte=month, created_at__lt=next_month(month))
+
+
+def expired_months(cutoff=None):
+    """UTC months, oldest first, that start before the retention cutoff and may still hold rows."""
+    cutoff = retention_cutoff() if cutoff is None else cutoff
+    oldest = ActivityLog.objects.filter(created_at__lt=cutoff).aggregate(oldest=Min('created_at'))['oldest']
+    months = []
+    month = month_start(oldest) if oldest else cutoff
+    while month < cutoff:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+def archive_path(directory, month):
+    """First unused archive file name for `month` (re-runs never overwrite an archive)."""
+    base = f'activity-{month:%Y-%m}'
+    path, part = directory / f'{base}.ndjson.gz', 1
+    while path.exists():
+        path, part = directory / f'{base}.{part}.ndjson.gz', part + 1
+    return path
+
+
+def write_archive(month, directory, batch_size):
+    """Write `month`'s rows to a new NDJSON.gz file; returns (path, rows), path None when empty."""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = archive_path(directory, month)
+    partial = path.with_name(path.name + '.partial')
+    rows = 0
+    with open(partial, 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as stream:
+            for row in month_rows(month).order_by('created_at', 'id').values(*ARCHIVE_FIELDS).iterator(batch_size):
+                stream.write(json.dumps(row, cls=DjangoJSONEncoder).encode('utf-8') + b'\n')
+                rows += 1
+        raw.flush()
+        os.fsync(raw.fileno())
+    if not rows:
+        partial.unlink()
+        return None, 0
+    os.replace(partial, path)
+    return path, rows
+
+
+def delete_month(month, batch_size):
+    """Remove `month`'s rows: drop its partition, or delete them in batches."""
+    if drop_partition(month):
+        return
+    rows = month_rows(month)
+    while True:
+        with transaction.atomic():
+            ids = list(rows.order_by().values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return
+            ActivityLog.objects.filter(pk__in=ids).delete()
+
+
+def archive_expired(days=None, directory=None, batch_size=None, progress=None):
+    """
+    Archive and remove every expired month. Returns [(month, path, rows)];
+    progress(month, path, rows) is called after each month.
+    """
+    directory = archive_dir() if directory is None else Path(directory)
+    batch_size = batch_size or getattr(settings, 'ACTIVITY_LOG_ARCHIVE_BATCH_SIZE', DEFAULT_ARCHIVE_BATCH_SIZE)
+    archived = []
+    for month in expired_months(retention_cutoff(days)):
+        path, rows = write_archive(month, directory, batch_size)
+        if rows:
+            # Only once the archive is safely on disk
+            delete_month(month, batch_size)
+        elif is_partitioned():
+            drop_partition(month)
+        archived.append((month, path, rows))
+        if progress:
+            progress(month, path, rows)
+    return archived
+
+
+def read_archive(path):
+    """Rows of an archive file, as dicts (created_at and id left as strings)."""
+    with gzip.open(path, 'rt', encoding='utf-8') as stream:
+        for line in stream:
+            yield json.loads(line)
@@ -1,22 +1,17 @@
 
 from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
+from .buffer import record
 from .models import ActivityLog
 from tasks.models import Task
 from projects.models import Project
 
-def log_activity(actor, action, target_type, target_id, target_title, delta=None, description=None):
-    """
-    Helper function to create activity log entries.
-    Called from views/signals to maintain audit trail.
-    """
-    if not actor or not actor.is_authenticated:
-        return
-
+def build_activity(actor, action, target_type, target_id, target_title, delta=None, description=None):
+    """Unsaved ActivityLog entry with the default description filled in."""
     if description is None:
         description = f"{target_type.capitalize()} '{target_title}' was {action}"
-    
-    ActivityLog.objects.create(
+
+    return ActivityLog(
         actor=actor,
         action=action,
         target_type=target_type,
@@ -26,6 +21,30 @@ def log_activity(actor, action, target_type, target_id, target_title, delta=None
         description=description
     )
 
+
+def log_activity(actor, action, target_type, target_id, target_title, delta=None, description=None):
+    """
+    Helper function to create activity log entries.
+    Called from views/signals to maintain audit trail. Inside a request
+    the entry is buffered and written with the request's other entries
+    (see activity.buffer).
+    """
+    if not actor or not actor.is_authenticated:
+        return
+
+    record([build_activity(actor, action, target_type, target_id, target_title, delta, description)])
+
+
+def log_activity_bulk(actor, action, target_type, targets, delta=None):
+    """
+    Log the same action for many targets, given as (target_id, target_title)
+    pairs, with batched INSERTs instead of one per entry.
+    """
+    if not actor or not actor.is_authenticated:
+        return
+
+    record(build_activity(actor, action, target_type, target_id, title, delta) for target_id, title in targets)
+
 @receiver(post_save, sender=Task)
 def task_activity(sender, instance, created, **kwargs):
     # Skip if no user available (e.g. script), handle in view if possible
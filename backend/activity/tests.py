@@ -38,3 +38,133 @@ class ActivityLogTests(APITestCase):
         # But in tests, if not using client.get(..., format='json') carefully, it might be raw dict.
         # Anyway, we verified content.
         self.assertEqual(len(response.data['results']), 1)
+
+
+class ActivityBufferTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='buffered', password='password123')
+
+    def test_entries_written_once_on_commit(self):
+        from django.db import connection, transaction
+        from django.test.utils import CaptureQueriesContext
+        from .buffer import buffered_activity
+        from .signals import log_activity
+
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic(), buffered_activity():
+                    for i in range(3):
+                        log_activity(self.user, 'created', 'task', f'id-{i}', f'Task {i}')
+                    self.assertEqual(ActivityLog.objects.count(), 0)
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "activity_activitylog"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(ActivityLog.objects.count(), 3)
+
+    def test_rolled_back_entries_are_dropped(self):
+        from django.db import transaction
+        from .buffer import buffered_activity
+        from .signals import log_activity
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with buffered_activity():
+                try:
+                    with transaction.atomic():
+                        log_activity(self.user, 'deleted', 'task', 'gone', 'Gone')
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                log_activity(self.user, 'created', 'task', 'kept', 'Kept')
+        self.assertEqual(list(ActivityLog.objects.values_list('target_id', flat=True)), ['kept'])
+
+    def test_size_triggered_flush(self):
+        from .buffer import ActivityBuffer
+        from .signals import build_activity
+
+        buffer = ActivityBuffer(max_size=2)
+        buffer.add([build_activity(self.user, 'created', 'task', 'a', 'A')])
+        self.assertEqual(ActivityLog.objects.count(), 0)
+        buffer.add([build_activity(self.user, 'created', 'task', 'b', 'B')])
+        self.assertEqual(ActivityLog.objects.count(), 2)
+
+        # Entries committed after the scope closed are written straight away
+        buffer.close()
+        buffer.add([build_activity(self.user, 'created', 'task', 'c', 'C')])
+        self.assertEqual(ActivityLog.objects.count(), 3)
+
+    def test_request_logs_flushed_at_end(self):
+        from tasks.models import Task
+
+        self.client.force_authenticate(user=self.user)
+        task = Task.objects.create(title='Logged', owner=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(reverse('task-detail', args=[task.id]), {'status': 'done'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(ActivityLog.objects.filter(target_id=str(task.id), action='status_changed').exists())
+
+
+class ActivityArchiveTests(APITestCase):
+    def setUp(self):
+        import tempfile
+        from django.utils import timezone
+
+        self.user = User.objects.create_user(username='archivist', password='password123')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.now = timezone.now()
+
+    def log(self, target_id, days_ago):
+        from datetime import timedelta
+        entry = ActivityLog.objects.create(
+            actor=self.user, action='created', target_type='task', target_id=target_id,
+            target_title=target_id, description=f'Task {target_id} was created',
+        )
+        ActivityLog.objects.filter(pk=entry.pk).update(created_at=self.now - timedelta(days=days_ago))
+        return entry
+
+    def test_expired_months_archived_and_removed(self):
+        from pathlib import Path
+        from .partitions import archive_expired, read_archive, retention_cutoff
+
+        old = [self.log('old-1', 500), self.log('old-2', 500), self.log('older', 560)]
+        self.log('recent', 10)
+        cutoff = retention_cutoff(365)
+
+        archived = archive_expired(days=365, directory=self.directory.name, batch_size=1)
+        self.assertEqual(sum(rows for _, _, rows in archived), 3)
+        self.assertTrue(all(month < cutoff for month, _, _ in archived))
+        self.assertEqual(list(ActivityLog.objects.values_list('target_id', flat=True)), ['recent'])
+
+        files = sorted(Path(self.directory.name).glob('activity-*.ndjson.gz'))
+        rows = [row for path in files for row in read_archive(path)]
+        self.assertEqual(sorted(row['id'] for row in rows), sorted(str(entry.id) for entry in old))
+        self.assertEqual(rows[0]['target_id'], 'older')  # oldest month first
+        self.assertEqual(rows[0]['actor_id'], self.user.id)
+
+        # Nothing left to archive; existing archives are never overwritten
+        self.assertEqual(archive_expired(days=365, directory=self.directory.name), [])
+        self.log('late', 500)
+        archive_expired(days=365, directory=self.directory.name)
+        self.assertEqual(len(list(Path(self.directory.name).glob('activity-*.ndjson.gz'))), len(files) + 1)
+
+    def test_feeds_skip_expired_entries(self):
+        self.log('recent', 1)
+        self.log('expired', 800)
+        self.assertEqual(list(ActivityLog.objects.recent().values_list('target_id', flat=True)), ['recent'])
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('activity-list'))
+        self.assertEqual([row['target_id'] for row in response.data['results']], ['recent'])
+
+    def test_command(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        self.log('expired', 800)
+        out = StringIO()
+        call_command('archive_activity_logs', '--dry-run', '--days', '365', stdout=out)
+        self.assertIn(': 1 entries', out.getvalue())
+        self.assertEqual(ActivityLog.objects.count(), 1)
+
+        call_command('archive_activity_logs', '--days', '365', '--dir', self.directory.name, stdout=out)
+        self.assertIn('Archived 1 activity entries', out.getvalue())
+        self.assertEqual(ActivityLog.objects.count(), 0)
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from .models import ActivityLog
 from .serializers import ActivityLogSerializer
+from core.pagination import KeysetPagination
 
 
 class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
@@ -12,10 +13,11 @@ class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
     serializer_class = ActivityLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """Get activity logs for the current user."""
-        return ActivityLog.objects.filter(actor=self.request.user).order_by('-created_at')[:50]
+        return ActivityLog.objects.recent().filter(actor=self.request.user).select_related('actor').order_by('-created_at')
 
     from rest_framework.decorators import action
     @action(detail=False, methods=['post'])
@@ -35,7 +37,7 @@ class TaskActivityViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def list(self, request, task_pk=None):
-        logs = ActivityLog.objects.filter(
+        logs = ActivityLog.objects.recent().filter(
             target_type='task',
             target_id=str(task_pk)
         )[:50]
@@ -48,7 +50,7 @@ class ProjectActivityViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def list(self, request, project_pk=None):
-        logs = ActivityLog.objects.filter(
+        logs = ActivityLog.objects.recent().filter(
             target_type='project',
             target_id=str(project_pk)
         )[:50]
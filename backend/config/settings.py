@@ -78,6 +78,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'core.middleware.AuditLogMiddleware',  # Global Audit Log
+    'core.middleware.ActivityBufferMiddleware',  # One ActivityLog INSERT per request
 ]
 
 ROOT_URLCONF = 'config.urls'
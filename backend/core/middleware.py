@@ -7,6 +7,7 @@ import logging
 import json
 import time
 from django.utils.deprecation import MiddlewareMixin
+from activity.buffer import buffered_activity
 from core.utils import log_grc_event
 
 logger = logging.getLogger('audit')
@@ -64,3 +65,16 @@ class AuditLogMiddleware(MiddlewareMixin):
         else:
             ip = request.META.get('REMOTE_ADDR')
         return ip
+
+
+class ActivityBufferMiddleware:
+    """
+    Collect the ActivityLog entries a request logs and write them with one
+    bulk_create when it finishes (see activity.buffer).
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with buffered_activity():
+            return self.get_response(request)
@@ -1,7 +1,14 @@
 """
-Pydantic validation mixin for DRF views.
-Provides a consistent validation layer using Pydantic schemas.
+Shared DRF view mixins.
+Provides a consistent validation layer using Pydantic schemas, and
+conditional GET support for polled list endpoints.
 """
+import datetime
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
 from rest_framework.response import Response
 from rest_framework import status
 from pydantic import ValidationError
@@ -68,3 +75,84 @@ class PydanticValidationMixin:
                 return error_response
             request._full_data = validated_data
         return super().partial_update(request, *args, **kwargs)
+
+
+class ConditionalGetMixin:
+    """
+    Mixin that adds ETag / Last-Modified validators to list endpoints.
+
+    The validators come from one aggregate over the filtered queryset (row
+    count and the latest `conditional_timestamp_field`) and are scoped to the
+    user and full query string, so pagination, filters and ?fields= each get
+    their own ETag. When If-None-Match / If-Modified-Since match, the view
+    answers 304 before fetching or serializing any rows.
+
+    Relies on every write that changes a row's representation bumping its
+    timestamp (auto_now on save(), explicit updated_at in .update() calls).
+
+    APIViews call self.conditional_response(request, handler) from get().
+
+    Usage:
+        class MyViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+            def get_conditional_aggregates(self):
+                return {'deleted': Max(...)}   # optional extra aggregates
+    """
+    conditional_timestamp_field = 'updated_at'
+
+    def get_conditional_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    def get_conditional_aggregates(self):
+        """Extra aggregate expressions folded into the validator query."""
+        return {}
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        """Answer 304 when the client's validators match, else call handler()."""
+        etag, last_modified = compute_validators(
+            request,
+            self.get_conditional_queryset(),
+            self.conditional_timestamp_field,
+            **self.get_conditional_aggregates(),
+        )
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return set_validators(not_modified, etag, last_modified)
+        return set_validators(handler(request, *args, **kwargs), etag, last_modified)
+
+
+def compute_validators(request, queryset, timestamp_field='updated_at', **extra):
+    """
+    Return (etag, last_modified_timestamp) for a queryset in one aggregate query.
+    Extra aggregates are mixed into the ETag; datetime extras also feed
+    Last-Modified.
+    """
+    state = queryset.order_by().aggregate(
+        _count=Count('pk'), _last=Max(timestamp_field), **extra
+    )
+    stamps = [value for value in [state['_last'], *(state[key] for key in extra)]
+              if isinstance(value, datetime.datetime)]
+    last_modified = int(max(stamps).timestamp()) if stamps else None
+
+    user = getattr(request, 'user', None)
+    fingerprint = repr((
+        request.path,
+        sorted(request.GET.lists()),
+        request.META.get('HTTP_ACCEPT', ''),
+        getattr(user, 'pk', None),
+        [state[key].isoformat() if hasattr(state[key], 'isoformat') else state[key]
+         for key in sorted(state)],
+    ))
+    etag = '"%s"' % hashlib.blake2b(fingerprint.encode('utf-8'), digest_size=16).hexdigest()
+    return etag, last_modified
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Validators depend on the user, so shared caches must revalidate
+    patch_vary_headers(response, ['Authorization'])
+    return response
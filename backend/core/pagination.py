@@ -1,6 +1,265 @@
+import base64
+import datetime
+import decimal
+import json
+import uuid
+from operator import attrgetter
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound, ValidationError as InvalidRequest
+from rest_framework.filters import OrderingFilter
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
 
 class StandardResultsPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+def _encode_value(value):
+    # isoformat() keeps microseconds, which keyset comparisons depend on
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, decimal.Decimal)):
+        return str(value)
+    return value
+
+
+class KeysetPagination(StandardResultsPagination):
+    """
+    Page-number pagination with an opt-in keyset (cursor) mode.
+
+    Page-number mode (default) is unchanged, except that ?count=false skips
+    the COUNT(*) query and returns "count": null.
+
+    Cursor mode is entered with ?pagination=cursor and continued through the
+    opaque ?cursor= tokens in the next/previous links. Pages are fetched with
+    a WHERE on the ordering values of the last row seen, tie-broken on the
+    primary key, so deep pages cost the same as the first one. The ordering
+    is the client's ?ordering= (through the view's OrderingFilter and
+    ordering_fields), else the one the queryset arrives with. Only model
+    fields can be followed: a queryset ordered by anything else, such as
+    search relevance, is answered with a 400 rather than paged in a
+    different order than page-number mode would use.
+    """
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+    unsupported_ordering_message = (
+        'Cursor pagination cannot follow this ordering ({term}); pass ?ordering= or use page numbers.'
+    )
+    mode = 'page'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        params = request.query_params
+        if self.cursor_query_param in params or params.get(self.mode_query_param) == 'cursor':
+            self.mode = 'cursor'
+            return self.paginate_keyset(queryset, request, view)
+        if params.get(self.count_query_param, '').lower() == 'false':
+            self.mode = 'uncounted'
+            return self.paginate_uncounted(queryset, request)
+        self.mode = 'page'
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.mode == 'page':
+            return super().get_paginated_response(data)
+        payload = {'next': self.next_link, 'previous': self.previous_link, 'results': data}
+        if self.mode == 'uncounted':
+            payload = {'count': None, **payload}
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        response = super().get_paginated_response_schema(schema)
+        response['properties']['count']['nullable'] = True
+        return response
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters += [
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': "Set to 'cursor' to start keyset pagination.",
+                'schema': {'type': 'string', 'enum': ['cursor']},
+            },
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Opaque cursor taken from a next/previous link.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': "Set to 'false' to skip the total count.",
+                'schema': {'type': 'boolean'},
+            },
+        ]
+        return parameters
+
+    # Page-number mode without COUNT(*)
+
+    def paginate_uncounted(self, queryset, request):
+        page_size = self.get_page_size(request)
+        try:
+            page_number = max(int(request.query_params.get(self.page_query_param, 1)), 1)
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        offset = (page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+
+        url = request.build_absolute_uri()
+        self.next_link = (
+            replace_query_param(url, self.page_query_param, page_number + 1)
+            if len(rows) > page_size else None
+        )
+        if page_number == 1:
+            self.previous_link = None
+        elif page_number == 2:
+            self.previous_link = remove_query_param(url, self.page_query_param)
+        else:
+            self.previous_link = replace_query_param(url, self.page_query_param, page_number - 1)
+        return rows[:page_size]
+
+    # Keyset mode
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Resolve the requested ordering to [(field_name, descending, nullable)],
+        always ending with the primary key so every row has a unique position.
+        """
+        terms = None
+        if view is not None and request.query_params.get(OrderingFilter.ordering_param) and any(
+            issubclass(backend, OrderingFilter) for backend in getattr(view, 'filter_backends', [])
+        ):
+            terms = OrderingFilter().get_ordering(request, queryset, view)
+        if not terms:
+            terms = list(queryset.query.order_by or queryset.model._meta.ordering or ['-pk'])
+
+        model = queryset.model
+        pk_name = model._meta.pk.name
+        ordering = []
+        for term in terms:
+            if not isinstance(term, str):
+                raise InvalidRequest({self.cursor_query_param: self.unsupported_ordering_message.format(term=term)})
+            name = term.lstrip('-')
+            if name == 'pk':
+                name = pk_name
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                raise InvalidRequest({self.cursor_query_param: self.unsupported_ordering_message.format(term=term)})
+            ordering.append((field.attname if field.is_relation else name, term.startswith('-'), field.null))
+
+        if not any(name == pk_name for name, _, _ in ordering):
+            descending = ordering[0][1] if ordering else True
+            ordering.append((pk_name, descending, False))
+        return ordering
+
+    def paginate_keyset(self, queryset, request, view):
+        page_size = self.get_page_size(request)
+        ordering = self.get_ordering(request, queryset, view)
+        self.ordering = ordering
+
+        signature = [f"{'-' if desc else ''}{name}" for name, desc, _ in ordering]
+        token = request.query_params.get(self.cursor_query_param)
+        values, reverse = None, False
+        if token:
+            values, reverse = self.decode_cursor(token, signature)
+
+        queryset = queryset.order_by(*self.order_expressions(ordering, reverse))
+        if values is not None:
+            try:
+                queryset = queryset.filter(self.keyset_filter(ordering, values, reverse))
+            except (ValidationError, ValueError, TypeError):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        has_next = has_more if not reverse else True
+        has_previous = has_more if reverse else values is not None
+
+        url = request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        self.next_link = None
+        self.previous_link = None
+        if rows and has_next:
+            cursor = self.encode_cursor(self.row_values(rows[-1], ordering), False, signature)
+            self.next_link = replace_query_param(url, self.cursor_query_param, cursor)
+        if rows and has_previous:
+            cursor = self.encode_cursor(self.row_values(rows[0], ordering), True, signature)
+            self.previous_link = replace_query_param(url, self.cursor_query_param, cursor)
+        return rows
+
+    @staticmethod
+    def order_expressions(ordering, reverse):
+        """
+        ORDER BY terms; nullable fields sort NULLs last going forward so the
+        keyset predicate can treat them as the largest value in either direction.
+        """
+        expressions = []
+        for name, descending, nullable in ordering:
+            descending = descending != reverse
+            if not nullable:
+                expressions.append(f"{'-' if descending else ''}{name}")
+            else:
+                nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+                expressions.append(F(name).desc(**nulls) if descending else F(name).asc(**nulls))
+        return expressions
+
+    @staticmethod
+    def keyset_filter(ordering, values, reverse):
+        """
+        Rows strictly after (or, when reverse, before) `values` in `ordering`:
+        OR over i of (f_0 = v_0 AND ... AND f_{i-1} = v_{i-1} AND f_i beyond v_i).
+        """
+        match = Q(pk__in=[])
+        prefix = Q()
+        for (name, descending, nullable), value in zip(ordering, values):
+            if value is None:
+                # NULLs sort last going forward
+                beyond = Q(pk__in=[]) if not reverse else Q(**{f'{name}__isnull': False})
+                equal = Q(**{f'{name}__isnull': True})
+            else:
+                lookup = 'lt' if descending != reverse else 'gt'
+                beyond = Q(**{f'{name}__{lookup}': value})
+                if nullable and not reverse:
+                    beyond |= Q(**{f'{name}__isnull': True})
+                equal = Q(**{name: value})
+            match |= prefix & beyond
+            prefix &= equal
+        return match
+
+    @staticmethod
+    def row_values(row, ordering):
+        return [_encode_value(attrgetter(name)(row)) for name, _, _ in ordering]
+
+    def encode_cursor(self, values, reverse, signature):
+        payload = json.dumps({'v': values, 'r': int(reverse), 'o': signature}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, token, signature):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+            values, reverse = payload['v'], bool(payload['r'])
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        # A cursor is only meaningful for the ordering it was issued under
+        if payload.get('o') != signature or len(values) != len(signature):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
@@ -1,9 +1,67 @@
 """
 RBAC Permission utilities.
 Provides role-based access control checks for project resources.
+
+Roles are read through a ProjectRoles resolver attached to the request
+(project_roles), which loads every project the user owns or belongs to
+in one query and answers each later check from memory, so the permission
+classes cost at most one query per request.
 """
+from django.db.models import CharField, Value
 from rest_framework import permissions
 from projects.member_models import ProjectMember
+from projects.models import Project
+
+EDIT_TASK_ROLES = ('owner', 'admin', 'member')
+MANAGE_PROJECT_ROLES = ('owner', 'admin')
+
+
+class ProjectRoles:
+    """
+    One user's role in each of their projects, keyed by project id. Owning
+    the project wins over any membership row. Loaded on first use.
+    """
+    def __init__(self, user):
+        self.user = user
+        self._roles = None
+
+    def load(self):
+        if self._roles is None:
+            roles = {}
+            if self.user is not None and self.user.is_authenticated:
+                memberships = ProjectMember.objects.filter(user=self.user).values_list('project_id', 'role')
+                owned = (
+                    Project.objects.filter(owner=self.user)
+                    .annotate(role=Value('owner', output_field=CharField())).values_list('id', 'role')
+                )
+                for project_id, role in memberships.order_by().union(owned.order_by(), all=True):
+                    if role == 'owner' or project_id not in roles:
+                        roles[project_id] = role
+            self._roles = roles
+        return self._roles
+
+    def role(self, project):
+        """The user's role in `project` (a Project or its id), or None."""
+        return self.load().get(getattr(project, 'pk', project))
+
+    def has_role(self, project, roles):
+        return self.role(project) in roles
+
+
+def project_roles(request):
+    """The ProjectRoles resolver for request.user, created once per request."""
+    resolver = getattr(request, '_project_roles', None)
+    if resolver is None or resolver.user is not request.user:
+        resolver = ProjectRoles(request.user)
+        request._project_roles = resolver
+    return resolver
+
+
+def project_of(obj):
+    """Id of the project `obj` (a Project or something in one) belongs to, or None."""
+    if hasattr(obj, 'members'):
+        return obj.pk
+    return getattr(obj, 'project_id', None)
 
 
 class IsProjectMember(permissions.BasePermission):
@@ -12,14 +70,16 @@ class IsProjectMember(permissions.BasePermission):
     """
     def has_object_permission(self, request, view, obj):
         # For Tasks, check membership in the parent project
-        project = getattr(obj, 'project', None)
-        if project is None:
+        project_id = getattr(obj, 'project_id', None)
+        if project_id is None:
             return True  # No project = personal task, allow
-        
-        return ProjectMember.objects.filter(
-            project=project,
-            user=request.user
-        ).exists() or project.owner == request.user
+
+        if project_roles(request).role(project_id) is not None:
+            return True
+        # Tasks listed through ownership or assignment (Task.objects.visible_to)
+        if obj.owner_id == request.user.pk:
+            return True
+        return obj.assignees.filter(pk=request.user.pk).exists()
 
 
 class CanEditTask(permissions.BasePermission):
@@ -30,19 +90,12 @@ class CanEditTask(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True  # Read is allowed for all members
-        
-        project = getattr(obj, 'project', None)
-        if project is None:
-            return obj.owner == request.user  # Personal task
-        
-        try:
-            membership = ProjectMember.objects.get(
-                project=project,
-                user=request.user
-            )
-            return membership.can_edit_tasks
-        except ProjectMember.DoesNotExist:
-            return project.owner == request.user
+
+        project_id = getattr(obj, 'project_id', None)
+        if project_id is None:
+            return obj.owner_id == request.user.pk  # Personal task
+
+        return project_roles(request).has_role(project_id, EDIT_TASK_ROLES)
 
 
 class CanManageProject(permissions.BasePermission):
@@ -51,60 +104,42 @@ class CanManageProject(permissions.BasePermission):
     Roles: owner, admin
     """
     def has_object_permission(self, request, view, obj):
-        project = obj if hasattr(obj, 'members') else getattr(obj, 'project', None)
-        if project is None:
-            return False
-        
-        if project.owner == request.user:
-            return True
-        
-        try:
-            membership = ProjectMember.objects.get(
-                project=project,
-                user=request.user
-            )
-            return membership.can_manage_members
-        except ProjectMember.DoesNotExist:
+        project_id = project_of(obj)
+        if project_id is None:
             return False
 
+        return project_roles(request).has_role(project_id, MANAGE_PROJECT_ROLES)
+
 
 class IsViewerOrAbove(permissions.BasePermission):
     """
     Minimum permission: viewer role or higher.
     """
     def has_object_permission(self, request, view, obj):
-        project = getattr(obj, 'project', None)
-        if project is None:
-            return obj.owner == request.user
-        
-        return ProjectMember.objects.filter(
-            project=project,
-            user=request.user
-        ).exists() or project.owner == request.user
+        project_id = getattr(obj, 'project_id', None)
+        if project_id is None:
+            return obj.owner_id == request.user.pk
+
+        return project_roles(request).role(project_id) is not None
 
 
-def get_user_role(user, project):
+def get_user_role(user, project, request=None):
     """
     Utility to get user's role in a project.
-    Returns None if not a member.
+    Returns None if not a member. Pass the request to reuse its resolver.
     """
-    if project.owner == user:
+    if request is not None and request.user == user:
+        return project_roles(request).role(project)
+    if project.owner_id == user.pk:
         return 'owner'
-    
-    try:
-        membership = ProjectMember.objects.get(project=project, user=user)
-        return membership.role
-    except ProjectMember.DoesNotExist:
-        return None
+    return ProjectMember.objects.filter(project=project, user=user).values_list('role', flat=True).first()
 
 
-def user_can_edit_tasks(user, project):
+def user_can_edit_tasks(user, project, request=None):
     """Check if user can create/edit tasks in project."""
-    role = get_user_role(user, project)
-    return role in ['owner', 'admin', 'member']
+    return get_user_role(user, project, request) in EDIT_TASK_ROLES
 
 
-def user_can_manage_project(user, project):
+def user_can_manage_project(user, project, request=None):
     """Check if user can manage project settings and members."""
-    role = get_user_role(user, project)
-    return role in ['owner', 'admin']
+    return get_user_role(user, project, request) in MANAGE_PROJECT_ROLES
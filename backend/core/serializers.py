@@ -0,0 +1,42 @@
+"""
+Shared serializer helpers.
+"""
+from djangorestframework_camel_case.util import camel_to_underscore
+from rest_framework import permissions
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin that prunes fields from ?fields= / ?omit= on read requests.
+
+    Both parameters take a comma-separated list of field names, in either the
+    camelCase form clients see or the snake_case form used here. Pruned fields
+    are removed before serialization, so their method fields never run; views
+    can inspect `get_serializer().fields` to skip the queries behind them.
+
+    Only the root serializer (or the child of a many=True root) is pruned;
+    nested serializers declared as fields have no request in their context
+    when they are constructed.
+    """
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return
+
+        params = getattr(request, 'query_params', request.GET)
+        keep = self._parse_field_names(params.get(self.fields_query_param))
+        omit = self._parse_field_names(params.get(self.omit_query_param))
+        for name in list(self.fields):
+            normalized = camel_to_underscore(name)
+            if (keep is not None and normalized not in keep) or (omit and normalized in omit):
+                self.fields.pop(name)
+
+    @staticmethod
+    def _parse_field_names(value):
+        if value is None:
+            return None
+        return {camel_to_underscore(name.strip()) for name in value.split(',') if name.strip()}
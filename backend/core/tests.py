@@ -31,3 +31,132 @@ class Sprint0Tests(APITestCase):
         # Basic check to ensure settings are applied
         from django.conf import settings
         self.assertIn('http://localhost:3000', settings.CORS_ALLOWED_ORIGINS)
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        from tasks.models import Task
+
+        self.user = User.objects.create_user(username='pager', password='password123')
+        priorities = ['Low', 'Medium', 'High']
+        for i in range(25):
+            Task.objects.create(title=f'Task {i}', owner=self.user, priority=priorities[i % 3])
+        # Force timestamp ties so the primary key tie-breaker is exercised
+        Task.objects.filter(title__in=['Task 3', 'Task 4', 'Task 5']).update(
+            created_at=Task.objects.get(title='Task 3').created_at
+        )
+        self.url = reverse('task-list')
+        self.client.force_authenticate(user=self.user)
+
+    def walk(self, params):
+        rows = []
+        response = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 7, **params})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            rows += response.data['results']
+            if not response.data['next']:
+                return rows, response
+            response = self.client.get(response.data['next'])
+
+    def test_cursor_walk_matches_offset_order(self):
+        for ordering, key in [('-created_at', 'created_at'), ('priority', 'priority'), ('-due_date', 'dueDate')]:
+            rows, last = self.walk({'ordering': ordering})
+            expected = self.client.get(self.url, {'ordering': ordering, 'page_size': 100}).data['results']
+            ids = [row['id'] for row in rows]
+            self.assertEqual(len(ids), 25, ordering)
+            self.assertEqual(set(ids), {row['id'] for row in expected}, ordering)
+            self.assertEqual([row[key] for row in rows], [row[key] for row in expected], ordering)
+
+            # Walking back from the last page returns the preceding page
+            back = self.client.get(last.data['previous'])
+            self.assertEqual([row['id'] for row in back.data['results']], ids[14:21])
+
+    def test_invalid_or_mismatched_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        first = self.client.get(self.url, {'pagination': 'cursor', 'ordering': 'priority'})
+        cursor = first.data['next'].split('cursor=')[1].split('&')[0]
+        response = self.client.get(self.url, {'cursor': cursor, 'ordering': 'due_date'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_mode_refuses_relevance_ordering(self):
+        from tasks.models import Task
+
+        Task.objects.create(title='alpha alpha alpha', owner=self.user)
+        Task.objects.create(title='unrelated', description='alpha', owner=self.user)
+        ranked = self.client.get(self.url, {'search': 'alpha'})
+        self.assertEqual(ranked.status_code, status.HTTP_200_OK)
+        response = self.client.get(self.url, {'search': 'alpha', 'pagination': 'cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cursor', response.data)
+
+        # An explicit ordering replaces relevance, so it can be paged with cursors
+        rows, _ = self.walk({'search': 'alpha', 'ordering': 'created_at'})
+        self.assertEqual([row['title'] for row in rows], ['alpha alpha alpha', 'unrelated'])
+
+    def test_page_number_without_count(self):
+        response = self.client.get(self.url, {'count': 'false', 'page': 2})
+        self.assertIsNone(response.data['count'])
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNone(response.data['next'])
+        self.assertIsNotNone(response.data['previous'])
+
+
+class ProjectRoleResolverTests(APITestCase):
+    def setUp(self):
+        from projects.member_models import ProjectMember
+        from projects.models import Project
+
+        self.user = User.objects.create_user(username='roles', password='password123')
+        self.other = User.objects.create_user(username='other', password='password123', email='other@example.com')
+        self.owned = Project.objects.create(name='Owned', owner=self.user)
+        self.admin_of = Project.objects.create(name='Admin', owner=self.other)
+        self.viewer_of = Project.objects.create(name='Viewer', owner=self.other)
+        self.foreign = Project.objects.create(name='Foreign', owner=self.other)
+        ProjectMember.objects.create(project=self.admin_of, user=self.user, role='admin')
+        ProjectMember.objects.create(project=self.viewer_of, user=self.user, role='viewer')
+        self.client.force_authenticate(user=self.user)
+
+    def permission_queries(self, queries):
+        # Role lookups (not the task list's membership subquery)
+        return [q['sql'] for q in queries if '"projects_projectmember"."role"' in q['sql']]
+
+    def test_roles_loaded_in_one_query(self):
+        from core.permissions import ProjectRoles
+
+        roles = ProjectRoles(self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(roles.role(self.owned), 'owner')  # owner without a member row
+            self.assertEqual(roles.role(self.admin_of.pk), 'admin')
+            self.assertEqual(roles.role(self.viewer_of), 'viewer')
+            self.assertIsNone(roles.role(self.foreign))
+            self.assertTrue(roles.has_role(self.admin_of, ('owner', 'admin')))
+
+    def test_task_patch_checks_roles_once(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from tasks.models import Task
+
+        task = Task.objects.create(title='Shared', owner=self.user, project=self.admin_of)
+        url = reverse('task-detail', kwargs={'pk': task.id})
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.patch(url, {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(self.permission_queries(ctx.captured_queries)), 1)
+
+        # Viewers can read but not edit
+        task = Task.objects.create(title='Read only', owner=self.user, project=self.viewer_of)
+        url = reverse('task-detail', kwargs={'pk': task.id})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.patch(url, {'title': 'No'}, format='json').status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_member_management_uses_resolver(self):
+        url = reverse('project-members-list', kwargs={'project_pk': self.viewer_of.pk})
+        response = self.client.post(url, {'email': 'other@example.com', 'role': 'member'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        url = reverse('project-members-list', kwargs={'project_pk': self.owned.pk})
+        response = self.client.post(url, {'email': 'other@example.com', 'role': 'member'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
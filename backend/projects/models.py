@@ -1,8 +1,45 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.utils import timezone
 import uuid
 
+from .member_models import ProjectMember
+
+
+class ProjectQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Projects `user` owns or is a member of. Membership is an uncorrelated
+        semi-join on ProjectMember rather than a join, so no DISTINCT is
+        needed and both branches of the OR are answered from an index.
+        """
+        memberships = ProjectMember.objects.filter(user=user).values('project_id')
+        return self.filter(models.Q(owner=user) | models.Q(pk__in=memberships))
+
+    def with_member_count(self):
+        """Annotate member_count so serializers don't COUNT per row."""
+        counts = (
+            ProjectMember.objects.filter(project=models.OuterRef('pk'))
+            .order_by().values('project').annotate(n=models.Count('pk')).values('n')
+        )
+        return self.annotate(member_count=Coalesce(models.Subquery(counts), 0))
+
+    def for_fields(self, fields):
+        """
+        Annotate and prefetch only what ProjectSerializer needs to render
+        `fields` (e.g. a ?fields= pruned serializer's field names).
+        """
+        queryset = self
+        if 'memberCount' in fields:
+            queryset = queryset.with_member_count()
+        if 'members' in fields:
+            queryset = queryset.prefetch_related(models.Prefetch(
+                'members', queryset=ProjectMember.objects.select_related('user', 'invited_by'),
+            ))
+        return queryset
+
+
 class Project(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=255)
@@ -11,6 +48,8 @@ class Project(models.Model):
     board_settings = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ProjectQuerySet.as_manager()
     
     @staticmethod
     def get_default_board_settings():
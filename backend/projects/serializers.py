@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Project
 from .member_models import ProjectMember
+from core.serializers import SparseFieldsetMixin
 
 
 class ProjectMemberSerializer(serializers.ModelSerializer):
@@ -22,7 +23,7 @@ class ProjectMemberSerializer(serializers.ModelSerializer):
         return value
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     title = serializers.CharField(source='name')
     createdAt = serializers.DateTimeField(source='created_at', read_only=True)
     updatedAt = serializers.DateTimeField(source='updated_at', read_only=True)
@@ -42,5 +43,7 @@ class ProjectSerializer(serializers.ModelSerializer):
         return obj.get_board_columns()
     
     def get_memberCount(self, obj):
-        return obj.members.count()
+        # Annotated by ProjectQuerySet.with_member_count() on list/detail reads
+        count = getattr(obj, 'member_count', None)
+        return obj.members.count() if count is None else count
 
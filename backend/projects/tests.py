@@ -1,8 +1,11 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
 from .models import Project
+from .member_models import ProjectMember
 from tasks.models import Task
 
 User = get_user_model()
@@ -59,3 +62,61 @@ class ProjectTests(APITestCase):
         
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_project_sparse_fieldsets(self):
+        Project.objects.create(name='Sparse', owner=self.user1)
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.get(self.list_url, {'fields': 'id,title,memberCount'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title', 'memberCount'})
+
+        response = self.client.get(self.list_url, {'omit': 'members,boardColumns'})
+        self.assertNotIn('members', response.data['results'][0])
+        self.assertIn('boardSettings', response.data['results'][0])
+
+    def test_project_list_conditional_get(self):
+        project = Project.objects.create(name='Polled', owner=self.user1)
+        ProjectMember.objects.create(project=project, user=self.user1, role='owner')
+        self.client.force_authenticate(user=self.user1)
+        etag = self.client.get(self.list_url)['ETag']
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Membership changes alter the nested members list
+        self.user2.email = 'user2@example.com'
+        self.user2.save()
+        url = reverse('project-members-list', args=[project.id])
+        self.client.post(url, {'email': self.user2.email, 'role': 'member'}, format='json')
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results'][0]['members']), 2)
+
+    def test_project_list_query_count(self):
+        def make_projects(count):
+            for i in range(count):
+                project = Project.objects.create(name=f'Listed {i}', owner=self.user2)
+                ProjectMember.objects.create(project=project, user=self.user2, role='owner', invited_by=self.user2)
+                ProjectMember.objects.create(project=project, user=self.user1, role='member', invited_by=self.user2)
+
+        self.client.force_authenticate(user=self.user1)
+        make_projects(2)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.list_url)
+        make_projects(18)
+        # Validators, count, page and one prefetch of members with their users
+        with self.assertNumQueries(len(few)):
+            response = self.client.get(self.list_url)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual({project['memberCount'] for project in response.data['results']}, {2})
+        self.assertEqual(len(response.data['results'][0]['members']), 2)
+
+    def test_owned_and_member_projects_listed_once(self):
+        owned = Project.objects.create(name='Mine', owner=self.user1)
+        ProjectMember.objects.create(project=owned, user=self.user1, role='owner')
+        shared = Project.objects.create(name='Theirs', owner=self.user2)
+        ProjectMember.objects.create(project=shared, user=self.user1, role='viewer')
+        Project.objects.create(name='Private', owner=self.user2)
+
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.get(self.list_url)
+        self.assertEqual(sorted(project['title'] for project in response.data['results']), ['Mine', 'Theirs'])
+        self.assertEqual(response.data['count'], 2)
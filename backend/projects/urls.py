@@ -1,9 +1,15 @@
 from django.urls import path
 from .views import ProjectListCreateView, ProjectDetailView, ProjectMemberViewSet
+from tasks.views import ProjectBoardView, ProjectDependencyGraphView
+from tasks.analytics_views import BurnUpView, CumulativeFlowView
 
 urlpatterns = [
     path('', ProjectListCreateView.as_view(), name='project-list-create'),
     path('<uuid:pk>/', ProjectDetailView.as_view(), name='project-detail'),
+    path('<uuid:pk>/board/', ProjectBoardView.as_view(), name='project-board'),
+    path('<uuid:pk>/dependencies/', ProjectDependencyGraphView.as_view(), name='project-dependencies'),
+    path('<uuid:pk>/analytics/cumulative-flow/', CumulativeFlowView.as_view(), name='project-cumulative-flow'),
+    path('<uuid:pk>/analytics/burn-up/', BurnUpView.as_view(), name='project-burn-up'),
     
     # Member management endpoints
     path('<uuid:project_pk>/members/', ProjectMemberViewSet.as_view({
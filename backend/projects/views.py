@@ -2,6 +2,7 @@ from rest_framework import generics, permissions, pagination, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from pydantic import ValidationError
 
 from .models import Project
@@ -11,19 +12,22 @@ from .schemas import ProjectCreateSchema, ProjectUpdateSchema, MemberAddSchema,
 from users.models import User
 
 from activity.signals import log_activity
-from core.permissions import CanManageProject
+from core.mixins import ConditionalGetMixin
+from core.permissions import CanManageProject, project_roles
 
 
-class ProjectListCreateView(generics.ListCreateAPIView):
+class ProjectListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     serializer_class = ProjectSerializer
     pagination_class = pagination.PageNumberPagination
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        # Include projects where user is owner OR a member
-        owned = Project.objects.filter(owner=self.request.user)
-        member_of = Project.objects.filter(members__user=self.request.user)
-        return (owned | member_of).distinct()
+        # Projects the user owns or is a member of, with what the
+        # (possibly ?fields= pruned) serializer renders loaded up front
+        return Project.objects.visible_to(self.request.user).for_fields(self.get_serializer().fields)
+
+    def get_conditional_queryset(self):
+        return self.filter_queryset(Project.objects.visible_to(self.request.user))
 
     def create(self, request, *args, **kwargs):
         # Pydantic validation
@@ -52,9 +56,7 @@ class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated, CanManageProject]
 
     def get_queryset(self):
-        owned = Project.objects.filter(owner=self.request.user)
-        member_of = Project.objects.filter(members__user=self.request.user)
-        return (owned | member_of).distinct()
+        return Project.objects.visible_to(self.request.user).for_fields(self.get_serializer().fields)
 
     def update(self, request, *args, **kwargs):
         # Pydantic validation
@@ -89,13 +91,13 @@ class ProjectMemberViewSet(viewsets.ModelViewSet):
         project_id = self.kwargs.get('project_pk')
         return get_object_or_404(Project, id=project_id)
 
+    def touch_project(self, project):
+        # Members are nested in the project representation
+        Project.objects.filter(pk=project.pk).update(updated_at=timezone.now())
+
     def check_member_permission(self, project, required_roles):
-        """Check if current user has required role."""
-        try:
-            membership = ProjectMember.objects.get(project=project, user=self.request.user)
-            return membership.role in required_roles
-        except ProjectMember.DoesNotExist:
-            return project.owner == self.request.user  # Owner always has access
+        """Check if current user has required role (the owner always has access)."""
+        return project_roles(self.request).has_role(project, required_roles)
 
     def create(self, request, *args, **kwargs):
         """Add a new member to the project."""
@@ -131,6 +133,7 @@ class ProjectMemberViewSet(viewsets.ModelViewSet):
             role=role,
             invited_by=request.user
         )
+        self.touch_project(project)
 
         log_activity(request.user, 'assigned', 'project', project.id, project.name, description=f"Added user '{user.username}' as {role}")
         
@@ -163,6 +166,7 @@ class ProjectMemberViewSet(viewsets.ModelViewSet):
         if new_role != 'owner':
             member.role = new_role
             member.save()
+            self.touch_project(project)
             log_activity(request.user, 'assigned', 'project', project.id, project.name, description=f"Updated user '{member.user.username}' role to {new_role}")
 
         return Response(ProjectMemberSerializer(member).data)
@@ -185,6 +189,7 @@ class ProjectMemberViewSet(viewsets.ModelViewSet):
 
         member_id = str(member.id)
         member.delete()
+        self.touch_project(project)
         log_activity(request.user, 'removed', 'project', project.id, project.name, description=f"Removed user '{member.user.username}' from project")
 
         return Response(status=status.HTTP_204_NO_CONTENT)
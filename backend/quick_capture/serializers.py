@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from .models import QuickNote
 from tasks.serializers import TaskSerializer
+from core.serializers import SparseFieldsetMixin
 
-class QuickNoteSerializer(serializers.ModelSerializer):
+class QuickNoteSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     converted_task_details = TaskSerializer(source='converted_task', read_only=True)
 
     class Meta:
@@ -11,11 +11,13 @@ from .schemas import QuickNoteCreateSchema, QuickNoteUpdateSchema, ConvertToTask
 from tasks.models import Task
 from tasks.serializers import TaskSerializer
 from core.mixins import PydanticValidationMixin
+from core.pagination import KeysetPagination
 
 
 class QuickNoteViewSet(PydanticValidationMixin, viewsets.ModelViewSet):
     serializer_class = QuickNoteSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     
     # Pydantic schemas
     pydantic_create_schema = QuickNoteCreateSchema
@@ -23,6 +25,8 @@ class QuickNoteViewSet(PydanticValidationMixin, viewsets.ModelViewSet):
 
     def get_queryset(self):
         queryset = QuickNote.objects.filter(user=self.request.user)
+        if 'converted_task_details' in self.get_serializer().fields:
+            queryset = queryset.select_related('converted_task')
         archived = self.request.query_params.get('archived', None)
         if archived is not None:
             is_archived = archived.lower() == 'true'
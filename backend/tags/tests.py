@@ -4,6 +4,7 @@ from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
 from .models import Tag, TaskTag
 from tasks.models import Task, Subtask
+from tasks.ranking import DEFAULT_SUBTASK_ORDER_GAP
 from projects.models import Project
 
 User = get_user_model()
@@ -68,11 +69,12 @@ class SubtaskTests(APITestCase):
         self.client.post(url, {'title': 'First'}, format='json')
         self.client.post(url, {'title': 'Second'}, format='json')
         
+        # Orders are gapped so later moves only rewrite the moved subtask
         subtasks = Subtask.objects.filter(parent_task=self.task).order_by('order')
         self.assertEqual(subtasks[0].title, 'First')
-        self.assertEqual(subtasks[0].order, 0)
+        self.assertEqual(subtasks[0].order, DEFAULT_SUBTASK_ORDER_GAP)
         self.assertEqual(subtasks[1].title, 'Second')
-        self.assertEqual(subtasks[1].order, 1)
+        self.assertEqual(subtasks[1].order, 2 * DEFAULT_SUBTASK_ORDER_GAP)
 
     def test_task_has_subtask_stats(self):
         Subtask.objects.create(title='Done', is_completed=True, parent_task=self.task)
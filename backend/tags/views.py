@@ -23,10 +23,12 @@ class TagViewSet(viewsets.ModelViewSet):
 
     def perform_update(self, serializer):
         tag = serializer.save()
+        Task.objects.filter(task_tags__tag=tag).touch()
         log_grc_event(self.request.user, 'UPDATE', 'TAG', tag.id)
 
     def perform_destroy(self, instance):
         tag_id = instance.id
+        Task.objects.filter(task_tags__tag=instance).touch()
         instance.delete()
         log_grc_event(self.request.user, 'DELETE', 'TAG', tag_id)
 
@@ -58,6 +60,7 @@ class TaskTagViewSet(viewsets.ViewSet):
         task_tag, created = TaskTag.objects.get_or_create(task=task, tag=tag)
         
         if created:
+            Task.objects.filter(pk=task.pk).touch()
             log_grc_event(request.user, 'CREATE', 'TASK_TAG', task_tag.id, {'task_id': str(task.id), 'tag_id': str(tag.id)})
         
         serializer = TaskTagSerializer(task_tag)
@@ -70,6 +73,7 @@ class TaskTagViewSet(viewsets.ViewSet):
         
         task_tag_id = task_tag.id
         task_tag.delete()
+        Task.objects.filter(pk=task.pk).touch()
         log_grc_event(request.user, 'DELETE', 'TASK_TAG', task_tag_id)
         
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -5,12 +5,15 @@ class TaskDistributionSerializer(serializers.Serializer):
     priority = serializers.ListField(child=serializers.DictField())
 
 class ProjectPerformanceSerializer(serializers.Serializer):
-    id = serializers.IntegerField()
+    id = serializers.UUIDField()
     title = serializers.CharField()
     total_tasks = serializers.IntegerField()
     completed_tasks = serializers.IntegerField()
     pending_tasks = serializers.IntegerField()
+    overdue_tasks = serializers.IntegerField()
     completion_rate = serializers.FloatField()
+    total_points = serializers.IntegerField()
+    completed_points = serializers.IntegerField()
 
 class ProductivityTrendSerializer(serializers.Serializer):
     date = serializers.DateField()
@@ -1,10 +1,16 @@
-from django.db.models import Count, Q, F
-from django.db.models.functions import TruncDate
+import datetime
+import uuid
+
+from django.db.models import Count, F, Sum
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import permissions
-from .models import Task
+from rest_framework import permissions, status
+from .models import DailyCompletion, Task
 from projects.models import Project
+from .rollups import flow_snapshots
+from .stats import get_project_performance
 
 from .analytics_serializers import (
     TaskDistributionSerializer, 
@@ -12,6 +18,10 @@ from .analytics_serializers import (
     ProductivityTrendSerializer
 )
 
+DEFAULT_TREND_DAYS = 7
+DEFAULT_FLOW_DAYS = 30
+MAX_TREND_DAYS = 366
+
 class TaskDistributionView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -28,47 +38,121 @@ class TaskDistributionView(APIView):
         serializer.is_valid()
         return Response(serializer.data)
 
+def visible_projects(user):
+    """Projects the user owns or is a member of."""
+    return Project.objects.visible_to(user)
+
+
 class ProjectPerformanceView(APIView):
+    """
+    Task, story point and overdue counts for every project the user owns
+    or is a member of. Soft-deleted tasks are not counted; the numbers are
+    cached per project (see tasks.stats).
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        projects = Project.objects.filter(owner=request.user).annotate(
-            total_tasks=Count('tasks'),
-            completed_tasks=Count('tasks', filter=Q(tasks__is_completed=True)),
-            pending_tasks=Count('tasks', filter=Q(tasks__is_completed=False))
-        )
+        projects = list(visible_projects(request.user).values_list('id', 'name'))
+        performance = get_project_performance([project_id for project_id, _ in projects])
 
         data = []
-        for p in projects:
-            completion_rate = (p.completed_tasks / p.total_tasks * 100) if p.total_tasks > 0 else 0
+        for project_id, name in projects:
+            numbers = performance[str(project_id)]
+            total, completed = numbers['total_tasks'], numbers['completed_tasks']
+            completion_rate = (completed / total * 100) if total > 0 else 0
             data.append({
-                "id": p.id,
-                "title": p.name,
-                "total_tasks": p.total_tasks,
-                "completed_tasks": p.completed_tasks,
-                "pending_tasks": p.pending_tasks,
+                "id": project_id,
+                "title": name,
+                **numbers,
+                "pending_tasks": total - completed,
                 "completion_rate": round(completion_rate, 1)
             })
 
         serializer = ProjectPerformanceSerializer(data, many=True)
         return Response(serializer.data)
 
+def parse_day_range(params, default_days):
+    """
+    (start, end) dates from ?days=N (the last N days) or
+    ?start=YYYY-MM-DD[&end=YYYY-MM-DD]. Returns ((start, end), None), or
+    (None, error_response) for invalid or too long ranges.
+    """
+    today = timezone.localdate()
+    try:
+        if 'start' in params:
+            start = datetime.date.fromisoformat(params['start'])
+            end = datetime.date.fromisoformat(params['end']) if 'end' in params else today
+        else:
+            days = int(params.get('days', default_days))
+            if days < 1:
+                raise ValueError
+            start, end = today - datetime.timedelta(days=days), today
+    except ValueError:
+        return None, Response({'error': 'Use ?days=N or ?start=YYYY-MM-DD&end=YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+    if start > end or (end - start).days > MAX_TREND_DAYS:
+        return None, Response({'error': f'Ranges span at most {MAX_TREND_DAYS} days'}, status=status.HTTP_400_BAD_REQUEST)
+    return (start, end), None
+
+
 class ProductivityTrendView(APIView):
+    """
+    Tasks completed per day, read from the DailyCompletion rollup.
+
+    ?days=N covers the last N days (default 7, at most MAX_TREND_DAYS);
+    ?start=YYYY-MM-DD&end=YYYY-MM-DD picks an explicit range instead.
+    ?project=<id> narrows it to one project.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        import datetime
-        last_7_days = datetime.date.today() - datetime.timedelta(days=7)
-        
-        trend = list(Task.objects.filter(
-            owner=request.user,
-            is_completed=True,
-            updated_at__date__gte=last_7_days
-        ).annotate(
-            date=TruncDate('updated_at')
-        ).values('date').annotate(
-            count=Count('id')
-        ).order_by('date'))
+        day_range, error_response = parse_day_range(request.query_params, DEFAULT_TREND_DAYS)
+        if error_response:
+            return error_response
 
+        rows = DailyCompletion.objects.filter(user=request.user, day__range=day_range)
+        if request.query_params.get('project'):
+            try:
+                rows = rows.filter(project_id=uuid.UUID(request.query_params['project']))
+            except ValueError:
+                return Response({'error': 'Invalid project id'}, status=status.HTTP_400_BAD_REQUEST)
+
+        trend = list(
+            rows.values(date=F('day')).annotate(count=Sum('completed'))
+            .filter(count__gt=0).order_by('date')
+        )
         serializer = ProductivityTrendSerializer(trend, many=True)
         return Response(serializer.data)
+
+
+class ProjectFlowView(APIView):
+    """
+    Base for per-project charts built from the ProjectStatusFlow rollup,
+    for projects the user owns or is a member of. Takes the same range
+    parameters as ProductivityTrendView (default: the last 30 days).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        project = get_object_or_404(visible_projects(request.user), pk=pk)
+        day_range, error_response = parse_day_range(request.query_params, DEFAULT_FLOW_DAYS)
+        if error_response:
+            return error_response
+        return Response([self.row(day, totals) for day, totals in flow_snapshots(project.pk, *day_range)])
+
+
+class CumulativeFlowView(ProjectFlowView):
+    """Tasks in each status at the end of every day."""
+
+    def row(self, day, totals):
+        return {'date': day, **{status: tasks for status, (tasks, _) in totals.items()}}
+
+
+class BurnUpView(ProjectFlowView):
+    """Story points in scope (every live task) and done at the end of every day."""
+
+    def row(self, day, totals):
+        return {
+            'date': day,
+            'total_points': sum(points for _, points in totals.values()),
+            'completed_points': totals.get('done', (0, 0))[1],
+        }
@@ -1,5 +1,25 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_delete
+
+
+def install_search_index(sender, using='default', **kwargs):
+    from .search import install_sqlite_fts
+    install_sqlite_fts(using)
 
 
 class TasksConfig(AppConfig):
     name = 'tasks'
+
+    def ready(self):
+        post_migrate.connect(install_search_index, sender=self)
+
+        from .dependencies import blockers_changed, task_deleting, task_removed
+        from .rollups import task_deleted
+        from .stats import task_changed
+        Task = self.get_model('Task')
+        post_save.connect(task_changed, sender=Task)
+        post_delete.connect(task_changed, sender=Task)
+        post_delete.connect(task_deleted, sender=Task)
+        m2m_changed.connect(blockers_changed, sender=Task.blocked_by.through)
+        pre_delete.connect(task_deleting, sender=Task)
+        post_delete.connect(task_removed, sender=Task)
@@ -0,0 +1,109 @@
+"""
+Kanban board loading.
+
+Every visible column of Project.get_board_columns() is filled from a single
+windowed query: rows are numbered per status with ROW_NUMBER() and the
+column totals come from COUNT() over the same partition, so the first screen
+of a large board costs one round trip instead of one query per column.
+"""
+from django.conf import settings
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from core.pagination import KeysetPagination
+from .models import Task
+
+
+DEFAULT_BOARD_COLUMN_LIMIT = 20
+MAX_BOARD_COLUMN_LIMIT = 100
+
+# (field, descending, nullable), tie-broken on the primary key like KeysetPagination
+BOARD_ORDERING = [('rank', False, False), ('id', False, False)]
+
+
+def parse_column_limit(request):
+    """
+    Read ?limit=N (tasks per column). Invalid values fall back to the
+    configured default; values are clamped to MAX_BOARD_COLUMN_LIMIT.
+    """
+    default = getattr(settings, 'BOARD_COLUMN_LIMIT', DEFAULT_BOARD_COLUMN_LIMIT)
+    try:
+        limit = int(request.query_params.get('limit', default))
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, MAX_BOARD_COLUMN_LIMIT))
+
+
+class BoardLoader:
+    """
+    Loads board columns for a project.
+
+    Continuation cursors use the same opaque keyset format as
+    core.pagination.KeysetPagination, scoped to one column's status.
+    """
+
+    def __init__(self, project, queryset=None):
+        self.project = project
+        self.queryset = queryset if queryset is not None else Task.objects.all()
+        self.paginator = KeysetPagination()
+        self.signature = [f"{'-' if desc else ''}{name}" for name, desc, _ in BOARD_ORDERING]
+
+    def visible_columns(self):
+        return [column for column in self.project.get_board_columns() if column.get('visible', True)]
+
+    def decode_cursor(self, token):
+        """Return the ordering values of the last task seen; raises NotFound when invalid."""
+        values, _ = self.paginator.decode_cursor(token, self.signature)
+        return values
+
+    def load(self, columns, limit, cursor_values=None):
+        """
+        Return [{id, title, status, count, tasks, next}] for `columns`.
+        `cursor_values` (from decode_cursor) continues a single column.
+        """
+        statuses = {column['status'] for column in columns}
+        ordering = self.paginator.order_expressions(BOARD_ORDERING, False)
+        partition = {'partition_by': [F('status')]}
+
+        rows = (
+            self.queryset
+            .filter(project=self.project, status__in=statuses)
+            .annotate(
+                board_row=Window(RowNumber(), order_by=ordering, **partition),
+                board_count=Window(Count('pk'), **partition),
+            )
+        )
+        if cursor_values is None:
+            rows = rows.filter(board_row__lte=limit)
+        else:
+            # Rows up to the cursor are counted rather than filtered out, so the
+            # window still spans the whole column and board_count stays the total
+            beyond = self.paginator.keyset_filter(BOARD_ORDERING, cursor_values, False)
+            rows = rows.annotate(board_seen=Window(Count('pk', filter=~beyond), **partition)).filter(
+                board_row__gt=F('board_seen'), board_row__lte=F('board_seen') + limit,
+            )
+        rows = rows.order_by('status', 'board_row')
+
+        by_status = {status: [] for status in statuses}
+        counts = dict.fromkeys(statuses, 0)
+        for task in rows:
+            by_status[task.status].append(task)
+            counts[task.status] = task.board_count
+
+        result = []
+        for column in columns:
+            tasks = by_status[column['status']]
+            has_more = bool(tasks) and tasks[-1].board_row < tasks[-1].board_count
+            result.append({
+                'id': column.get('id', column['status']),
+                'title': column.get('title', column['status']),
+                'status': column['status'],
+                'count': counts[column['status']],
+                'tasks': tasks,
+                'next': self.encode_cursor(tasks[-1]) if has_more else None,
+            })
+        return result
+
+    def encode_cursor(self, task):
+        values = self.paginator.row_values(task, BOARD_ORDERING)
+        return self.paginator.encode_cursor(values, False, self.signature)
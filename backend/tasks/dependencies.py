@@ -0,0 +1,476 @@
+"""
+Dependency helpers for Task.blocked_by.
+
+- BlockerGraph loads the blocker graph level by level so nested
+  representations stay bounded.
+- DependencyGraph holds a whole project's graph for topological order,
+  the critical path and ready tasks. Its edge list is one query and is
+  cached per project; task state is read fresh with every load, so only
+  edge changes and tasks moving between projects invalidate it.
+- TaskDependencyClosure rows are recomputed for the affected blockers
+  and their ancestors whenever blocked_by changes; rebuild_closure()
+  rebuilds the table.
+- creates_cycle() guards writes to blocked_by.
+"""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import chain, islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from .stats import current_versions, invalidate_versions
+
+
+DEFAULT_BLOCKED_BY_MAX_DEPTH = 5
+DEFAULT_DEPENDENCY_GRAPH_TIMEOUT = 3600
+
+CRITICAL_PATH_WEIGHTS = ('time_estimate', 'story_points')
+
+COMPACT_FIELDS = ('id', 'title', 'status', 'is_completed')
+
+# Columns a task's blockers show in its own representation; changing them
+# on a blocker changes how the tasks below it render
+DEPENDENT_FIELDS = frozenset({'title', 'status', 'is_completed', 'deleted_at'})
+
+
+def compact_task(task):
+    """Minimal blocker representation: id, title, status, is_completed."""
+    return {
+        'id': str(task.id),
+        'title': task.title,
+        'status': task.status,
+        'is_completed': task.is_completed,
+    }
+
+
+def touch_blocked_tasks(blocker_ids):
+    """
+    Bump updated_at on every task `blocker_ids` block, directly or further
+    down (nested blocked_by goes several levels deep), so conditional GET
+    validators notice their blockers changed.
+    """
+    from .models import Task
+    blocker_ids = list(blocker_ids)
+    if blocker_ids:
+        Task.objects.all_with_deleted().filter(ancestor_links__ancestor_id__in=blocker_ids).touch()
+
+
+def parse_blocked_by_depth(request):
+    """
+    Read ?blocked_by_depth=N from the request.
+    Invalid values fall back to 1; values are clamped to the configured maximum.
+    """
+    max_depth = getattr(settings, 'TASK_BLOCKED_BY_MAX_DEPTH', DEFAULT_BLOCKED_BY_MAX_DEPTH)
+    if request is None:
+        return 1
+    try:
+        depth = int(request.query_params.get('blocked_by_depth', 1))
+    except (TypeError, ValueError):
+        return 1
+    return max(1, min(depth, max_depth))
+
+
+class BlockerGraph:
+    """
+    Lazily loaded slice of the blocked_by graph.
+
+    expand() walks one level at a time with a single query per level
+    against the M2M through table and never revisits a node, so a cyclic
+    graph costs at most `depth` queries.
+    """
+
+    def __init__(self):
+        self.nodes = {}   # task_id -> compact dict
+        self.edges = {}   # task_id -> [blocker_id, ...]
+
+    def expand(self, root_ids, depth):
+        """Make sure every node within `depth` levels of root_ids has its edges loaded."""
+        level = set(root_ids)
+        seen = set()
+        for _ in range(depth):
+            level -= seen
+            if not level:
+                break
+            seen |= level
+            missing = [pk for pk in level if pk not in self.edges]
+            if missing:
+                self._load(missing)
+            level = {blocker_id for pk in level for blocker_id in self.edges[pk]}
+
+    def _load(self, task_ids):
+        from .models import Task
+        for pk in task_ids:
+            self.edges[pk] = []
+        rows = (
+            Task.blocked_by.through.objects
+            .filter(from_task_id__in=task_ids, to_task__deleted_at__isnull=True)
+            .values_list('from_task_id', *(f'to_task__{f}' for f in COMPACT_FIELDS))
+        )
+        for from_id, to_id, title, status, is_completed in rows:
+            self.edges[from_id].append(to_id)
+            self.nodes.setdefault(to_id, {
+                'id': str(to_id),
+                'title': title,
+                'status': status,
+                'is_completed': is_completed,
+            })
+
+    def render(self, task_id, depth, _path=None):
+        """
+        Nested blocker list for task_id, `depth` levels deep.
+        A blocker already on the current path is emitted compact and not expanded.
+        """
+        path = (_path or frozenset()) | {task_id}
+        result = []
+        for blocker_id in self.edges.get(task_id, []):
+            item = dict(self.nodes[blocker_id])
+            if depth > 1 and blocker_id not in path:
+                item['blocked_by'] = self.render(blocker_id, depth - 1, path)
+            result.append(item)
+        return result
+
+
+def graph_version_key(project_id):
+    return f'tasks:dependency-graph:version:{project_id}'
+
+
+def graph_key(project_id):
+    return f'tasks:dependency-graph:{project_id}'
+
+
+def project_edges(project_id):
+    """
+    {task_id: [(blocker_id, blocker_project_id), ...]} for every task of
+    the project (soft-deleted ones included), from the cache or one query.
+    Ids are strings, which keeps the cached entry cheap to unpickle.
+    """
+    from .models import Task
+    cached = cache.get_many([graph_version_key(project_id), graph_key(project_id)])
+    version = current_versions([graph_version_key(project_id)], cached)[graph_version_key(project_id)]
+    entry = cached.get(graph_key(project_id))
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    edges = {}
+    rows = (
+        Task.blocked_by.through.objects.filter(from_task__project_id=project_id)
+        .values_list('from_task_id', 'to_task_id', 'to_task__project_id')
+    )
+    for task_id, blocker_id, blocker_project_id in rows:
+        edges.setdefault(str(task_id), []).append((str(blocker_id), blocker_project_id and str(blocker_project_id)))
+    timeout = getattr(settings, 'DEPENDENCY_GRAPH_CACHE_TIMEOUT', DEFAULT_DEPENDENCY_GRAPH_TIMEOUT)
+    cache.set(graph_key(project_id), (version, edges), timeout)
+    return edges
+
+
+def invalidate_dependency_graph(project_ids):
+    """Mark the cached edge lists of `project_ids` stale."""
+    invalidate_versions([graph_version_key(project_id) for project_id in set(project_ids) if project_id is not None])
+
+
+def invalidate_task_dependencies(task_ids):
+    """Invalidate the graphs holding the blocked_by edges of `task_ids`."""
+    from .models import Task
+    invalidate_dependency_graph(
+        Task.objects.all_with_deleted().filter(pk__in=task_ids).values_list('project_id', flat=True).distinct()
+    )
+
+
+def blocker_ancestors(task_ids):
+    """Ids of the tasks that block any of `task_ids`, directly or not."""
+    from .models import TaskDependencyClosure
+    return set(
+        TaskDependencyClosure.objects.filter(descendant_id__in=task_ids)
+        .values_list('ancestor_id', flat=True).distinct()
+    )
+
+
+def _closure_rows(ancestor_ids, blocking):
+    """
+    TaskDependencyClosure rows for `ancestor_ids`, by breadth-first search
+    over `blocking` ({blocker_id: [ids it blocks]}), so depths are the
+    shortest. On a cycle a task ends up among its own descendants.
+    """
+    from .models import TaskDependencyClosure
+    for ancestor_id in ancestor_ids:
+        seen, level, depth = set(), blocking.get(ancestor_id, ()), 1
+        while level:
+            below = []
+            for task_id in level:
+                if task_id not in seen:
+                    seen.add(task_id)
+                    yield TaskDependencyClosure(ancestor_id=ancestor_id, descendant_id=task_id, depth=depth)
+                    below.extend(blocking.get(task_id, ()))
+            level, depth = below, depth + 1
+
+
+def refresh_closure(ancestor_ids, batch_size=1000):
+    """
+    Recompute the closure rows of `ancestor_ids` from the blocked_by edges
+    below them, loaded with one query per level (and batch). Returns the
+    rows written.
+    """
+    from .models import Task, TaskDependencyClosure
+    ancestor_ids = set(ancestor_ids)
+    if not ancestor_ids:
+        return 0
+    blocking, frontier = {}, list(ancestor_ids)
+    while frontier:
+        for task_id in frontier:
+            blocking[task_id] = []
+        for start in range(0, len(frontier), batch_size):
+            edges = Task.blocked_by.through.objects.filter(to_task_id__in=frontier[start:start + batch_size])
+            for blocker_id, task_id in edges.values_list('to_task_id', 'from_task_id'):
+                blocking[blocker_id].append(task_id)
+        frontier = list({task_id for task_id in chain.from_iterable(blocking[pk] for pk in frontier)} - blocking.keys())
+
+    rows = list(_closure_rows(ancestor_ids, blocking))
+    with transaction.atomic():
+        TaskDependencyClosure.objects.filter(ancestor_id__in=ancestor_ids).delete()
+        TaskDependencyClosure.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def rebuild_closure(batch_size=1000):
+    """Rebuild the whole closure table from the edge list. Returns the rows written."""
+    from .models import Task, TaskDependencyClosure
+    blocking = {}
+    edges = Task.blocked_by.through.objects.values_list('to_task_id', 'from_task_id')
+    for blocker_id, task_id in edges.iterator(chunk_size=batch_size):
+        blocking.setdefault(blocker_id, []).append(task_id)
+
+    written = 0
+    with transaction.atomic():
+        TaskDependencyClosure.objects.all().delete()
+        rows = _closure_rows(blocking, blocking)
+        while batch := list(islice(rows, batch_size)):
+            TaskDependencyClosure.objects.bulk_create(batch)
+            written += len(batch)
+    return written
+
+
+def blockers_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """m2m_changed receiver for Task.blocked_by (TasksConfig.ready)."""
+    if action == 'pre_clear' and reverse:
+        invalidate_task_dependencies(instance.blocking.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            invalidate_dependency_graph([instance.project_id])
+        elif pk_set:
+            invalidate_task_dependencies(pk_set)
+
+        # The closure is still as it was before the change, so it knows
+        # every blocker a cleared task had
+        if reverse:
+            blockers = {instance.pk}
+        elif action == 'post_clear':
+            blockers = blocker_ancestors([instance.pk])
+        else:
+            blockers = set(pk_set)
+        refresh_closure(blockers | blocker_ancestors(blockers))
+
+
+def blocked_by_bulk_created(edges):
+    """Bring the caches and the closure up to date after bulk-creating `edges`, which sends no m2m_changed."""
+    if not edges:
+        return
+    invalidate_task_dependencies({edge.from_task_id for edge in edges})
+    blockers = {edge.to_task_id for edge in edges}
+    refresh_closure(blockers | blocker_ancestors(blockers))
+
+
+# Ids being hard-deleted inside deleting_tasks()
+_deleting = ContextVar('deleting_tasks', default=frozenset())
+
+
+@contextmanager
+def deleting_tasks(task_ids):
+    """
+    Hard-delete `task_ids` inside the block with one closure lookup and
+    one refresh for all of them, instead of one per task.
+    """
+    task_ids = frozenset(task_ids)
+    ancestors = blocker_ancestors(task_ids)
+    token = _deleting.set(task_ids)
+    try:
+        yield
+    finally:
+        _deleting.reset(token)
+    refresh_closure(ancestors - task_ids)
+
+
+def task_deleting(sender, instance, **kwargs):
+    """pre_delete receiver for Task: remember who (transitively) blocked it."""
+    if instance.pk not in _deleting.get():
+        instance._closure_ancestors = blocker_ancestors([instance.pk])
+
+
+def task_removed(sender, instance, **kwargs):
+    """post_delete receiver for Task: drop chains that went through it."""
+    if instance.pk not in _deleting.get():
+        refresh_closure(getattr(instance, '_closure_ancestors', set()) - {instance.pk})
+
+
+def creates_cycle(task, blockers):
+    """
+    Whether making `task` blocked by `blockers` ({blocker_id: project_id},
+    either as UUIDs or strings) closes a cycle, i.e. `task` is among the blockers' own transitive
+    blockers. Edges inside the task's project come from its cached graph;
+    each further hop through other projects is one query.
+    """
+    from .models import Task
+    if task.pk is None:
+        return False
+    task_id, project_id = str(task.pk), task.project_id and str(task.project_id)
+    local = project_edges(project_id) if project_id else {}
+    frontier, seen = {str(pk): blocker_project_id and str(blocker_project_id) for pk, blocker_project_id in blockers.items()}, set()
+    while frontier:
+        if task_id in frontier:
+            return True
+        seen.update(frontier)
+        level = {}
+        remote = [pk for pk, blocker_project_id in frontier.items() if blocker_project_id is None or blocker_project_id != project_id]
+        for pk in frontier:
+            if pk not in remote:
+                level.update(local.get(pk, ()))
+        if remote:
+            rows = Task.blocked_by.through.objects.filter(from_task_id__in=remote).values_list('to_task_id', 'to_task__project_id')
+            level.update((str(pk), blocker_project_id and str(blocker_project_id)) for pk, blocker_project_id in rows)
+        frontier = {pk: project_id for pk, project_id in level.items() if pk not in seen}
+    return False
+
+
+def cyclic_edges(edges, batch_size=1000):
+    """
+    Positions of the new blocked_by `edges` ((task_id, blocker_id) pairs,
+    not written yet) that would close a cycle, given the stored edges and
+    the new edges accepted before them. Self-loops are cycles too. Stored
+    edges are loaded level by level, each task's only once.
+    """
+    from .models import Task
+    stored, added, rejected = {}, {}, set()
+
+    def reaches(start, target):
+        frontier, seen = {start}, set()
+        while frontier:
+            if target in frontier:
+                return True
+            seen |= frontier
+            missing = [pk for pk in frontier if pk not in stored]
+            for start_at in range(0, len(missing), batch_size):
+                for pk in missing[start_at:start_at + batch_size]:
+                    stored[pk] = []
+                rows = Task.blocked_by.through.objects.filter(from_task_id__in=missing[start_at:start_at + batch_size])
+                for task_id, blocker_id in rows.values_list('from_task_id', 'to_task_id'):
+                    stored[task_id].append(blocker_id)
+            frontier = {
+                blocker_id for pk in frontier for blocker_id in chain(stored[pk], added.get(pk, ()))
+            } - seen
+        return False
+
+    for position, (task_id, blocker_id) in enumerate(edges):
+        if reaches(blocker_id, task_id):
+            rejected.add(position)
+        else:
+            added.setdefault(task_id, []).append(blocker_id)
+    return rejected
+
+
+class DependencyGraph:
+    """
+    A project's active tasks and the blocked_by edges between them.
+
+    `nodes` maps task ids (strings) to their compact representation plus
+    story_points and time_estimate; `blockers` lists each task's active
+    blockers, and `external` holds blockers from other projects (or none),
+    which count for ready() but are not part of the graph otherwise.
+    """
+
+    NODE_FIELDS = (*COMPACT_FIELDS, 'story_points', 'time_estimate', 'project_id')
+
+    def __init__(self, project_id):
+        from .models import Task
+        project_id = str(project_id)
+        edges = project_edges(project_id)
+        external_ids = {
+            blocker_id for blockers in edges.values()
+            for blocker_id, blocker_project_id in blockers if blocker_project_id != project_id
+        }
+        self.nodes, self.external = {}, {}
+        rows = Task.objects.filter(Q(project_id=project_id) | Q(pk__in=external_ids)).order_by().values(*self.NODE_FIELDS)
+        for row in rows:
+            row['id'] = str(row['id'])
+            target = self.nodes if str(row.pop('project_id')) == project_id else self.external
+            target[row['id']] = row
+        self.blockers = {
+            task_id: [
+                blocker_id for blocker_id, _ in edges.get(task_id, ())
+                if blocker_id in self.nodes or blocker_id in self.external
+            ]
+            for task_id in self.nodes
+        }
+
+    @staticmethod
+    def is_done(node):
+        return node['is_completed'] or node['status'] == 'done'
+
+    def topological_order(self):
+        """
+        (ordered ids, cyclic ids): every task after its blockers, ties in
+        id order. Tasks on or behind a cycle (from before cycles were
+        rejected) can't be ordered and are returned separately.
+        """
+        waiting = {task_id: 0 for task_id in self.nodes}
+        blocking = {task_id: [] for task_id in self.nodes}
+        for task_id, blockers in self.blockers.items():
+            for blocker_id in blockers:
+                if blocker_id in self.nodes:
+                    waiting[task_id] += 1
+                    blocking[blocker_id].append(task_id)
+        queue = deque(sorted(task_id for task_id, count in waiting.items() if not count))
+        order = []
+        while queue:
+            task_id = queue.popleft()
+            order.append(task_id)
+            for blocked_id in blocking[task_id]:
+                waiting[blocked_id] -= 1
+                if not waiting[blocked_id]:
+                    queue.append(blocked_id)
+        ordered = set(order)
+        return order, sorted(task_id for task_id in self.nodes if task_id not in ordered)
+
+    def critical_path(self, weight='time_estimate', order=None):
+        """
+        (length, ids): the chain of blockers with the most remaining work,
+        where a task weighs its `weight` field (0 when unset or done).
+        """
+        order = order if order is not None else self.topological_order()[0]
+        finish, previous = {}, {}
+        for task_id in order:
+            node = self.nodes[task_id]
+            before = max(
+                (blocker_id for blocker_id in self.blockers[task_id] if blocker_id in finish),
+                key=finish.get, default=None,
+            )
+            own = 0 if self.is_done(node) else (node[weight] or 0)
+            finish[task_id] = own + (finish[before] if before else 0)
+            previous[task_id] = before
+        end = max(finish, key=finish.get, default=None)
+        path = []
+        while end is not None:
+            path.append(end)
+            end = previous[end]
+        return (finish[path[0]] if path else 0), path[::-1]
+
+    def ready(self):
+        """Open tasks whose blockers are all done, in id order."""
+        def done(blocker_id):
+            return self.is_done(self.nodes.get(blocker_id) or self.external[blocker_id])
+        return sorted(
+            task_id for task_id, node in self.nodes.items()
+            if not self.is_done(node) and all(done(blocker_id) for blocker_id in self.blockers[task_id])
+        )
@@ -0,0 +1,163 @@
+"""
+Streaming export of tasks as CSV, NDJSON or a JSON array.
+
+Rows are read with QuerySet.iterator(chunk_size=...) as plain values and
+written out one chunk at a time; tags, assignees and blockers are loaded
+with one query per chunk. Nothing holds more than a chunk of tasks, so
+memory stays flat however many tasks are exported, and the output can be
+gzip-compressed on the fly.
+
+Columns use the API's camelCase names and list columns (tagIds,
+assigneeIds, blockedByIds) are space separated in CSV, so an export can be
+fed back to tasks.importer.
+"""
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.text import compress_sequence
+from djangorestframework_camel_case.util import camelize
+from rest_framework.renderers import BaseRenderer
+
+from tags.models import TaskTag
+from .models import Task
+
+
+DEFAULT_EXPORT_CHUNK_SIZE = 2000
+
+COLUMNS = [
+    'id', 'title', 'description', 'status', 'priority', 'task_type', 'is_completed',
+    'story_points', 'time_estimate', 'time_spent',
+    'start_date', 'due_date', 'actual_completion_date',
+    'project', 'owner', 'rank', 'created_at', 'updated_at',
+]
+# Values DjangoJSONEncoder turns into text (UUIDs, decimals, datetimes)
+ENCODED_COLUMNS = [
+    'id', 'project', 'time_estimate', 'time_spent',
+    'start_date', 'due_date', 'actual_completion_date', 'created_at', 'updated_at',
+]
+RELATED_COLUMNS = ['tag_ids', 'tags', 'assignee_ids', 'blocked_by_ids']
+HEADER = list(camelize(dict.fromkeys(COLUMNS + RELATED_COLUMNS)))
+
+# Tag names may contain spaces; ids are joined with a space (see tasks.importer)
+CSV_LIST_SEPARATORS = {'tags': '; '}
+
+
+class ExportRenderer(BaseRenderer):
+    """
+    Lets content negotiation (?format= or Accept) pick the export format.
+    Exports themselves are streamed by the view; only error payloads are
+    rendered here.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+class JSONExportRenderer(ExportRenderer):
+    media_type = 'application/json'
+    format = 'json'
+
+
+class NDJSONExportRenderer(ExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+class CSVExportRenderer(ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+EXPORT_RENDERER_CLASSES = [JSONExportRenderer, NDJSONExportRenderer, CSVExportRenderer]
+
+
+class TaskExporter:
+    """Turns a task queryset into an iterator of encoded output chunks."""
+
+    def __init__(self, queryset, file_format, chunk_size=None):
+        self.queryset = queryset
+        self.file_format = file_format
+        self.chunk_size = chunk_size or getattr(settings, 'TASK_EXPORT_CHUNK_SIZE', DEFAULT_EXPORT_CHUNK_SIZE)
+        self.encoder = DjangoJSONEncoder()
+
+    def chunks(self):
+        """Lists of row dicts (snake_case keys), one per database chunk."""
+        chunk = []
+        for row in self.queryset.values(*COLUMNS).iterator(chunk_size=self.chunk_size):
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                yield self.with_relations(chunk)
+                chunk = []
+        if chunk:
+            yield self.with_relations(chunk)
+
+    def with_relations(self, rows):
+        by_id = {}
+        for row in rows:
+            row.update(tag_ids=[], tags=[], assignee_ids=[], blocked_by_ids=[])
+            by_id[row['id']] = row
+        ids = list(by_id)
+
+        task_tags = TaskTag.objects.filter(task_id__in=ids).order_by('tag__name')
+        for task_id, tag_id, name in task_tags.values_list('task_id', 'tag_id', 'tag__name'):
+            by_id[task_id]['tag_ids'].append(str(tag_id))
+            by_id[task_id]['tags'].append(name)
+        assignees = Task.assignees.through.objects.filter(task_id__in=ids)
+        for task_id, user_id in assignees.values_list('task_id', 'user_id'):
+            by_id[task_id]['assignee_ids'].append(user_id)
+        edges = Task.blocked_by.through.objects.filter(from_task_id__in=ids)
+        for task_id, blocker_id in edges.values_list('from_task_id', 'to_task_id'):
+            by_id[task_id]['blocked_by_ids'].append(str(blocker_id))
+        return rows
+
+    def encoded_rows(self, chunk):
+        # Same text for dates, decimals and UUIDs in every format
+        encode = self.encoder.default
+        for row in chunk:
+            for column in ENCODED_COLUMNS:
+                if row[column] is not None:
+                    row[column] = encode(row[column])
+        return [[row[column] for column in COLUMNS + RELATED_COLUMNS] for row in chunk]
+
+    def __iter__(self):
+        write = getattr(self, f'write_{self.file_format}')
+        for text in write():
+            yield text.encode()
+
+    def write_csv(self):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(HEADER)
+        for chunk in self.chunks():
+            for values in self.encoded_rows(chunk):
+                writer.writerow([
+                    CSV_LIST_SEPARATORS.get(column, ' ').join(map(str, value)) if isinstance(value, list) else value
+                    for column, value in zip(COLUMNS + RELATED_COLUMNS, values)
+                ])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    def write_ndjson(self):
+        for chunk in self.chunks():
+            yield ''.join(json.dumps(dict(zip(HEADER, values))) + '\n' for values in self.encoded_rows(chunk))
+
+    def write_json(self):
+        separator = '['
+        for chunk in self.chunks():
+            yield separator + ','.join(json.dumps(dict(zip(HEADER, values))) for values in self.encoded_rows(chunk))
+            separator = ','
+        yield '[]' if separator == '[' else ']'
+
+
+def export_stream(queryset, file_format, gzip=False, chunk_size=None):
+    """Iterator of bytes for a StreamingHttpResponse."""
+    stream = iter(TaskExporter(queryset, file_format, chunk_size))
+    return compress_sequence(stream) if gzip else stream
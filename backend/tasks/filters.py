@@ -0,0 +1,25 @@
+"""
+FilterSet for TaskViewSet: the plain field filters plus dependency
+filters answered from the TaskDependencyClosure table in one join.
+"""
+from django.db.models import Exists, OuterRef
+from django_filters import rest_framework as filters
+
+from .models import Task, TaskDependencyClosure
+
+
+class TaskFilter(filters.FilterSet):
+    # ?transitively_blocked_by=<id>: tasks <id> blocks, directly or not
+    transitively_blocked_by = filters.UUIDFilter(field_name='ancestor_links__ancestor')
+    # ?unblocked=true: no open task blocks it, directly or not (false: some does)
+    unblocked = filters.BooleanFilter(method='filter_unblocked')
+
+    class Meta:
+        model = Task
+        fields = ['is_completed', 'priority', 'project', 'status']
+
+    def filter_unblocked(self, queryset, name, value):
+        open_blockers = TaskDependencyClosure.objects.filter(
+            descendant=OuterRef('pk'), ancestor__deleted_at__isnull=True, ancestor__is_completed=False,
+        ).exclude(ancestor__status='done')
+        return queryset.exclude(Exists(open_blockers)) if value else queryset.filter(Exists(open_blockers))
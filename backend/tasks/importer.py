@@ -0,0 +1,290 @@
+"""
+Streaming bulk import of tasks from CSV or NDJSON.
+
+Rows are parsed lazily and handled in chunks: each chunk is validated
+against TaskImportSchema, its tag / assignee / project / blocker references
+are resolved with one query per kind, and the valid rows are written with
+bulk_create in a single transaction. Invalid rows are reported and skipped,
+so memory stays bounded by the chunk size rather than the file size.
+
+CSV headers and NDJSON keys may be snake_case or camelCase. In CSV, list
+columns (tag_ids, assignee_ids, blocked_by_ids) hold ids separated by
+spaces, commas or semicolons. A row may set `id` so later rows (or later
+imports) can list it in blocked_by_ids; blockers that appear further down
+the file are linked once the whole file has been read. Dependencies that
+would make a task block itself, directly or through a cycle, are reported
+and dropped; their tasks are still imported.
+"""
+import csv
+import io
+import json
+import re
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from djangorestframework_camel_case.util import camel_to_underscore
+from pydantic import ValidationError
+
+from activity.signals import log_activity_bulk
+from projects.models import Project
+from tags.models import Tag, TaskTag
+from .dependencies import blocked_by_bulk_created, cyclic_edges
+from .models import Task
+from .ranking import RankSequence, column_filter
+from .schemas import TaskImportSchema
+
+
+DEFAULT_IMPORT_BATCH_SIZE = 1000
+DEFAULT_IMPORT_MAX_ERRORS = 1000
+
+FORMATS = ('csv', 'ndjson')
+LIST_FIELDS = ('tag_ids', 'assignee_ids', 'blocked_by_ids')
+EDITOR_ROLES = ('owner', 'admin', 'member')
+
+
+class RowError(Exception):
+    """A row that could not be parsed at all."""
+
+
+def detect_format(filename, requested=None):
+    """Return 'csv' or 'ndjson' from an explicit choice or the file extension, else None."""
+    if requested:
+        requested = requested.lower()
+        return {'jsonl': 'ndjson'}.get(requested, requested) if requested in FORMATS + ('jsonl',) else None
+    name = (filename or '').lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return None
+
+
+def text_stream(binary):
+    """Decode an uploaded (binary) file lazily, tolerating a UTF-8 BOM."""
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+
+def iter_csv(stream):
+    """Yield (line_number, row) pairs; list columns are split into lists."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        data = {}
+        for key, value in row.items():
+            if key is None or value is None or value.strip() == '':
+                continue  # extra cells and empty cells mean "not provided"
+            key = camel_to_underscore(key.strip())
+            data[key] = [v for v in re.split(r'[\s,;]+', value) if v] if key in LIST_FIELDS else value.strip()
+        yield reader.line_num, data
+
+
+def iter_ndjson(stream):
+    """Yield (line_number, row) pairs, or (line_number, RowError) for bad lines."""
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, RowError(f'Invalid JSON: {e}')
+            continue
+        if not isinstance(row, dict):
+            yield line_number, RowError('Each line must be a JSON object')
+            continue
+        yield line_number, {camel_to_underscore(key): value for key, value in row.items()}
+
+
+def iter_rows(stream, file_format):
+    return iter_csv(stream) if file_format == 'csv' else iter_ndjson(stream)
+
+
+class TaskImporter:
+    """
+    Imports rows for `user` and keeps a bounded summary:
+    created/failed counts and the first TASK_IMPORT_MAX_ERRORS row errors.
+    """
+
+    def __init__(self, user, batch_size=None, max_errors=None):
+        self.user = user
+        self.batch_size = batch_size or getattr(settings, 'TASK_IMPORT_BATCH_SIZE', DEFAULT_IMPORT_BATCH_SIZE)
+        self.max_errors = max_errors if max_errors is not None else getattr(
+            settings, 'TASK_IMPORT_MAX_ERRORS', DEFAULT_IMPORT_MAX_ERRORS
+        )
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.errors_truncated = False
+        self.columns = {}  # board column -> RankSequence
+        self.pending_blockers = []  # (line, task_id, blocker_id) for blockers not yet imported
+        self.editable_projects = set(
+            Project.objects.filter(
+                Q(owner=user) | Q(members__user=user, members__role__in=EDITOR_ROLES)
+            ).values_list('id', flat=True)
+        )
+
+    def run(self, rows, progress=None):
+        """Import (line, row) pairs; `progress(summary)` is called after every chunk."""
+        chunk = []
+        for line, row in rows:
+            chunk.append((line, row))
+            if len(chunk) >= self.batch_size:
+                self.import_chunk(chunk)
+                chunk = []
+                if progress:
+                    progress(self.summary())
+        if chunk:
+            self.import_chunk(chunk)
+        self.link_pending_blockers()
+        return self.summary()
+
+    def summary(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.errors_truncated,
+        }
+
+    def add_error(self, line, errors, failed=True):
+        self.failed += failed
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': line, 'errors': errors})
+        else:
+            self.errors_truncated = True
+
+    # Chunk processing
+
+    def validate(self, chunk):
+        valid = []
+        for line, row in chunk:
+            if isinstance(row, RowError):
+                self.add_error(line, {'non_field_errors': str(row)})
+                continue
+            try:
+                valid.append((line, TaskImportSchema(**row)))
+            except ValidationError as e:
+                self.add_error(line, {
+                    (error['loc'][0] if error['loc'] else 'non_field_errors'): error['msg']
+                    for error in e.errors()
+                })
+            except TypeError as e:
+                self.add_error(line, {'non_field_errors': str(e)})
+        return valid
+
+    def import_chunk(self, chunk):
+        rows = self.validate(chunk)
+        if not rows:
+            return
+
+        # One query per reference kind for the whole chunk
+        def collect(attr):
+            return {value for _, row in rows for value in (getattr(row, attr) or [])}
+
+        tag_ids = set(Tag.objects.filter(id__in=collect('tag_ids'), owner=self.user).values_list('id', flat=True))
+        user_ids = set(get_user_model().objects.filter(id__in=collect('assignee_ids')).values_list('id', flat=True))
+        requested_ids = {row.id for _, row in rows if row.id}
+        taken_ids = set(Task.objects.all_with_deleted().filter(id__in=requested_ids).values_list('id', flat=True))
+        existing_blockers = set(
+            Task.objects.filter(id__in=collect('blocked_by_ids')).values_list('id', flat=True)
+        )
+
+        tasks, tags, assignees, edges, logged = [], [], [], [], []
+        chunk_ids = set()
+        for line, row in rows:
+            errors = {}
+            if row.project and row.project not in self.editable_projects:
+                errors['project'] = 'Project not found or not editable'
+            if set(row.tag_ids or []) - tag_ids:
+                errors['tag_ids'] = 'Unknown tag ids: ' + ', '.join(sorted(map(str, set(row.tag_ids) - tag_ids)))
+            if set(row.assignee_ids or []) - user_ids:
+                errors['assignee_ids'] = 'Unknown user ids: ' + ', '.join(
+                    sorted(map(str, set(row.assignee_ids) - user_ids))
+                )
+            if row.id and (row.id in taken_ids or row.id in chunk_ids):
+                errors['id'] = 'A task with this id already exists'
+            if errors:
+                self.add_error(line, errors)
+                continue
+
+            data = row.model_dump(exclude={'id', 'project', *LIST_FIELDS})
+            data = {key: value for key, value in data.items() if value is not None}
+            task = Task(
+                id=row.id or uuid.uuid4(), owner=self.user, project_id=row.project,
+                is_completed=data.get('status') == 'done', **data,
+            )
+            task.rank = next(self.rank_sequence(task))
+            chunk_ids.add(task.id)
+            tasks.append(task)
+            logged.append((task.id, task.title))
+            tags += [TaskTag(task_id=task.id, tag_id=tag_id) for tag_id in set(row.tag_ids or [])]
+            assignees += [
+                Task.assignees.through(task_id=task.id, user_id=user_id) for user_id in set(row.assignee_ids or [])
+            ]
+            for blocker_id in set(row.blocked_by_ids or []):
+                if blocker_id in existing_blockers or blocker_id in chunk_ids:
+                    edges.append((line, task.id, blocker_id))
+                else:
+                    self.pending_blockers.append((line, task.id, blocker_id))
+
+        # Blockers defined later in this same chunk
+        pending = [p for p in self.pending_blockers if p[2] in chunk_ids]
+        if pending:
+            self.pending_blockers = [p for p in self.pending_blockers if p[2] not in chunk_ids]
+            edges += pending
+        edges = self.acyclic(edges)
+
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks, batch_size=self.batch_size)
+            TaskTag.objects.bulk_create(tags, batch_size=self.batch_size)
+            Task.assignees.through.objects.bulk_create(assignees, batch_size=self.batch_size)
+            Task.blocked_by.through.objects.bulk_create(edges, batch_size=self.batch_size)
+            log_activity_bulk(self.user, 'created', 'task', logged)
+            blocked_by_bulk_created(edges)
+        self.created += len(tasks)
+
+    def rank_sequence(self, task):
+        """Imported cards go on top of their column, in file order."""
+        key = (task.project_id, None if task.project_id else task.owner_id, task.status)
+        if key not in self.columns:
+            top = (
+                Task.objects.filter(**column_filter(*key)).exclude(rank='')
+                .order_by('rank').values_list('rank', flat=True).first()
+            )
+            self.columns[key] = RankSequence(top)
+        return self.columns[key]
+
+    def link_pending_blockers(self):
+        """Link forward blocker references once every row has been imported."""
+        while self.pending_blockers:
+            batch = self.pending_blockers[:self.batch_size]
+            self.pending_blockers = self.pending_blockers[self.batch_size:]
+            found = set(
+                Task.objects.filter(id__in={b for _, _, b in batch}).values_list('id', flat=True)
+            )
+            for line, _, blocker_id in batch:
+                if blocker_id not in found:
+                    # The task itself was imported; only the dependency is missing
+                    self.add_error(line, {'blocked_by_ids': f'Unknown task id: {blocker_id}'}, failed=False)
+            blocked_by_bulk_created(Task.blocked_by.through.objects.bulk_create(
+                self.acyclic([edge for edge in batch if edge[2] in found])
+            ))
+
+    def acyclic(self, edges):
+        """
+        blocked_by rows for the (line, task_id, blocker_id) `edges` that keep
+        the graph acyclic; the others are reported against their rows, whose
+        tasks are still imported.
+        """
+        rejected = cyclic_edges([(task_id, blocker_id) for _, task_id, blocker_id in edges], self.batch_size)
+        for position in sorted(rejected):
+            line, task_id, blocker_id = edges[position]
+            message = 'A task cannot block itself' if task_id == blocker_id else (
+                f'Blocking on task {blocker_id} would create a dependency cycle'
+            )
+            self.add_error(line, {'blocked_by_ids': message}, failed=False)
+        return [
+            Task.blocked_by.through(from_task_id=task_id, to_task_id=blocker_id)
+            for position, (_, task_id, blocker_id) in enumerate(edges) if position not in rejected
+        ]
@@ -0,0 +1,71 @@
+"""
+Rebuild the DailyCompletion rollup behind the productivity trend.
+
+Completed tasks without an actual_completion_date first get one from the
+latest 'completed' / status change to 'done' in the ActivityLog (falling
+back to updated_at); the rollup is then recomputed from the tasks in one
+transaction. Safe to re-run; run it once after migrating.
+
+    python manage.py backfill_completion_rollup
+    python manage.py backfill_completion_rollup --batch-size 5000
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.db.models.functions import TruncDate
+
+from activity.models import ActivityLog
+from tasks.models import DailyCompletion, Task
+from tasks.rollups import COMPLETED
+
+
+class Command(BaseCommand):
+    help = 'Backfill completion dates and rebuild the daily completion rollup.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        stamped = self.stamp_completion_dates(batch_size)
+        self.stdout.write(f'Stamped {stamped} completion dates.')
+
+        with transaction.atomic():
+            DailyCompletion.objects.all().delete()
+            buckets = (
+                Task.objects.filter(COMPLETED, actual_completion_date__isnull=False)
+                .annotate(day=TruncDate('actual_completion_date'))
+                .values('owner_id', 'project_id', 'day').annotate(completed=Count('pk')).order_by()
+            )
+            rows = [
+                DailyCompletion(user_id=b['owner_id'], project_id=b['project_id'], day=b['day'], completed=b['completed'])
+                for b in buckets.iterator(chunk_size=batch_size)
+            ]
+            DailyCompletion.objects.bulk_create(rows, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(rows)} daily completion rows.'))
+
+    def stamp_completion_dates(self, batch_size):
+        missing = (
+            Task.objects.all_with_deleted()
+            .filter(COMPLETED, actual_completion_date__isnull=True)
+            .order_by('pk').values_list('pk', 'updated_at')
+        )
+        stamped = 0
+        while True:
+            batch = dict(missing[:batch_size])
+            if not batch:
+                return stamped
+            completed_at = dict(
+                ActivityLog.objects
+                .filter(target_type='task', target_id__in=[str(pk) for pk in batch])
+                .filter(Q(action='completed') | Q(action='status_changed', delta__new_status='done'))
+                .values('target_id').annotate(at=Max('created_at')).values_list('target_id', 'at')
+            )
+            tasks = [
+                Task(pk=pk, actual_completion_date=completed_at.get(str(pk), updated_at))
+                for pk, updated_at in batch.items()
+            ]
+            # Through TaskQuerySet.update(), so the rollup sees the new dates
+            Task.objects.all_with_deleted().bulk_update(tasks, ['actual_completion_date'])
+            stamped += len(tasks)
+            self.stdout.write(f'  {stamped} stamped', ending='\r')
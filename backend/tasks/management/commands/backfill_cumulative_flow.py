@@ -0,0 +1,33 @@
+"""
+Rebuild the cumulative flow rows (ProjectStatusFlow) of every project, or
+of one, by replaying task history from the ActivityLog. Safe to re-run;
+run it once after migrating.
+
+    python manage.py backfill_cumulative_flow
+    python manage.py backfill_cumulative_flow --project <project id>
+"""
+from django.core.management.base import BaseCommand
+
+from projects.models import Project
+from tasks.rollups import replay_status_flow
+
+
+class Command(BaseCommand):
+    help = 'Rebuild cumulative flow / burn-up history from status changes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', help='Only this project id.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        projects = Project.objects.order_by('created_at')
+        if options['project']:
+            projects = projects.filter(pk=options['project'])
+
+        total_projects = total_rows = 0
+        for project_id, name in projects.values_list('id', 'name'):
+            rows = replay_status_flow(project_id, options['batch_size'])
+            total_projects += 1
+            total_rows += rows
+            self.stdout.write(f'{name}: {rows} rows')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total_projects} projects, {total_rows} rows.'))
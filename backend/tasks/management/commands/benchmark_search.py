@@ -0,0 +1,95 @@
+"""
+Compare the configured full-text search backend against the old icontains
+filter on a synthetic data set. All rows are created inside a transaction
+that is rolled back at the end, so the command is safe to run on a dev DB.
+
+    python manage.py benchmark_search --tasks 100000
+"""
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tasks.models import Task
+from tasks.search import IcontainsSearchBackend, get_search_backend, search_terms
+
+
+WORDS = (
+    'deploy release review invoice customer billing onboarding migration database '
+    'frontend backend report analytics security audit payment mobile search export '
+    'import calendar reminder dashboard kanban sprint backlog estimate design api '
+    'cache latency incident outage refactor documentation translation accessibility'
+).split()
+
+SYLLABLES = 'ka lo mi nu pe ra si to vu za be co di fa gu hi jo ke li mo na'.split()
+
+# Realistic text is Zipf-distributed: a few very common words and a long tail
+VOCABULARY = WORDS + [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES[:5]]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark full-text task search against the icontains filter.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=100_000, help='Number of tasks to generate.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--query', action='append', dest='queries',
+            help='Search string to time (repeatable). Defaults to a small built-in set.',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        queries = options['queries'] or ['deploy', 'invoice', 'kanb', 'security audit', 'kalomi', 'mofa']
+        fts = get_search_backend()
+        baseline = IcontainsSearchBackend()
+
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                username=f'search-benchmark-{rng.getrandbits(32):x}', password=None
+            )
+            self.generate(user, options['tasks'], options['batch_size'], rng)
+
+            self.stdout.write(
+                f"{options['tasks']} tasks; icontains vs {type(fts).__name__}, "
+                f"best of {options['repeat']} (first page of 20)"
+            )
+            self.stdout.write(f"{'query':<28}{'icontains ms':>14}{'fts ms':>10}{'matches':>16}")
+            for query in queries:
+                terms = search_terms(query)
+                base_ms, base_count = self.time(baseline, user, terms, options['repeat'], ranked=False)
+                fts_ms, fts_count = self.time(fts, user, terms, options['repeat'], ranked=True)
+                self.stdout.write(
+                    f"{query:<28}{base_ms:>14.1f}{fts_ms:>10.1f}{f'{base_count}/{fts_count}':>16}"
+                )
+
+            transaction.set_rollback(True)
+
+    def generate(self, user, count, batch_size, rng):
+        for start in range(0, count, batch_size):
+            Task.objects.bulk_create([
+                Task(
+                    owner=user,
+                    title=' '.join(rng.choices(VOCABULARY, WEIGHTS, k=rng.randint(2, 6))).capitalize(),
+                    description=' '.join(rng.choices(VOCABULARY, WEIGHTS, k=rng.randint(0, 40))),
+                )
+                for _ in range(min(batch_size, count - start))
+            ])
+            self.stdout.write(f'  generated {min(start + batch_size, count)}/{count}', ending='\r')
+        self.stdout.write('')
+
+    def time(self, backend, user, terms, repeat, ranked):
+        best = float('inf')
+        for _ in range(repeat):
+            queryset = backend.search(Task.objects.filter(owner=user), terms)
+            queryset = queryset.order_by('-search_rank', '-created_at') if ranked else queryset.order_by('-created_at')
+            started = time.perf_counter()
+            count = queryset.count()
+            list(queryset[:20])
+            best = min(best, (time.perf_counter() - started) * 1000)
+        return best, count
@@ -0,0 +1,112 @@
+"""
+Time the task list's visibility filter (Task.objects.visible_to) against
+the alternatives it replaced, on synthetic projects shared by many members.
+All rows are created inside a transaction that is rolled back at the end,
+so the command is safe to run on a dev DB.
+
+    python manage.py benchmark_task_visibility --projects 1000 --members 100
+"""
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from projects.member_models import ProjectMember
+from projects.models import Project
+from tasks.models import Task
+
+
+def joined(user):
+    # OR across joins: one row per matching membership/assignee, hence DISTINCT
+    return Task.objects.filter(Q(owner=user) | Q(assignees=user) | Q(project__members__user=user)).distinct()
+
+
+def correlated(user):
+    # Correlated EXISTS: probes the membership index once per live task
+    membership = ProjectMember.objects.filter(project=OuterRef('project_id'), user=user)
+    assignment = Task.assignees.through.objects.filter(task=OuterRef('pk'), user=user)
+    return Task.objects.filter(Q(owner=user) | Exists(membership) | Exists(assignment))
+
+
+STRATEGIES = {
+    'join + distinct': joined,
+    'correlated exists': correlated,
+    'visible_to': Task.objects.visible_to,
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark membership-based task visibility filters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=1000)
+        parser.add_argument('--members', type=int, default=100, help='Members per project.')
+        parser.add_argument('--users', type=int, default=10_000, help='Size of the member pool.')
+        parser.add_argument('--tasks', type=int, default=50, help='Tasks per project.')
+        parser.add_argument('--sample', type=int, default=5, help='Users to time the list for.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            users = self.generate(rng, **options)
+            sample = rng.sample(users, min(options['sample'], len(users)))
+
+            self.stdout.write(
+                f"{options['projects']} projects x {options['members']} members, "
+                f"{options['projects'] * options['tasks']} tasks; best of {options['repeat']} "
+                f"(count + first page of 20), averaged over {len(sample)} users"
+            )
+            self.stdout.write(f"{'strategy':<22}{'ms':>10}{'rows':>10}")
+            for name, strategy in STRATEGIES.items():
+                timings = [self.time(strategy(user), options['repeat']) for user in sample]
+                ms = sum(ms for ms, _ in timings) / len(timings)
+                rows = sum(count for _, count in timings) / len(timings)
+                self.stdout.write(f'{name:<22}{ms:>10.1f}{rows:>10.0f}')
+
+            transaction.set_rollback(True)
+
+    def generate(self, rng, projects, members, users, tasks, batch_size, **options):
+        User = get_user_model()
+        prefix = f'visibility-benchmark-{rng.getrandbits(32):x}'
+        pool = User.objects.bulk_create(
+            [User(username=f'{prefix}-{i}', email=f'{prefix}-{i}@example.com') for i in range(users)],
+            batch_size=batch_size,
+        )
+        created = Project.objects.bulk_create(
+            [Project(name=f'{prefix}-{i}', owner=rng.choice(pool)) for i in range(projects)], batch_size=batch_size,
+        )
+        ProjectMember.objects.bulk_create([
+            ProjectMember(project=project, user=user, role='owner' if user == project.owner else 'member')
+            for project in created
+            for user in {project.owner, *rng.sample(pool, min(members, users) - 1)}
+        ], batch_size=batch_size)
+        self.stdout.write(f'  generated {len(pool)} users, {len(created)} projects')
+
+        per_batch = max(1, batch_size // max(tasks, 1))  # projects whose tasks fit in one INSERT batch
+        for start in range(0, len(created), per_batch):
+            batch = Task.objects.bulk_create([
+                Task(title=f'Task {i}', owner=rng.choice(pool), project=project)
+                for project in created[start:start + per_batch]
+                for i in range(tasks)
+            ])
+            Task.assignees.through.objects.bulk_create([
+                Task.assignees.through(task_id=task.id, user_id=rng.choice(pool).id) for task in batch
+            ])
+            self.stdout.write(f'  generated tasks for {min(start + per_batch, projects)}/{projects} projects', ending='\r')
+        self.stdout.write('')
+        return pool
+
+    def time(self, queryset, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            count = queryset.count()
+            list(queryset.order_by('-created_at', '-id')[:20])
+            best = min(best, (time.perf_counter() - started) * 1000)
+        return best, count
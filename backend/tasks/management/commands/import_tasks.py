@@ -0,0 +1,58 @@
+"""
+Import tasks for a user from a CSV or NDJSON file, streaming it in batches.
+Per-row errors are printed at the end; valid rows are imported regardless.
+
+    python manage.py import_tasks tasks.csv --user alice
+    python manage.py import_tasks - --format ndjson --user alice < tasks.ndjson
+"""
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from activity.buffer import buffered_activity
+from tasks.importer import TaskImporter, detect_format, iter_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk import tasks from a CSV or NDJSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin.")
+        parser.add_argument('--user', required=True, help='Username (or id) that will own the tasks.')
+        parser.add_argument('--format', choices=['csv', 'ndjson', 'jsonl'], help='Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--max-errors', type=int, default=None, help='Row errors to report.')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        lookup = {'pk': options['user']} if options['user'].isdigit() else {'username': options['user']}
+        try:
+            user = User.objects.get(**lookup)
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' not found")
+
+        path = options['path']
+        file_format = detect_format(path, options['format'])
+        if file_format is None:
+            raise CommandError('Cannot tell the file format; pass --format csv or --format ndjson')
+
+        importer = TaskImporter(user, options['batch_size'], options['max_errors'])
+        progress = lambda summary: self.stdout.write(
+            f"{summary['created']} created, {summary['failed']} failed", ending='\r'
+        )
+        # Activity entries are written in ACTIVITY_LOG_BUFFER_SIZE batches
+        with buffered_activity():
+            if path == '-':
+                summary = importer.run(iter_rows(sys.stdin, file_format), progress)
+            else:
+                with open(path, encoding='utf-8-sig', newline='') as stream:
+                    summary = importer.run(iter_rows(stream, file_format), progress)
+
+        for error in summary['errors']:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        if summary['errors_truncated']:
+            self.stderr.write('(more errors not shown)')
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['created']} tasks; {summary['failed']} rows failed."
+        ))
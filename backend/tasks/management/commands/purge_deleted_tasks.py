@@ -0,0 +1,37 @@
+"""
+Hard-delete tasks soft-deleted longer ago than the retention window
+(TASK_TOMBSTONE_RETENTION_DAYS, 30 by default), with their subtasks,
+tags and dependencies. Works in small batches, each committed on its
+own, pausing between them so live traffic keeps the table. Soft deletes
+also trigger this in the background; run it from cron to be sure.
+
+    python manage.py purge_deleted_tasks
+    python manage.py purge_deleted_tasks --days 7 --batch-size 200 --pause 0.5
+    python manage.py purge_deleted_tasks --dry-run
+"""
+from django.core.management.base import BaseCommand
+
+from tasks.models import Task
+from tasks.tombstones import purge_tombstones, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = 'Purge soft-deleted tasks past the retention window.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Retention in days (default: TASK_TOMBSTONE_RETENTION_DAYS).')
+        parser.add_argument('--batch-size', type=int, help='Tasks per transaction.')
+        parser.add_argument('--pause', type=float, help='Seconds to sleep between batches.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be purged.')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            expired = Task.objects.all_with_deleted().filter(deleted_at__lt=retention_cutoff(options['days']))
+            self.stdout.write(f'{expired.count()} deleted tasks past retention.')
+            return
+
+        def progress(purged, remaining):
+            self.stdout.write(f'  {purged} purged, {remaining} left', ending='\r')
+
+        purged = purge_tombstones(options['days'], options['batch_size'], options['pause'], progress)
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} deleted tasks.'))
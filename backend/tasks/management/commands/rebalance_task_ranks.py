@@ -0,0 +1,53 @@
+"""
+Re-spread board ranks for columns whose keys have grown too long.
+Moves normally rebalance their own column in the background; this command
+is the periodic sweep (or a one-off with --all).
+
+    python manage.py rebalance_task_ranks
+    python manage.py rebalance_task_ranks --all
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Case, Max, When
+from django.db.models.functions import Length
+
+from tasks.models import Task
+from tasks.ranking import DEFAULT_REBALANCE_LENGTH, rebalance_column
+
+
+class Command(BaseCommand):
+    help = 'Rebalance Kanban card ranks in dense board columns.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-length', type=int, default=None,
+            help='Rebalance columns holding a rank longer than this '
+                 '(default: TASK_RANK_REBALANCE_LENGTH).',
+        )
+        parser.add_argument('--all', action='store_true', help='Rebalance every column.')
+
+    def handle(self, *args, **options):
+        threshold = options['min_length']
+        if threshold is None:
+            threshold = getattr(settings, 'TASK_RANK_REBALANCE_LENGTH', DEFAULT_REBALANCE_LENGTH)
+
+        columns = (
+            Task.objects
+            .annotate(column_owner=Case(When(project__isnull=True, then='owner_id')))
+            .values('project_id', 'column_owner', 'status')
+            .annotate(longest=Max(Length('rank')))
+            .order_by()
+        )
+        if not options['all']:
+            columns = columns.filter(longest__gt=threshold)
+
+        total_columns = total_tasks = 0
+        for column in list(columns):
+            updated = rebalance_column(column['project_id'], column['column_owner'], column['status'])
+            total_columns += 1
+            total_tasks += updated
+            self.stdout.write(
+                f"{column['project_id'] or 'personal:%s' % column['column_owner']} "
+                f"{column['status']}: {updated} tasks (longest rank {column['longest']})"
+            )
+        self.stdout.write(self.style.SUCCESS(f'Rebalanced {total_columns} columns, {total_tasks} tasks.'))
@@ -0,0 +1,23 @@
+"""
+Rebuild the transitive blocker closure (TaskDependencyClosure) from the
+blocked_by edges in one transaction. The table is kept up to date on
+every change; run this once after migrating, or after writing edges
+behind the ORM's back. Safe to re-run.
+
+    python manage.py rebuild_dependency_closure
+    python manage.py rebuild_dependency_closure --batch-size 5000
+"""
+from django.core.management.base import BaseCommand
+
+from tasks.dependencies import rebuild_closure
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the transitive blocker closure table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rows = rebuild_closure(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} closure rows.'))
@@ -0,0 +1,75 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:12
+
+import itertools
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of tasks.ranking.spread_ranks, so later changes to that
+# module can't alter (or break) this migration
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+
+
+def spread_ranks(count):
+    """`count` evenly spaced keys, with roughly BASE free slots between neighbours."""
+    width = 1
+    while BASE ** width <= count * BASE:
+        width += 1
+    step = BASE ** width // (count + 1)
+    ranks = []
+    for position in range(1, count + 1):
+        value, digits = step * position, []
+        for _ in range(width):
+            value, remainder = divmod(value, BASE)
+            digits.append(DIGITS[remainder])
+        ranks.append(''.join(reversed(digits)).rstrip('0'))
+    return ranks
+
+
+def backfill_ranks(apps, schema_editor):
+    # Keep the current board order (newest first) within each column
+    Task = apps.get_model('tasks', 'Task')
+    tasks = (
+        Task.objects.annotate(
+            column_owner=models.Case(models.When(project__isnull=True, then='owner_id')),
+        )
+        .order_by('project_id', 'column_owner', 'status', '-created_at', '-id')
+        .only('id', 'project_id', 'owner_id', 'status').iterator(chunk_size=2000)
+    )
+
+    def column(task):
+        return (task.project_id, task.column_owner, task.status)
+
+    batch = []
+    for _, group in itertools.groupby(tasks, key=column):
+        group = list(group)
+        for task, rank in zip(group, spread_ranks(len(group))):
+            task.rank = rank
+            batch.append(task)
+        if len(batch) >= 2000:
+            Task.objects.bulk_update(batch, ['rank'])
+            batch = []
+    Task.objects.bulk_update(batch, ['rank'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_alter_project_id'),
+        ('tasks', '0010_task_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='rank',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunPython(backfill_ranks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['project', 'status', 'rank'], name='task_project_status_rank_live'),
+        ),
+    ]
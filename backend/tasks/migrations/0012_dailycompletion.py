@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_alter_project_id'),
+        ('tasks', '0011_task_rank'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCompletion',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('completed', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_completions', to='projects.project')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_completions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'day'], name='dailycompletion_user_day')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('project__isnull', False)), fields=('user', 'project', 'day'), name='dailycompletion_project_day'), models.UniqueConstraint(condition=models.Q(('project__isnull', True)), fields=('user', 'day'), name='dailycompletion_personal_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_alter_project_id'),
+        ('tasks', '0012_dailycompletion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectStatusFlow',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('backlog', 'Backlog'), ('todo', 'To Do'), ('in_progress', 'In Progress'), ('review', 'Review'), ('done', 'Done')], max_length=20)),
+                ('tasks', models.IntegerField(default=0)),
+                ('story_points', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_flow', to='projects.project')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('project', 'day', 'status'), name='projectstatusflow_day_status')],
+            },
+        ),
+    ]
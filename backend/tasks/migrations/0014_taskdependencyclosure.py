@@ -0,0 +1,57 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:20
+
+from itertools import islice
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_closure(apps, schema_editor):
+    # Same breadth-first search as tasks.dependencies.rebuild_closure (kept
+    # for repairs), over the blocked_by edges that already exist
+    Task = apps.get_model('tasks', 'Task')
+    TaskDependencyClosure = apps.get_model('tasks', 'TaskDependencyClosure')
+    blocking = {}
+    edges = Task.blocked_by.through.objects.values_list('to_task_id', 'from_task_id')
+    for blocker_id, task_id in edges.iterator(chunk_size=2000):
+        blocking.setdefault(blocker_id, []).append(task_id)
+
+    def closure_rows():
+        for ancestor_id in blocking:
+            seen, level, depth = set(), blocking[ancestor_id], 1
+            while level:
+                below = []
+                for task_id in level:
+                    if task_id not in seen:
+                        seen.add(task_id)
+                        yield TaskDependencyClosure(ancestor_id=ancestor_id, descendant_id=task_id, depth=depth)
+                        below.extend(blocking.get(task_id, ()))
+                level, depth = below, depth + 1
+
+    rows = closure_rows()
+    while batch := list(islice(rows, 2000)):
+        TaskDependencyClosure.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0013_projectstatusflow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDependencyClosure',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='tasks.task')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='tasks.task')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'ancestor'], name='taskclosure_descendant')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='taskclosure_ancestor_descendant')],
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
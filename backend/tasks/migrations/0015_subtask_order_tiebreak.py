@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0014_taskdependencyclosure'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='subtask',
+            options={'ordering': ['order', 'created_at']},
+        ),
+    ]
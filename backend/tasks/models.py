@@ -1,7 +1,19 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.db.models.functions import Coalesce
+from projects.member_models import ProjectMember
 from projects.models import Project
+from .dependencies import DEPENDENT_FIELDS, invalidate_dependency_graph, touch_blocked_tasks
+from .ranking import top_rank
+from .rollups import (
+    ROLLUP_FIELDS, STATE_FIELDS, RollupState, completion_date, record_changes,
+    states_after_update, task_state,
+)
+from .stats import (
+    DASHBOARD_FIELDS, PERFORMANCE_FIELDS, invalidate_dashboard_stats, invalidate_project_performance,
+)
+from .tombstones import schedule_purge
 
 from django.utils import timezone
 
@@ -9,6 +21,158 @@ class TaskQuerySet(models.QuerySet):
     def active(self):
         return self.filter(deleted_at__isnull=True)
 
+    def visible_to(self, user):
+        """
+        Tasks `user` can see: ones they own, are assigned to, or that are in
+        a project they own or hold any role in (a project's owner need not
+        have a member row). Ownership, membership and assignment are
+        uncorrelated semi-join subqueries rather than joins, so a task that
+        matches several ways is still one row (no DISTINCT), and each branch
+        of the OR can be answered from an index instead of probing every task.
+        """
+        projects = ProjectMember.objects.filter(user=user).values('project_id')
+        owned_projects = Project.objects.filter(owner=user).values('pk')
+        assigned = Task.assignees.through.objects.filter(user=user).values('task_id')
+        return self.filter(
+            models.Q(owner=user) | models.Q(project_id__in=projects) | models.Q(project_id__in=owned_projects)
+            | models.Q(pk__in=assigned)
+        )
+
+    def update(self, **kwargs):
+        # .update() skips save() and its signals, so cached statistics and
+        # the rollup tables are maintained here, and the tasks the rows
+        # block are touched. The affected rows are read first: the filter
+        # may depend on the fields being changed. They are locked until the
+        # rollup deltas are written in the same transaction, so the deltas
+        # match the rows the UPDATE actually changed.
+        if not (DASHBOARD_FIELDS | PERFORMANCE_FIELDS | ROLLUP_FIELDS | DEPENDENT_FIELDS).intersection(kwargs):
+            return super().update(**kwargs)
+        with transaction.atomic():
+            before = {
+                pk: RollupState(*state)
+                for pk, *state in self.select_for_update(of=('self',)).order_by().values_list('pk', *STATE_FIELDS)
+            }
+            rows = super().update(**kwargs)
+
+            if DASHBOARD_FIELDS.intersection(kwargs):
+                invalidate_dashboard_stats(self._affected(before, kwargs, 'owner'))
+            if PERFORMANCE_FIELDS.intersection(kwargs):
+                invalidate_project_performance(self._affected(before, kwargs, 'project'))
+            if 'project' in kwargs or 'project_id' in kwargs:
+                invalidate_dependency_graph(self._affected(before, kwargs, 'project'))
+            if kwargs.get('deleted_at') is not None:
+                schedule_purge()
+            if ROLLUP_FIELDS.intersection(kwargs):
+                self._record_rollup_changes(before, kwargs)
+            if DEPENDENT_FIELDS.intersection(kwargs):
+                touch_blocked_tasks(self._dependent_changes(before, kwargs))
+        return rows
+
+    @staticmethod
+    def _dependent_changes(before, kwargs):
+        """Updated rows whose blocker representation may have changed (titles aren't read first)."""
+        changes = {name: value for name, value in kwargs.items() if name in DEPENDENT_FIELDS}
+        return [
+            pk for pk, state in before.items()
+            if any(
+                name == 'title' or hasattr(value, 'resolve_expression') or getattr(state, name) != value
+                for name, value in changes.items()
+            )
+        ]
+
+    @staticmethod
+    def _affected(before, kwargs, relation):
+        """Owner or project ids of the updated rows, before and after."""
+        ids = {getattr(state, f'{relation}_id') for state in before.values()}
+        new = kwargs.get(f'{relation}_id', kwargs.get(relation))
+        ids.add(getattr(new, 'pk', new))
+        return ids
+
+    def _record_rollup_changes(self, before, kwargs):
+        after = states_after_update(before, kwargs)
+        if after is None:
+            after = {
+                pk: RollupState(*state)
+                for pk, *state in self.model.objects.all_with_deleted()
+                .filter(pk__in=before).values_list('pk', *STATE_FIELDS)
+            }
+
+        # Stamp or clear actual_completion_date on completed / reopened rows
+        now, stamped = timezone.now(), {}
+        for pk, state in after.items():
+            date = completion_date(before[pk], state, now)
+            if date != state.actual_completion_date:
+                stamped.setdefault(date, []).append(pk)
+                after[pk] = state._replace(actual_completion_date=date)
+        for date, pks in stamped.items():
+            rows = self.model.objects.all_with_deleted().filter(pk__in=pks)
+            super(TaskQuerySet, rows).update(actual_completion_date=date)
+
+        record_changes((before[pk], after[pk]) for pk in after)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        now = timezone.now()
+        for obj in objs:
+            obj.actual_completion_date = completion_date(None, task_state(obj), now)
+        objs = super().bulk_create(objs, *args, **kwargs)
+        invalidate_dashboard_stats({obj.owner_id for obj in objs})
+        invalidate_project_performance({obj.project_id for obj in objs})
+        record_changes((None, task_state(obj)) for obj in objs)
+        return objs
+
+    def touch(self):
+        """
+        Bump updated_at without saving each row, for writes that change a
+        task's representation (subtasks, tags) but not its own columns.
+        Conditional GET validators depend on it.
+        """
+        return self.update(updated_at=timezone.now())
+
+    def with_subtask_stats(self):
+        """Annotate subtask totals so serializers don't COUNT per row."""
+        def count(**filters):
+            subtasks = (
+                Subtask.objects.filter(parent_task=models.OuterRef('pk'), **filters)
+                .order_by().values('parent_task').annotate(n=models.Count('pk')).values('n')
+            )
+            return Coalesce(models.Subquery(subtasks), 0)
+
+        # Correlated subqueries rather than JOIN + GROUP BY, so the annotated
+        # queryset can still be joined and ranked by tasks.search
+        return self.annotate(subtask_total=count(), subtask_done=count(is_completed=True))
+
+    def with_relations(self, fields=None):
+        """
+        Prefetch tags, assignees and blockers used by TaskSerializer.
+        When `fields` is given, only relations named in it are prefetched.
+        """
+        from tags.models import TaskTag
+        lookups = {
+            'tags': models.Prefetch('task_tags', queryset=TaskTag.objects.select_related('tag')),
+            'assignees': 'assignees',
+            'blocked_by': 'blocked_by',
+        }
+        return self.prefetch_related(*(
+            lookup for name, lookup in lookups.items() if fields is None or name in fields
+        ))
+
+    def for_fields(self, fields, blocked_by_depth=1):
+        """
+        Annotate and prefetch only what TaskSerializer needs to render
+        `fields` (e.g. a ?fields= pruned serializer's field names).
+        """
+        fields = set(fields)
+        queryset = self
+        if fields & {'subtask_count', 'subtask_completed', 'subtask_progress'}:
+            queryset = queryset.with_subtask_stats()
+        if blocked_by_depth > 1:
+            fields.discard('blocked_by')  # loaded level by level by the serializer
+        queryset = queryset.with_relations(fields)
+        if 'description' not in fields:
+            queryset = queryset.defer('description')
+        return queryset
+
 class TaskManager(models.Manager):
     def get_queryset(self):
         return TaskQuerySet(self.model, using=self._db).active()
@@ -16,6 +180,9 @@ class TaskManager(models.Manager):
     def all_with_deleted(self):
         return TaskQuerySet(self.model, using=self._db)
 
+    def visible_to(self, user):
+        return self.get_queryset().visible_to(user)
+
 class Task(models.Model):
     PRIORITY_CHOICES = [
         ('Low', 'Low'),
@@ -62,6 +229,9 @@ class Task(models.Model):
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='owned_tasks')
     assignees = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='assigned_tasks', blank=True)
     
+    # Position within the board column (project + status); see tasks.ranking
+    rank = models.CharField(max_length=255, blank=True, default='')
+
     # Dependencies
     blocked_by = models.ManyToManyField('self', symmetrical=False, related_name='blocking', blank=True)
     
@@ -73,10 +243,105 @@ class Task(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        # Partial on live rows: TaskManager always adds deleted_at IS NULL.
+        # Shaped after TaskViewSet filters/ordering (incl. the keyset tie-breaker),
+        # DashboardStatsView and the analytics views; see tests_query_plans.py.
+        indexes = [
+            models.Index(
+                fields=['owner', 'created_at', 'id'], name='task_owner_created_live',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=['owner', 'status', 'created_at'], name='task_owner_status_live',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=['owner', 'priority', 'created_at'], name='task_owner_priority_live',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=['owner', 'is_completed', 'updated_at'], name='task_owner_completed_live',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=['project', 'status', 'created_at'], name='task_project_status_live',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=['project', 'status', 'rank'], name='task_project_status_rank_live',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            # Tombstones only: the purge's oldest-first scan and the
+            # conditional GET watermark (latest deletion per owner)
+            models.Index(
+                fields=['deleted_at'], name='task_tombstone_deleted',
+                condition=models.Q(deleted_at__isnull=False),
+            ),
+            models.Index(
+                fields=['owner', 'deleted_at'], name='task_owner_tombstone',
+                condition=models.Q(deleted_at__isnull=False),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        task = super().from_db(db, field_names, values)
+        # Remember the state as loaded, for the post_delete statistics
+        # receiver (save() replaces it with the stored state)
+        if not task.get_deferred_fields().intersection(STATE_FIELDS):
+            task._loaded_state = task_state(task)
+        return task
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        if not self.get_deferred_fields().intersection(STATE_FIELDS):
+            self._loaded_state = task_state(self)
+
+    def locked_state(self):
+        """
+        (rollup state, title) as stored in the database, with the row locked
+        until the surrounding transaction ends; (None, None) for new tasks.
+        """
+        if self._state.adding:
+            return None, None
+        row = (
+            Task.objects.all_with_deleted().select_for_update().filter(pk=self.pk)
+            .values_list('title', *STATE_FIELDS).first()
+        )
+        return (RollupState(*row[1:]), row[0]) if row else (None, None)
+
+    def save(self, *args, **kwargs):
+        # New cards go to the top of their board column
+        if self._state.adding and not self.rank:
+            self.rank = top_rank(self.project_id, self.owner_id, self.status)
+
+        # The stored row is read under lock in the write's transaction, so
+        # the rollup deltas match what the write actually changed
+        with transaction.atomic():
+            before, title = self.locked_state()
+            if before is not None:
+                self._loaded_state = before  # post_save receivers see the previous owner / project
+            date = completion_date(before, task_state(self))
+            if date != self.actual_completion_date:
+                self.actual_completion_date = date
+                if kwargs.get('update_fields') is not None:
+                    kwargs['update_fields'] = {*kwargs['update_fields'], 'actual_completion_date'}
+            super().save(*args, **kwargs)
+
+            self._loaded_state = task_state(self)
+            record_changes([(before, self._loaded_state)])
+            if before is not None and before.project_id != self.project_id:
+                invalidate_dependency_graph([before.project_id, self.project_id])
+            # Blocked tasks render this one's title and status
+            if before is not None and (title, before.status, before.is_completed, before.deleted_at) != (
+                self.title, self.status, self.is_completed, self.deleted_at
+            ):
+                touch_blocked_tasks([self.pk])
 
     def delete(self, **kwargs):
         self.deleted_at = timezone.now()
         self.save()
+        schedule_purge()
 
     def __str__(self):
         return self.title
@@ -96,7 +361,8 @@ class Subtask(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
-        ordering = ['order']
+        # created_at breaks ties left by orders written before they were gapped
+        ordering = ['order', 'created_at']
 
     def save(self, *args, **kwargs):
         if self.is_completed and not self.completed_at:
@@ -107,3 +373,97 @@ class Subtask(models.Model):
 
     def __str__(self):
         return self.title
+
+
+class DailyCompletion(models.Model):
+    """
+    Tasks completed per owner, project and day; maintained on every task
+    write (see tasks.rollups) and read by ProductivityTrendView.
+    """
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_completions')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='daily_completions', null=True, blank=True)
+    day = models.DateField()
+    completed = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'project', 'day'], name='dailycompletion_project_day',
+                condition=models.Q(project__isnull=False),
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'day'], name='dailycompletion_personal_day',
+                condition=models.Q(project__isnull=True),
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'day'], name='dailycompletion_user_day'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} {self.project_id or "-"} {self.day}: {self.completed}'
+
+
+class ProjectStatusFlow(models.Model):
+    """
+    Net change in a project's live tasks (and their story points) in one
+    status on one day; the running total over days is the cumulative flow.
+    Maintained on every task write (see tasks.rollups).
+    """
+    id = models.BigAutoField(primary_key=True)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='status_flow')
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES)
+    tasks = models.IntegerField(default=0)
+    story_points = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'day', 'status'], name='projectstatusflow_day_status'),
+        ]
+
+    def __str__(self):
+        return f'{self.project_id} {self.day} {self.status}: {self.tasks:+} ({self.story_points:+} pts)'
+
+
+class TaskDependencyClosure(models.Model):
+    """
+    Transitive closure of Task.blocked_by: `ancestor` blocks `descendant`
+    directly (depth 1) or through depth - 1 tasks in between, along the
+    shortest chain. Maintained on every blocked_by change (see
+    tasks.dependencies); rebuild_dependency_closure rebuilds it.
+    """
+    id = models.BigAutoField(primary_key=True)
+    ancestor = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='taskclosure_ancestor_descendant'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'ancestor'], name='taskclosure_descendant'),
+        ]
+
+    def __str__(self):
+        return f'{self.ancestor_id} blocks {self.descendant_id} ({self.depth})'
+
+
+class TaskSearchDocument(models.Model):
+    """
+    Read-only view of the SQLite FTS5 shadow table (see tasks.search).
+    Unmanaged: the table and its sync triggers are installed after migrate,
+    and it does not exist on PostgreSQL.
+    """
+    task = models.OneToOneField(
+        Task, primary_key=True, db_column='id',
+        on_delete=models.DO_NOTHING, related_name='search_document', db_constraint=False,
+    )
+    title = models.TextField()
+    description = models.TextField()
+
+    class Meta:
+        managed = False
+        db_table = 'tasks_task_fts'
@@ -0,0 +1,233 @@
+"""
+Fractional ranks for ordering Kanban cards within a column.
+
+A rank is a base-36 string read as a fraction (0.<digits>) and compared
+lexicographically, so a card can always be placed between two neighbours
+by generating a key between theirs and updating only the moved row. Keys
+use 0-9a-z only (sorted the same under byte-wise and locale collations)
+and never end in '0', which guarantees there is room below every key.
+
+Repeated inserts at the same spot make keys grow; once a key passes
+TASK_RANK_REBALANCE_LENGTH the column is re-spread in the background
+(see schedule_rebalance and the rebalance_task_ranks command).
+
+Subtasks, a short list per task, keep integer `order` values spaced
+SUBTASK_ORDER_GAP apart instead: a move takes the midpoint between its
+neighbours and only respaces the list when they are adjacent.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+
+DEFAULT_REBALANCE_LENGTH = 16
+DEFAULT_SUBTASK_ORDER_GAP = 1024
+
+
+def _digit(key, index):
+    return DIGITS.index(key[index]) if index < len(key) else 0
+
+
+def rank_between(lower=None, upper=None):
+    """
+    Return a key strictly between `lower` and `upper`; either may be None
+    for the start or end of the column.
+    """
+    if lower is not None and upper is not None and lower >= upper:
+        raise ValueError(f'{lower!r} must sort before {upper!r}')
+    if upper is None:
+        return _rank_after(lower or '')
+    if not lower:
+        return _rank_before(upper)
+    return _midpoint(lower, upper)
+
+
+def _rank_before(upper):
+    # Step down by whole digits rather than halving, so inserting at the
+    # top of a column grows keys by one character every ~35 inserts.
+    head = DIGITS.index(upper[0])
+    if head >= 2:
+        return DIGITS[head - 1]
+    if head == 1:
+        return '0' + DIGITS[-1]
+    return '0' + _rank_before(upper[1:])
+
+
+def _rank_after(lower):
+    if not lower:
+        return DIGITS[BASE // 2]
+    head = DIGITS.index(lower[0])
+    if head < BASE - 1:
+        return DIGITS[head + 1]
+    return DIGITS[-1] + _rank_after(lower[1:])
+
+
+def _midpoint(lower, upper):
+    # Skip the common prefix (a missing digit in `lower` reads as '0')
+    prefix = 0
+    while prefix < len(upper) and _digit(lower, prefix) == DIGITS.index(upper[prefix]):
+        prefix += 1
+    lower, head = lower[prefix:], upper[:prefix]
+    upper = upper[prefix:]
+
+    low, high = _digit(lower, 0), DIGITS.index(upper[0])
+    if high - low > 1:
+        return head + DIGITS[(low + high) // 2]
+    # Adjacent digits: the upper digit alone fits when upper continues past
+    # it, otherwise extend lower with a key after its remainder
+    if len(upper) > 1:
+        return head + upper[0]
+    return head + DIGITS[low] + _rank_after(lower[1:])
+
+
+def spread_ranks(count):
+    """
+    `count` evenly spaced keys, with roughly BASE free slots between
+    neighbours so most moves after a rebalance don't lengthen keys.
+    """
+    width = 1
+    while BASE ** width <= count * BASE:
+        width += 1
+    step = BASE ** width // (count + 1)
+    ranks = []
+    for position in range(1, count + 1):
+        value, digits = step * position, []
+        for _ in range(width):
+            value, remainder = divmod(value, BASE)
+            digits.append(DIGITS[remainder])
+        ranks.append(''.join(reversed(digits)).rstrip('0'))
+    return ranks
+
+
+class RankSequence:
+    """
+    Increasing keys for a block of cards inserted above `upper` (the
+    column's current top card), e.g. an import in file order.
+
+    Keys are a fixed prefix below `upper` followed by a length-prefixed
+    counter written without '0' digits, so they stay short and ordered
+    however many cards the block holds.
+    """
+    COUNTER_DIGITS = DIGITS[1:]
+
+    def __init__(self, upper=None):
+        self.prefix = rank_between(None, upper)
+        self.count = 0
+
+    def __next__(self):
+        self.count += 1
+        value, digits = self.count, []
+        while value:
+            value, remainder = divmod(value, len(self.COUNTER_DIGITS))
+            digits.append(self.COUNTER_DIGITS[remainder])
+        return self.prefix + DIGITS[len(digits)] + ''.join(reversed(digits))
+
+    def __iter__(self):
+        return self
+
+
+def column_filter(project_id, owner_id, status):
+    """
+    Lookups selecting a board column. Project tasks share a column per
+    status; personal tasks (no project) are ranked per owner.
+    """
+    if project_id is not None:
+        return {'project_id': project_id, 'status': status}
+    return {'project__isnull': True, 'owner_id': owner_id, 'status': status}
+
+
+def top_rank(project_id, owner_id, status):
+    """Rank that places a card above every card in the column."""
+    from .models import Task
+    first = (
+        Task.objects.filter(**column_filter(project_id, owner_id, status))
+        .exclude(rank='').order_by('rank').values_list('rank', flat=True).first()
+    )
+    return rank_between(None, first)
+
+
+def needs_rebalance(rank):
+    return len(rank) > getattr(settings, 'TASK_RANK_REBALANCE_LENGTH', DEFAULT_REBALANCE_LENGTH)
+
+
+def rebalance_column(project_id, owner_id, status):
+    """Re-spread a column's ranks evenly, keeping the current order. Returns rows updated."""
+    from .models import Task
+    with transaction.atomic():
+        tasks = list(
+            Task.objects.filter(**column_filter(project_id, owner_id, status))
+            .select_for_update().order_by('rank', 'id').only('id', 'rank')
+        )
+        now = timezone.now()
+        for task, rank in zip(tasks, spread_ranks(len(tasks))):
+            task.rank, task.updated_at = rank, now
+        Task.objects.bulk_update(tasks, ['rank', 'updated_at'], batch_size=500)
+    return len(tasks)
+
+
+def _rebalance_in_thread(*column):
+    try:
+        rebalance_column(*column)
+    except Exception:
+        logger.exception('Rank rebalance failed for column %s', column)
+    finally:
+        connections.close_all()
+
+
+def schedule_rebalance(project_id, owner_id, status):
+    """
+    Rebalance a column once the current transaction commits, in a daemon
+    thread unless TASK_RANK_REBALANCE_ASYNC is False.
+    """
+    column = (project_id, owner_id, status)
+    if getattr(settings, 'TASK_RANK_REBALANCE_ASYNC', True):
+        run = lambda: threading.Thread(target=_rebalance_in_thread, args=column, daemon=True).start()
+    else:
+        run = lambda: rebalance_column(*column)
+    transaction.on_commit(run)
+
+
+def subtask_order_gap():
+    return getattr(settings, 'SUBTASK_ORDER_GAP', DEFAULT_SUBTASK_ORDER_GAP)
+
+
+def order_between(lower=None, upper=None):
+    """
+    A subtask order strictly between `lower` and `upper` (None for the
+    start or end of the list), or None when there is no integer left
+    between them.
+    """
+    if lower is not None and upper is not None and lower >= upper:
+        raise ValueError(f'{lower!r} must sort before {upper!r}')
+    if upper is None:
+        return (lower or 0) + subtask_order_gap()
+    low = -1 if lower is None else lower  # orders are never negative
+    if upper - low < 2:
+        return None
+    return (low + upper) // 2
+
+
+def respace_subtasks(task_id, first=None):
+    """
+    Give a task's subtasks evenly gapped orders in one statement: `first`
+    (subtask ids) in that order, then the rest as they are ordered now.
+    Call inside a transaction holding the parent task's lock. Returns the
+    subtasks, in their new order.
+    """
+    from .models import Subtask
+    subtasks = {subtask.pk: subtask for subtask in Subtask.objects.filter(parent_task_id=task_id).only('id', 'order')}
+    ordered = [subtasks.pop(pk) for pk in dict.fromkeys(first or ()) if pk in subtasks]
+    ordered += subtasks.values()
+    gap = subtask_order_gap()
+    for position, subtask in enumerate(ordered, 1):
+        subtask.order = position * gap
+    Subtask.objects.bulk_update(ordered, ['order'], batch_size=500)
+    return ordered
@@ -0,0 +1,247 @@
+"""
+Rollup tables maintained from task writes, behind the analytics views.
+
+- DailyCompletion: live tasks completed per owner, project and day
+  (ProductivityTrendView). A task counts when it is not soft-deleted, is
+  completed (is_completed, or status 'done') and has an
+  actual_completion_date, which is stamped when a task becomes completed
+  and cleared when it is reopened. The day is the local date of that
+  timestamp.
+- ProjectStatusFlow: per project, day and status, the net change in live
+  tasks and story points (cumulative flow and burn-up). The snapshot for
+  a day is the running total of every row up to it.
+
+Every write path keeps both in step by moving a task from its old bucket
+to its new one:
+
+- Task.save() (including soft deletes), with the state loaded from the DB
+- TaskQuerySet.update() and bulk_create(), which skip save()
+- hard deletes through post_delete (TasksConfig.ready)
+
+backfill_completion_rollup and backfill_cumulative_flow rebuild them.
+"""
+import datetime
+from collections import Counter, defaultdict, namedtuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, QuerySet, Sum
+from django.utils import timezone
+
+
+# Task columns the rollups depend on, in RollupState order
+STATE_FIELDS = (
+    'owner_id', 'project_id', 'is_completed', 'status', 'story_points', 'actual_completion_date', 'deleted_at',
+)
+RollupState = namedtuple('RollupState', STATE_FIELDS)
+
+# update() keyword arguments that can move a task between buckets
+ROLLUP_FIELDS = frozenset(STATE_FIELDS) | {'owner', 'project'}
+
+COMPLETED = Q(is_completed=True) | Q(status='done')
+
+
+def is_completed(state):
+    return state.is_completed or state.status == 'done'
+
+
+def task_state(task):
+    return RollupState(*(getattr(task, field) for field in STATE_FIELDS))
+
+
+def completion_bucket(state):
+    """(owner_id, project_id, day) the task is counted in, or None."""
+    if state is None or state.deleted_at is not None or not is_completed(state):
+        return None
+    if state.actual_completion_date is None:
+        return None
+    return state.owner_id, state.project_id, timezone.localdate(state.actual_completion_date)
+
+
+def flow_bucket(state):
+    """(project_id, status) the task is counted in, or None."""
+    if state is None or state.deleted_at is not None or state.project_id is None:
+        return None
+    return state.project_id, state.status
+
+
+def completion_date(before, after, now=None):
+    """
+    actual_completion_date `after` should be saved with: stamped when the
+    task becomes completed without one, cleared when it is reopened
+    (unless the date was changed in the same write).
+    """
+    if is_completed(after):
+        return after.actual_completion_date or now or timezone.now()
+    if before is not None and is_completed(before) and after.actual_completion_date == before.actual_completion_date:
+        return None
+    return after.actual_completion_date
+
+
+def record_changes(changes):
+    """Apply (before, after) RollupState pairs to the rollup tables."""
+    completions, flow = Counter(), {}
+    for before, after in changes:
+        old, new = completion_bucket(before), completion_bucket(after)
+        if old != new:
+            if old:
+                completions[old] -= 1
+            if new:
+                completions[new] += 1
+
+        old, new = flow_bucket(before), flow_bucket(after)
+        if old != new or (new and before.story_points != after.story_points):
+            if old:
+                tasks, points = flow.get(old, (0, 0))
+                flow[old] = (tasks - 1, points - before.story_points)
+            if new:
+                tasks, points = flow.get(new, (0, 0))
+                flow[new] = (tasks + 1, points + after.story_points)
+
+    apply_completion_deltas(completions)
+    apply_flow_deltas(flow, timezone.localdate())
+
+
+def _add(model, lookup, **deltas):
+    """Add `deltas` to the row matching `lookup`, creating it when missing."""
+    rows = model.objects.filter(**lookup)
+    increments = {field: F(field) + delta for field, delta in deltas.items()}
+    if rows.update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Created concurrently since the UPDATE above
+        rows.update(**increments)
+
+
+def apply_completion_deltas(deltas):
+    from .models import DailyCompletion
+    for (user_id, project_id, day), delta in sorted(deltas.items(), key=str):
+        if delta:
+            _add(DailyCompletion, {'user_id': user_id, 'project_id': project_id, 'day': day}, completed=delta)
+
+
+def apply_flow_deltas(deltas, day):
+    from .models import ProjectStatusFlow
+    for (project_id, status), (tasks, points) in sorted(deltas.items(), key=str):
+        if tasks or points:
+            _add(
+                ProjectStatusFlow, {'project_id': project_id, 'day': day, 'status': status},
+                tasks=tasks, story_points=points,
+            )
+
+
+def states_after_update(before, kwargs):
+    """
+    Row states after `update(**kwargs)`, worked out in Python; None when a
+    value is an expression and the rows have to be read back.
+    """
+    values = {}
+    for name, value in kwargs.items():
+        if name not in ROLLUP_FIELDS:
+            continue
+        if hasattr(value, 'resolve_expression'):
+            return None
+        if name in ('owner', 'project'):
+            name, value = f'{name}_id', getattr(value, 'pk', value)
+        values[name] = value
+    return {pk: state._replace(**values) for pk, state in before.items()}
+
+
+def flow_snapshots(project_id, start, end):
+    """
+    [(day, {status: (tasks, story_points)})] for every day from start to
+    end: the running totals of the project's ProjectStatusFlow rows.
+    """
+    from .models import ProjectStatusFlow, Task
+    rows = ProjectStatusFlow.objects.filter(project_id=project_id)
+    totals = {status: (0, 0) for status, _ in Task.STATUS_CHOICES}
+    before = rows.filter(day__lt=start).values('status').annotate(t=Sum('tasks'), p=Sum('story_points')).order_by()
+    for status, tasks, points in before.values_list('status', 't', 'p'):
+        totals[status] = (tasks, points)
+    changes = defaultdict(list)
+    for day, status, tasks, points in rows.filter(day__range=(start, end)).values_list('day', 'status', 'tasks', 'story_points'):
+        changes[day].append((status, tasks, points))
+
+    snapshots, day = [], start
+    while day <= end:
+        for status, tasks, points in changes.get(day, ()):
+            count, total = totals.get(status, (0, 0))
+            totals[status] = (count + tasks, total + points)
+        snapshots.append((day, dict(totals)))
+        day += datetime.timedelta(days=1)
+    return snapshots
+
+
+def replay_status_flow(project_id, batch_size=1000):
+    """
+    Rebuild a project's ProjectStatusFlow rows from its tasks and their
+    ActivityLog history: each task enters its first logged status (its
+    current one if it has no history) on created_at, follows its
+    'status_changed' / 'completed' events and leaves on deleted_at. Moves
+    the log missed (bulk status updates) are applied at updated_at, so the
+    final totals always match the live tasks. Returns the rows written.
+    """
+    from activity.models import ActivityLog
+    from .models import ProjectStatusFlow, Task
+
+    tasks = {
+        str(task['id']): task for task in Task.objects.all_with_deleted().filter(project_id=project_id)
+        .values('id', 'status', 'story_points', 'created_at', 'updated_at', 'deleted_at')
+    }
+    history = defaultdict(list)  # task id -> [(at, old_status, new_status)]
+    ids = list(tasks)
+    for start in range(0, len(ids), batch_size):
+        events = (
+            ActivityLog.objects
+            .filter(target_type='task', target_id__in=ids[start:start + batch_size], action__in=('status_changed', 'completed'))
+            .order_by('created_at').values_list('target_id', 'action', 'delta', 'created_at')
+        )
+        for task_id, action, delta, at in events:
+            old, new = (None, 'done') if action == 'completed' else ((delta or {}).get('old_status'), (delta or {}).get('new_status'))
+            if new:
+                history[task_id].append((at, old, new))
+
+    flow = defaultdict(lambda: [0, 0])
+
+    def move(at, status, sign, points):
+        cell = flow[timezone.localdate(at), status]
+        cell[0] += sign
+        cell[1] += sign * points
+
+    default_status = Task._meta.get_field('status').default
+    for task_id, task in tasks.items():
+        events, points = history.get(task_id, []), task['story_points']
+        status = (events[0][1] or default_status) if events else task['status']
+        move(task['created_at'], status, 1, points)
+        for at, _, new in events:
+            if new != status:
+                move(at, status, -1, points)
+                move(at, new, 1, points)
+                status = new
+        if task['deleted_at']:
+            move(task['deleted_at'], status, -1, points)
+        elif status != task['status']:
+            move(task['updated_at'], status, -1, points)
+            move(task['updated_at'], task['status'], 1, points)
+
+    rows = [
+        ProjectStatusFlow(project_id=project_id, day=day, status=status, tasks=count, story_points=points)
+        for (day, status), (count, points) in sorted(flow.items()) if count or points
+    ]
+    with transaction.atomic():
+        ProjectStatusFlow.objects.filter(project_id=project_id).delete()
+        ProjectStatusFlow.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def task_deleted(sender, instance, origin=None, **kwargs):
+    """
+    post_delete receiver for Task (hard deletes). Tasks removed because
+    their project or owner was deleted are skipped: that deletion cascades
+    to the parent's rollup rows.
+    """
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin is None or origin_model is sender:
+        record_changes([(task_state(instance), None)])
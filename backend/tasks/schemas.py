@@ -2,15 +2,25 @@
 Pydantic schemas for strict input validation.
 Security principle: Every user input is a threat.
 """
+import re
+
 from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
+from decimal import Decimal
 from uuid import UUID
 import bleach
 
 
+# Characters bleach may strip, escape or normalize; text without any of
+# them comes back unchanged, so it can skip the (slow) HTML parse.
+_BLEACH_SENSITIVE = re.compile(r'[<>&\r\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]')
+
+
 def sanitize_text(value: str) -> str:
     """Remove any HTML/script tags from input text."""
+    if not _BLEACH_SENSITIVE.search(value):
+        return value
     return bleach.clean(value, tags=[], strip=True)
 
 
@@ -70,6 +80,20 @@ class TaskCreateSchema(BaseModel):
         populate_by_name = True
 
 
+class TaskImportSchema(TaskCreateSchema):
+    """Schema for one imported row: a task plus an optional client-chosen id."""
+    id: Optional[UUID] = Field(default=None)
+
+    # Imported rows are bulk-inserted without model validation, so hours get
+    # the bounds of their DecimalField(max_digits=5, decimal_places=2) here
+    time_estimate: Optional[Decimal] = Field(
+        default=None, alias="timeEstimate", ge=0, le=Decimal("999.99"), max_digits=5, decimal_places=2,
+    )
+    time_spent: Optional[Decimal] = Field(
+        default=None, alias="timeSpent", ge=0, le=Decimal("999.99"), max_digits=5, decimal_places=2,
+    )
+
+
 class TaskUpdateSchema(BaseModel):
     """Schema for updating an existing task."""
     title: Optional[str] = Field(default=None, min_length=1, max_length=200)
@@ -140,6 +164,21 @@ class StatusUpdateSchema(BaseModel):
         return v
 
 
+class TaskMoveSchema(BaseModel):
+    """Schema for moving a Kanban card between two neighbours."""
+    status: Optional[str] = Field(default=None)
+    after: Optional[UUID] = Field(default=None)  # card that ends up directly above
+    before: Optional[UUID] = Field(default=None)  # card that ends up directly below
+
+    @field_validator("status")
+    @classmethod
+    def validate_status(cls, v):
+        allowed = {"backlog", "todo", "in_progress", "review", "done"}
+        if v is not None and v not in allowed:
+            raise ValueError(f"Status must be one of {allowed}")
+        return v
+
+
 class BulkActionSchema(BaseModel):
     """Schema for bulk task operations."""
     ids: List[int] = Field(..., min_length=1, max_length=50)
@@ -182,3 +221,14 @@ class SubtaskUpdateSchema(BaseModel):
 
     class Config:
         populate_by_name = True
+
+
+class SubtaskMoveSchema(BaseModel):
+    """Schema for moving a subtask between two neighbours."""
+    after: Optional[UUID] = Field(default=None)  # subtask that ends up directly above
+    before: Optional[UUID] = Field(default=None)  # subtask that ends up directly below
+
+
+class SubtaskReorderSchema(BaseModel):
+    """Schema for reordering a task's subtasks."""
+    order: List[UUID] = Field(default_factory=list)  # subtask ids in their new order
@@ -0,0 +1,165 @@
+"""
+Full-text search backends for task search.
+
+The backend is chosen by settings.TASK_SEARCH_BACKEND: 'auto' (default)
+picks PostgreSQL tsvector search or the SQLite FTS5 shadow table based on
+the database vendor, falling back to icontains; any other value is a dotted
+path to a backend class.
+
+PostgreSQL keeps a weighted `search_vector` column on tasks_task, filled by
+a trigger and indexed with GIN (migration 0009). SQLite keeps an external
+content FTS5 table, `tasks_task_fts` (mapped by the unmanaged
+TaskSearchDocument model), synced by triggers that are (re)installed after
+every migrate (see TasksConfig.ready).
+"""
+import re
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+from .models import Task
+
+
+SQLITE_FTS_TABLE = 'tasks_task_fts'
+
+_SQLITE_FTS_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5(
+        id UNINDEXED, title, description,
+        content='tasks_task', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS tasks_task_fts_ai AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, id, title, description)
+        VALUES (new.rowid, new.id, new.title, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tasks_task_fts_ad AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, id, title, description)
+        VALUES ('delete', old.rowid, old.id, old.title, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tasks_task_fts_au AFTER UPDATE OF title, description ON tasks_task BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, id, title, description)
+        VALUES ('delete', old.rowid, old.id, old.title, old.description);
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, id, title, description)
+        VALUES (new.rowid, new.id, new.title, new.description);
+    END""",
+]
+
+_SQLITE_FTS_TRIGGERS = {'tasks_task_fts_ai', 'tasks_task_fts_ad', 'tasks_task_fts_au'}
+
+
+def install_sqlite_fts(using='default'):
+    """
+    Create the FTS5 shadow table and its triggers if missing, and rebuild the
+    index when a trigger had to be (re)created. SQLite table rebuilds during
+    schema changes drop triggers, so this runs after every migrate.
+    """
+    conn = connections[using]
+    if conn.vendor != 'sqlite' or 'tasks_task' not in conn.introspection.table_names():
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'tasks_task'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if _SQLITE_FTS_TRIGGERS <= existing:
+            return
+        for statement in _SQLITE_FTS_SQL:
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')")
+
+
+def search_terms(query):
+    """Split a raw search string into word tokens safe to embed in FTS syntax."""
+    return re.findall(r'\w+', query or '')
+
+
+class IcontainsSearchBackend:
+    """The previous behaviour: every term must appear in the title or description."""
+
+    def search(self, queryset, terms):
+        for term in terms:
+            queryset = queryset.filter(Q(title__icontains=term) | Q(description__icontains=term))
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class PostgresSearchBackend:
+    """Prefix-matching tsquery against the GIN-indexed search_vector column."""
+    config = 'pg_catalog.english'
+
+    def search(self, queryset, terms):
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        table = connection.ops.quote_name(Task._meta.db_table)
+        match = RawSQL(
+            f"{table}.search_vector @@ to_tsquery('{self.config}', %s)",
+            [tsquery], output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f"ts_rank({table}.search_vector, to_tsquery('{self.config}', %s))",
+            [tsquery], output_field=FloatField(),
+        )
+        return queryset.filter(match).annotate(search_rank=rank)
+
+
+class SQLiteFTSSearchBackend:
+    """Prefix-matching FTS5 query against the tasks_task_fts shadow table."""
+    # bm25 column weights: id (unindexed), title, description
+    weights = (0.0, 10.0, 1.0)
+
+    def search(self, queryset, terms):
+        expression = ' '.join(f'"{term}"*' for term in terms)
+        weights = ', '.join(str(w) for w in self.weights)
+        # Joining through TaskSearchDocument lets SQLite drive the query from
+        # the FTS index; bm25() is lower-is-better, so negate it.
+        match = RawSQL(f"{SQLITE_FTS_TABLE} MATCH %s", [expression], output_field=BooleanField())
+        rank = RawSQL(f"-bm25({SQLITE_FTS_TABLE}, {weights})", [], output_field=FloatField())
+        return (
+            queryset.filter(search_document__isnull=False).filter(match)
+            .annotate(search_rank=rank)
+        )
+
+
+_sqlite_fts_cache = {}
+
+
+def _sqlite_fts_installed():
+    name = connection.settings_dict['NAME']
+    if name not in _sqlite_fts_cache:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [SQLITE_FTS_TABLE]
+            )
+            _sqlite_fts_cache[name] = cursor.fetchone() is not None
+    return _sqlite_fts_cache[name]
+
+
+def get_search_backend():
+    path = getattr(settings, 'TASK_SEARCH_BACKEND', 'auto')
+    if path != 'auto':
+        return import_string(path)()
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    if connection.vendor == 'sqlite' and _sqlite_fts_installed():
+        return SQLiteFTSSearchBackend()
+    return IcontainsSearchBackend()
+
+
+class TaskSearchFilter(filters.SearchFilter):
+    """
+    ?search= backed by the configured full-text backend.
+    Results are ranked by relevance unless the client asks for an ?ordering=.
+    Relevance can't be cursor-paged (KeysetPagination answers 400), so
+    ?pagination=cursor searches need an explicit ?ordering=.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = search_terms(request.query_params.get(self.search_param, ''))
+        if not terms:
+            return queryset
+        queryset = get_search_backend().search(queryset, terms)
+        if not request.query_params.get(filters.OrderingFilter.ordering_param):
+            queryset = queryset.order_by('-search_rank', *getattr(view, 'ordering', None) or [])
+        return queryset
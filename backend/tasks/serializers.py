@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from .models import Task, Subtask
+from core.serializers import SparseFieldsetMixin
+from .dependencies import BlockerGraph, compact_task, creates_cycle, parse_blocked_by_depth
 
+from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
@@ -16,7 +19,7 @@ class SubtaskSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'completed_at']
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     title = serializers.CharField(min_length=1, max_length=200)
     description = serializers.CharField(max_length=2000, allow_blank=True, required=False)
     priority = serializers.ChoiceField(choices=['Low', 'Medium', 'High', 'Critical'])
@@ -55,28 +58,41 @@ class TaskSerializer(serializers.ModelSerializer):
             'startDate', 'dueDate', 'actualCompletionDate', 
             'storyPoints', 'timeEstimate', 'timeSpent',
             'project', 'owner', 'assignees', 'blocked_by',
-            'created_at', 'updated_at', 
+            'rank', 'created_at', 'updated_at',
             'subtask_count', 'subtask_completed', 'subtask_progress', 'tags', 
             'tag_ids', 'assignee_ids', 'blocked_by_ids'
         )
-        read_only_fields = ('owner', 'created_at', 'updated_at', 'deleted_at')
+        read_only_fields = ('owner', 'rank', 'created_at', 'updated_at', 'deleted_at')
+
+    def _subtask_stats(self, obj):
+        """Return (total, completed), preferring the queryset annotations."""
+        total = getattr(obj, 'subtask_total', None)
+        completed = getattr(obj, 'subtask_done', None)
+        if total is None or completed is None:
+            total = obj.subtasks.count()
+            completed = obj.subtasks.filter(is_completed=True).count()
+            obj.subtask_total, obj.subtask_done = total, completed
+        return total, completed
 
     def get_subtask_count(self, obj):
-        return obj.subtasks.count()
+        return self._subtask_stats(obj)[0]
 
     def get_subtask_completed(self, obj):
-        return obj.subtasks.filter(is_completed=True).count()
+        return self._subtask_stats(obj)[1]
 
     def get_subtask_progress(self, obj):
-        total = obj.subtasks.count()
+        total, completed = self._subtask_stats(obj)
         if total == 0:
             return 0.0
-        completed = obj.subtasks.filter(is_completed=True).count()
         return round(completed / total, 2)
 
     def get_tags(self, obj):
         from tags.serializers import TagSerializer
-        tags = [tt.tag for tt in obj.task_tags.select_related('tag').all()]
+        task_tags = obj.task_tags.all()
+        # Prefetched by TaskQuerySet.with_relations(); join the tag otherwise
+        if 'task_tags' not in getattr(obj, '_prefetched_objects_cache', {}):
+            task_tags = task_tags.select_related('tag')
+        tags = [tt.tag for tt in task_tags]
         return TagSerializer(tags, many=True).data
 
     def get_assignees(self, obj):
@@ -84,17 +100,45 @@ class TaskSerializer(serializers.ModelSerializer):
         return UserSerializer(obj.assignees.all(), many=True).data
     
     def get_blocked_by(self, obj):
-        return TaskSerializer(obj.blocked_by.all(), many=True, context=self.context).data
+        """
+        Compact blockers by default; ?blocked_by_depth=N nests up to N levels.
+        Deeper levels are loaded once per level for the whole page.
+        """
+        if 'blocked_by_depth' not in self.context:
+            self.context['blocked_by_depth'] = parse_blocked_by_depth(self.context.get('request'))
+        depth = self.context['blocked_by_depth']
+        if depth <= 1:
+            return [compact_task(blocker) for blocker in obj.blocked_by.all()]
+
+        graph = self.context.setdefault('blocker_graph', BlockerGraph())
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer) and parent.instance is not None:
+            root_ids = [task.id for task in parent.instance]
+        else:
+            root_ids = [obj.id]
+        graph.expand(root_ids, depth)
+        return graph.render(obj.id, depth)
 
     def validate_due_date(self, value):
         if value and value < timezone.now():
             raise serializers.ValidationError("Due date cannot be in the past")
         return value
 
+    def get_blockers(self, task, blocked_by_ids):
+        """Active blocker ids for `task`, rejecting ids that would close a cycle."""
+        blockers = dict(Task.objects.filter(id__in=blocked_by_ids).values_list('id', 'project_id'))
+        if task is not None and creates_cycle(task, blockers):
+            raise serializers.ValidationError({
+                'blocked_by_ids': 'These blockers would create a dependency cycle'
+            })
+        return list(blockers)
+
     def create(self, validated_data):
         tag_ids = validated_data.pop('tag_ids', [])
         assignee_ids = validated_data.pop('assignee_ids', [])
         blocked_by_ids = validated_data.pop('blocked_by_ids', [])
+        # A new task blocks nothing yet, so its blockers can't form a cycle
+        blockers = self.get_blockers(None, blocked_by_ids) if blocked_by_ids else []
         
         validated_data['owner'] = self.context['request'].user
         task = super().create(validated_data)
@@ -110,8 +154,7 @@ class TaskSerializer(serializers.ModelSerializer):
             task.assignees.set(assignee_ids)
             
         # Dependencies
-        if blocked_by_ids:
-            blockers = Task.objects.filter(id__in=blocked_by_ids)
+        if blockers:
             task.blocked_by.set(blockers)
             
         return task
@@ -120,6 +163,8 @@ class TaskSerializer(serializers.ModelSerializer):
         tag_ids = validated_data.pop('tag_ids', None)
         assignee_ids = validated_data.pop('assignee_ids', None)
         blocked_by_ids = validated_data.pop('blocked_by_ids', None)
+        if blocked_by_ids is not None:
+            blockers = self.get_blockers(instance, blocked_by_ids)
         
         task = super().update(instance, validated_data)
         
@@ -143,19 +188,27 @@ class TaskSerializer(serializers.ModelSerializer):
             
         # Dependencies
         if blocked_by_ids is not None:
-            blockers = Task.objects.filter(id__in=blocked_by_ids)
             task.blocked_by.set(blockers)
             
         return task
 
 
+DEFAULT_BULK_ACTION_MAX_IDS = 1000
+
+
 class BulkActionSerializer(serializers.Serializer):
     ids = serializers.ListField(
         child=serializers.UUIDField(),
         min_length=1,
-        max_length=50
     )
     action = serializers.ChoiceField(choices=[
         'complete', 'delete', 'move', 'set_priority', 'set_status'
     ])
     value = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+
+    def validate_ids(self, value):
+        # Read per request so the ceiling follows settings overrides
+        max_ids = getattr(settings, 'TASK_BULK_ACTION_MAX_IDS', DEFAULT_BULK_ACTION_MAX_IDS)
+        if len(value) > max_ids:
+            raise serializers.ValidationError(f'Ensure this field has no more than {max_ids} elements.')
+        return value
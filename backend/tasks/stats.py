@@ -0,0 +1,190 @@
+"""
+Cached task statistics behind the analytics views.
+
+- Per-user dashboard statistics (DashboardStatsView): one
+  conditional-aggregation query over the user's tasks.
+- Per-project performance (ProjectPerformanceView): one query grouped by
+  project over the active tasks of every project whose entry is stale.
+
+Both live in the default cache with a version token next to each entry;
+writes that can change the numbers replace the token, which makes the
+entry stale without having to know what it held:
+
+- Task.save() / delete() through post_save / post_delete (TasksConfig.ready)
+- TaskQuerySet.update() and bulk_create(), which skip those signals
+
+Tokens are replaced when the write happens and again when its transaction
+commits, so a request that read the old rows while the write was in flight
+can't leave them cached under the new token. Overdue counts also move with
+the clock, so they can lag by up to PROJECT_PERFORMANCE_CACHE_TIMEOUT.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+DEFAULT_DASHBOARD_STATS_TIMEOUT = 300
+DEFAULT_PROJECT_PERFORMANCE_TIMEOUT = 300
+
+# Task fields the dashboard counts depend on
+DASHBOARD_FIELDS = frozenset({'is_completed', 'priority', 'status', 'deleted_at', 'owner', 'owner_id'})
+
+# Task fields the project performance numbers depend on
+PERFORMANCE_FIELDS = frozenset({
+    'is_completed', 'status', 'story_points', 'due_date', 'deleted_at', 'project', 'project_id',
+})
+
+
+def version_key(user_id):
+    return f'tasks:dashboard-stats:version:{user_id}'
+
+
+def stats_key(user_id):
+    return f'tasks:dashboard-stats:{user_id}'
+
+
+def performance_version_key(project_id):
+    return f'tasks:project-performance:version:{project_id}'
+
+
+def performance_key(project_id):
+    return f'tasks:project-performance:{project_id}'
+
+
+def current_versions(keys, cached):
+    """Current token for each version key, creating the missing ones."""
+    versions = {key: cached.get(key) for key in keys}
+    missing = [key for key, version in versions.items() if version is None]
+    for key in missing:
+        cache.add(key, uuid.uuid4().hex, None)
+    if missing:
+        versions.update(cache.get_many(missing))
+    return versions
+
+
+def compute_dashboard_stats(user_id):
+    """Totals plus priority and status breakdowns in a single query."""
+    from .models import Task
+    aggregates = {
+        'total_tasks': Count('pk'),
+        'completed_tasks': Count('pk', filter=Q(is_completed=True)),
+    }
+    for priority, _ in Task.PRIORITY_CHOICES:
+        aggregates[f'priority_{priority}'] = Count('pk', filter=Q(priority=priority))
+    for status, _ in Task.STATUS_CHOICES:
+        aggregates[f'status_{status}'] = Count('pk', filter=Q(status=status))
+    counts = Task.objects.filter(owner_id=user_id).order_by().aggregate(**aggregates)
+
+    return {
+        'total_tasks': counts['total_tasks'],
+        'completed_tasks': counts['completed_tasks'],
+        'pending_tasks': counts['total_tasks'] - counts['completed_tasks'],
+        'tasks_by_priority': {priority: counts[f'priority_{priority}'] for priority, _ in Task.PRIORITY_CHOICES},
+        'tasks_by_status': {status: counts[f'status_{status}'] for status, _ in Task.STATUS_CHOICES},
+    }
+
+
+def get_dashboard_stats(user_id):
+    """Cached stats for a user; computed (and cached) on a miss."""
+    cached = cache.get_many([version_key(user_id), stats_key(user_id)])
+    version = current_versions([version_key(user_id)], cached)[version_key(user_id)]
+
+    entry = cached.get(stats_key(user_id))
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    stats = compute_dashboard_stats(user_id)
+    timeout = getattr(settings, 'DASHBOARD_STATS_CACHE_TIMEOUT', DEFAULT_DASHBOARD_STATS_TIMEOUT)
+    cache.set(stats_key(user_id), (version, stats), timeout)
+    return stats
+
+
+def compute_project_performance(project_ids):
+    """{project_id: numbers} over active tasks, in one grouped query."""
+    from .models import Task
+    from .rollups import COMPLETED
+    empty = {'total_tasks': 0, 'completed_tasks': 0, 'overdue_tasks': 0, 'total_points': 0, 'completed_points': 0}
+    performance = {str(project_id): dict(empty) for project_id in project_ids}
+    rows = (
+        Task.objects.filter(project_id__in=project_ids).values('project_id').annotate(
+            total_tasks=Count('pk'),
+            completed_tasks=Count('pk', filter=COMPLETED),
+            overdue_tasks=Count('pk', filter=Q(due_date__lt=timezone.now()) & ~COMPLETED),
+            total_points=Coalesce(Sum('story_points'), 0),
+            completed_points=Coalesce(Sum('story_points', filter=COMPLETED), 0),
+        ).order_by()
+    )
+    for row in rows:
+        performance[str(row.pop('project_id'))] = row
+    return performance
+
+
+def get_project_performance(project_ids):
+    """
+    {project_id: numbers} for `project_ids` (as strings), from the cache;
+    stale or missing projects are computed together and cached.
+    """
+    project_ids = [str(project_id) for project_id in project_ids]
+    version_keys = [performance_version_key(project_id) for project_id in project_ids]
+    cached = cache.get_many(version_keys + [performance_key(project_id) for project_id in project_ids])
+    versions = current_versions(version_keys, cached)
+
+    performance, stale = {}, []
+    for project_id in project_ids:
+        version = versions[performance_version_key(project_id)]
+        entry = cached.get(performance_key(project_id))
+        if entry is not None and entry[0] == version:
+            performance[project_id] = entry[1]
+        else:
+            stale.append(project_id)
+
+    if stale:
+        computed = compute_project_performance(stale)
+        timeout = getattr(settings, 'PROJECT_PERFORMANCE_CACHE_TIMEOUT', DEFAULT_PROJECT_PERFORMANCE_TIMEOUT)
+        cache.set_many({
+            performance_key(project_id): (versions[performance_version_key(project_id)], computed[project_id])
+            for project_id in stale
+        }, timeout)
+        performance.update(computed)
+    return performance
+
+
+def _replace_versions(keys):
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+
+def invalidate_versions(keys):
+    """Replace the version tokens `keys`, now and on commit."""
+    if not keys:
+        return
+    _replace_versions(keys)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _replace_versions(keys))
+
+
+def invalidate_dashboard_stats(user_ids):
+    """Mark the cached stats of `user_ids` stale."""
+    invalidate_versions([version_key(user_id) for user_id in set(user_ids) if user_id is not None])
+
+
+def invalidate_project_performance(project_ids):
+    """Mark the cached performance of `project_ids` stale."""
+    invalidate_versions([performance_version_key(project_id) for project_id in set(project_ids) if project_id is not None])
+
+
+def task_changed(sender, instance, **kwargs):
+    """
+    post_save / post_delete receiver for Task. save() refreshes
+    _loaded_state after its signals, so it still holds the owner and
+    project the task had before the write.
+    """
+    if 'created' not in kwargs and instance.deleted_at is not None:
+        return  # purging a tombstone: nothing counted it
+    before = getattr(instance, '_loaded_state', None)
+    invalidate_dashboard_stats([instance.owner_id, before and before.owner_id])
+    invalidate_project_performance([instance.project_id, before and before.project_id])
@@ -1,10 +1,18 @@
+import json
+import uuid
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
 from projects.models import Project
 from django.utils import timezone
-from .models import Task
+from tags.models import Tag, TaskTag
+from .models import Task, Subtask
+from .ranking import rank_between, spread_ranks
 
 User = get_user_model()
 
@@ -112,3 +120,1105 @@ class TaskTests(APITestCase):
         self.assertEqual(response.data['tasks_by_priority']['High'], 1)
         self.assertEqual(response.data['tasks_by_priority']['Medium'], 1)
         self.assertEqual(response.data['tasks_by_priority']['Low'], 1)
+
+
+class TaskListQueryCountTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='counter', password='password123')
+        self.other = User.objects.create_user(username='helper', password='password123')
+        self.tag = Tag.objects.create(name='Ops', color='hsl(0 0% 0%)', owner=self.user)
+        self.list_url = reverse('task-list')
+
+    def make_tasks(self, n):
+        for i in range(n):
+            task = Task.objects.create(title=f'Task {i}', owner=self.user)
+            Subtask.objects.create(parent_task=task, title='a', is_completed=True, order=0)
+            Subtask.objects.create(parent_task=task, title='b', order=1)
+            TaskTag.objects.create(task=task, tag=self.tag)
+            task.assignees.add(self.other)
+
+    def test_list_query_count_is_constant(self):
+        self.client.force_authenticate(user=self.user)
+
+        # validators, count, page, task_tags (+tag), assignees, blocked_by
+        self.make_tasks(3)
+        with self.assertNumQueries(6):
+            response = self.client.get(self.list_url)
+        self.assertEqual(response.data['count'], 3)
+
+        self.make_tasks(15)
+        with self.assertNumQueries(6):
+            response = self.client.get(self.list_url)
+        self.assertEqual(response.data['count'], 18)
+
+        row = response.data['results'][0]
+        self.assertEqual(row['subtask_count'], 2)
+        self.assertEqual(row['subtask_completed'], 1)
+        self.assertEqual(row['subtask_progress'], 0.5)
+        self.assertEqual([t['name'] for t in row['tags']], ['Ops'])
+        self.assertEqual(len(row['assignees']), 1)
+
+    def test_sparse_fieldsets_skip_queries(self):
+        self.make_tasks(5)
+        self.client.force_authenticate(user=self.user)
+
+        with self.assertNumQueries(3):  # validators, count, page
+            response = self.client.get(self.list_url, {'fields': 'id,title,subtaskProgress'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title', 'subtask_progress'})
+        self.assertEqual(response.data['results'][0]['subtask_progress'], 0.5)
+
+        with self.assertNumQueries(4):  # validators, count, page, assignees
+            response = self.client.get(self.list_url, {'omit': 'tags,blocked_by,description'})
+        row = response.data['results'][0]
+        self.assertNotIn('tags', row)
+        self.assertNotIn('blocked_by', row)
+        self.assertIn('assignees', row)
+
+
+class BlockedByRepresentationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='blocker', password='password123')
+        self.a = Task.objects.create(title='A', owner=self.user)
+        self.b = Task.objects.create(title='B', owner=self.user, status='todo')
+        self.c = Task.objects.create(title='C', owner=self.user)
+        # A <- B <- C <- A (cycle)
+        self.a.blocked_by.add(self.b)
+        self.b.blocked_by.add(self.c)
+        self.c.blocked_by.add(self.a)
+        self.url = reverse('task-detail', args=[self.a.id])
+        self.client.force_authenticate(user=self.user)
+
+    def test_blocked_by_is_compact_by_default(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['blocked_by'], [
+            {'id': str(self.b.id), 'title': 'B', 'status': 'todo', 'is_completed': False},
+        ])
+
+    def test_blocked_by_depth_expands_and_stops_at_cycle(self):
+        # task + tags + assignees + one query per level (A, B, C); the cycle ends the walk
+        with self.assertNumQueries(6):
+            response = self.client.get(self.url, {'blocked_by_depth': 5})
+        b = response.data['blocked_by'][0]
+        c = b['blocked_by'][0]
+        a = c['blocked_by'][0]
+        self.assertEqual((b['title'], c['title'], a['title']), ('B', 'C', 'A'))
+        self.assertNotIn('blocked_by', a)
+
+
+class TaskSearchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='searcher', password='password123')
+        self.list_url = reverse('task-list')
+        self.client.force_authenticate(user=self.user)
+
+    def test_prefix_match_and_ranking(self):
+        Task.objects.create(title='Invoice customers', owner=self.user)
+        Task.objects.create(title='Quarterly report', description='Collect invoices', owner=self.user)
+        Task.objects.create(title='Unrelated', description='nothing here', owner=self.user)
+
+        response = self.client.get(self.list_url, {'search': 'invoi'})
+        titles = [row['title'] for row in response.data['results']]
+        # Title matches outrank description matches
+        self.assertEqual(titles, ['Invoice customers', 'Quarterly report'])
+
+    def test_index_follows_updates_and_soft_deletes(self):
+        task = Task.objects.create(title='Draft roadmap', owner=self.user)
+        task.title = 'Final roadmap'
+        task.save()
+        self.assertEqual(self.client.get(self.list_url, {'search': 'draft'}).data['count'], 0)
+        self.assertEqual(self.client.get(self.list_url, {'search': 'final'}).data['count'], 1)
+
+        task.delete()
+        self.assertEqual(self.client.get(self.list_url, {'search': 'final'}).data['count'], 0)
+
+
+class TaskConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='poller', password='password123')
+        self.task = Task.objects.create(title='Watched', owner=self.user)
+        self.list_url = reverse('task-list')
+        self.stats_url = reverse('dashboard-stats')
+        self.client.force_authenticate(user=self.user)
+
+    def assertNotModified(self, url, etag, **params):
+        with self.assertNumQueries(1):  # only the validator aggregate
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_list_and_stats_answer_304_until_changed(self):
+        for url in (self.list_url, self.stats_url):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn('Last-Modified', response)
+            self.assertNotModified(url, response['ETag'])
+
+    def test_etag_is_scoped_to_query(self):
+        etag = self.client.get(self.list_url)['ETag']
+        response = self.client.get(self.list_url, {'priority': 'High'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_related_writes_and_soft_deletes_change_etag(self):
+        etag = self.client.get(self.list_url)['ETag']
+        subtasks_url = reverse('task-subtasks-list', args=[self.task.id])
+        self.client.post(subtasks_url, {'title': 'Step one'}, format='json')
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['subtask_count'], 1)
+
+        etag = self.client.get(self.stats_url)['ETag']
+        self.client.post(reverse('task-bulk'), {'ids': [str(self.task.id)], 'action': 'set_priority', 'value': 'High'}, format='json')
+        self.assertEqual(self.client.get(self.stats_url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+        etag = self.client.get(self.stats_url)['ETag']
+        other = Task.objects.create(title='Short lived', owner=self.user)
+        etag_with_other = self.client.get(self.stats_url)['ETag']
+        other.delete()
+        response = self.client.get(self.stats_url, HTTP_IF_NONE_MATCH=etag_with_other)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_blocker_edits_change_etag(self):
+        blocker = Task.objects.create(title='B', owner=self.user, status='in_progress')
+        self.task.status = 'todo'
+        self.task.save()
+        self.task.blocked_by.add(blocker)
+        params = {'status': 'todo'}
+        for change in (
+            lambda: self.client.patch(
+                reverse('task-detail', args=[blocker.id]), {'title': 'B renamed', 'status': 'done'}, format='json',
+            ),
+            lambda: Task.objects.filter(pk=blocker.pk).update(status='review'),
+        ):
+            etag = self.client.get(self.list_url, params)['ETag']
+            change()
+            response = self.client.get(self.list_url, params, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['results'][0]['blocked_by'][0],
+            {'id': str(blocker.id), 'title': 'B renamed', 'status': 'review', 'is_completed': False},
+        )
+
+
+class ProjectBoardTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='boarder', password='password123')
+        self.member = User.objects.create_user(username='teammate', password='password123')
+        self.project = Project.objects.create(name='Board', owner=self.user)
+        for i in range(5):
+            Task.objects.create(title=f'Doing {i}', status='in_progress', project=self.project, owner=self.user)
+        Task.objects.create(title='Reviewing', status='review', project=self.project, owner=self.member)
+        Task.objects.create(title='Hidden backlog', status='backlog', project=self.project, owner=self.user)
+        self.url = reverse('project-board', args=[self.project.id])
+        self.client.force_authenticate(user=self.user)
+
+    def test_visible_columns_in_one_windowed_query(self):
+        with self.assertNumQueries(5):  # project, board, task_tags, assignees, blocked_by
+            response = self.client.get(self.url, {'limit': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        columns = {column['status']: column for column in response.data['columns']}
+        # backlog is hidden in the default board settings
+        self.assertEqual(list(columns), ['in_progress', 'review', 'done'])
+        self.assertEqual(columns['in_progress']['count'], 5)
+        self.assertEqual([t['title'] for t in columns['in_progress']['tasks']], ['Doing 4', 'Doing 3'])
+        self.assertIsNotNone(columns['in_progress']['next'])
+        self.assertEqual(columns['review']['count'], 1)
+        self.assertIsNone(columns['review']['next'])
+        self.assertEqual(columns['done']['tasks'], [])
+
+    def test_column_continuation(self):
+        first = self.client.get(self.url, {'limit': 2}).data['columns'][0]
+        titles = [t['title'] for t in first['tasks']]
+        cursor = first['next']
+        while cursor:
+            response = self.client.get(self.url, {'limit': 2, 'column': 'in_progress', 'cursor': cursor})
+            column, = response.data['columns']
+            self.assertEqual(column['count'], 5)
+            titles += [t['title'] for t in column['tasks']]
+            cursor = column['next']
+        self.assertEqual(titles, [f'Doing {i}' for i in range(4, -1, -1)])
+
+        response = self.client.get(self.url, {'column': 'in_progress', 'cursor': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_board_requires_membership(self):
+        self.client.force_authenticate(user=self.member)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TaskRankingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='ranker', password='password123')
+        self.project = Project.objects.create(name='Ranked', owner=self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def test_rank_between_keeps_order(self):
+        import random
+        rng = random.Random(7)
+        keys = [rank_between(None, None)]
+        for _ in range(2000):
+            i = rng.randrange(len(keys) + 1)
+            key = rank_between(keys[i - 1] if i else None, keys[i] if i < len(keys) else None)
+            keys.insert(i, key)
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), len(keys))
+        self.assertFalse(any(key.endswith('0') for key in keys))
+        self.assertEqual(spread_ranks(500), sorted(spread_ranks(500)))
+
+    def test_move_writes_one_row(self):
+        a, b, c = (
+            Task.objects.create(title=title, status='todo', project=self.project, owner=self.user)
+            for title in 'abc'
+        )
+        # Newest on top: c, b, a
+        url = reverse('task-move', args=[a.id])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {'after': str(c.id), 'before': str(b.id)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        writes = [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(writes), 1)
+
+        ordered = list(Task.objects.filter(project=self.project).order_by('rank').values_list('title', flat=True))
+        self.assertEqual(ordered, ['c', 'a', 'b'])
+
+        response = self.client.post(url, {'status': 'done', 'after': str(a.id)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(url, {'status': 'done'}, format='json')
+        a.refresh_from_db()
+        self.assertEqual((a.status, a.is_completed), ('done', True))
+
+        response = self.client.post(url, {'status': 'todo', 'after': str(b.id), 'before': str(c.id)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    @override_settings(TASK_RANK_REBALANCE_LENGTH=3, TASK_RANK_REBALANCE_ASYNC=False)
+    def test_dense_column_is_rebalanced(self):
+        top, first, second = (
+            Task.objects.create(title=title, status='todo', project=self.project, owner=self.user)
+            for title in ('top', 'first', 'second')
+        )
+        Task.objects.filter(pk=top.pk).update(rank='1')
+        Task.objects.filter(pk=first.pk).update(rank='2')
+        Task.objects.filter(pk=second.pk).update(rank='3')
+        # Alternately squeeze a card in directly below `top`, halving the gap
+        below = first
+        longest = 0
+        for moving in [second, first] * 8:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse('task-move', args=[moving.id]),
+                    {'after': str(top.id), 'before': str(below.id)}, format='json',
+                )
+            longest = max(longest, len(response.data['rank']))
+            below = moving
+
+        ranks = list(Task.objects.filter(project=self.project).order_by('rank').values_list('title', 'rank'))
+        self.assertGreater(longest, 3)
+        self.assertEqual([title for title, _ in ranks], ['top', 'first', 'second'])
+        self.assertTrue(all(len(rank) <= 3 for _, rank in ranks))
+
+
+@override_settings(TASK_TOMBSTONE_PURGE_ASYNC=False)
+class TaskBulkActionTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='bulker', password='password123')
+        self.url = reverse('task-bulk')
+        self.client.force_authenticate(user=self.user)
+
+    def make_tasks(self, count):
+        return Task.objects.bulk_create([
+            Task(title=f'Bulk {i}', owner=self.user, rank=f'{i + 1}') for i in range(count)
+        ])
+
+    def post(self, tasks, action, value=None):
+        payload = {'ids': [str(t.id) for t in tasks], 'action': action}
+        if value is not None:
+            payload['value'] = value
+        # Activity entries are written when the request's transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, payload, format='json')
+
+    def test_statement_count_does_not_grow_with_batch(self):
+        from activity.models import ActivityLog
+        # The first completion of the day also creates its rollup row
+        self.post(self.make_tasks(1), 'complete')
+        counts = []
+        for size in (3, 100):
+            tasks = self.make_tasks(size)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post(tasks, 'complete')
+            self.assertEqual(response.data['updated'], size)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Task.objects.filter(is_completed=True, status='done').count(), 104)
+        self.assertEqual(ActivityLog.objects.filter(action='completed').count(), 104)
+
+    def test_delete_is_soft_and_logged(self):
+        from activity.models import ActivityLog
+        tasks = self.make_tasks(5)
+        response = self.post(tasks[:4], 'delete')
+        self.assertEqual(response.data['updated'], 4)
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertEqual(Task.objects.all_with_deleted().filter(deleted_at__isnull=False).count(), 4)
+        self.assertEqual(
+            set(ActivityLog.objects.filter(action='deleted').values_list('target_title', flat=True)),
+            {t.title for t in tasks[:4]},
+        )
+
+    def test_invalid_value_and_ceiling(self):
+        tasks = self.make_tasks(3)
+        self.assertEqual(self.post(tasks, 'set_priority', 'Urgent').status_code, status.HTTP_400_BAD_REQUEST)
+        with self.settings(TASK_BULK_ACTION_MAX_IDS=2):
+            self.assertEqual(self.post(tasks, 'set_priority', 'High').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.post(tasks, 'set_priority', 'High').data['updated'], 3)
+
+
+class TaskImportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='importer', password='password123')
+        self.teammate = User.objects.create_user(username='mate', password='password123')
+        self.tag = Tag.objects.create(name='Imported', color='hsl(0 0% 50%)', owner=self.user)
+        self.project = Project.objects.create(name='Target', owner=self.user)
+        self.url = reverse('task-import')
+        self.client.force_authenticate(user=self.user)
+
+    def upload(self, name, content, **extra):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        data = {'file': SimpleUploadedFile(name, content.encode('utf-8')), **extra}
+        return self.client.post(self.url, data, format='multipart')
+
+    @override_settings(TASK_IMPORT_BATCH_SIZE=2)
+    def test_csv_import_resolves_references_and_reports_errors(self):
+        first, second = 'a' * 8 + '-0000-4000-8000-' + 'a' * 12, 'b' * 8 + '-0000-4000-8000-' + 'b' * 12
+        content = (
+            'id,title,status,priority,project,tagIds,assignee_ids,blocked_by_ids,storyPoints\n'
+            f'{first},Write spec,done,High,{self.project.id},{self.tag.id},{self.teammate.id},{second},3\n'
+            ',Bad priority,,Urgent,,,,,\n'
+            f'{second},Review spec,todo,Low,{self.project.id},,,,\n'
+            f',Missing tag,,,,{uuid.uuid4()},,,\n'
+            ',Plain,,,,,,,\n'
+        )
+        response = self.upload('tasks.csv', content)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['created'], response.data['failed']), (3, 2))
+        self.assertEqual([e['row'] for e in response.data['errors']], [3, 5])
+        self.assertIn('priority', response.data['errors'][0]['errors'])
+
+        spec = Task.objects.get(pk=first)
+        self.assertTrue(spec.is_completed)
+        self.assertEqual(spec.story_points, 3)
+        self.assertEqual(list(spec.task_tags.values_list('tag_id', flat=True)), [self.tag.id])
+        self.assertEqual(list(spec.assignees.all()), [self.teammate])
+        # Forward reference to a row in a later chunk
+        self.assertEqual([str(t.id) for t in spec.blocked_by.all()], [second])
+        self.assertEqual(Task.objects.exclude(rank='').filter(owner=self.user).count(), 3)
+
+    def test_ndjson_import_and_batch_statement_count(self):
+        def lines(count):
+            return '\n'.join(json.dumps({'title': f'Row {i}', 'tagIds': [str(self.tag.id)]}) for i in range(count))
+
+        counts = []
+        for size in (3, 50):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.upload('tasks.ndjson', lines(size) + '\n{not json}\n')
+            self.assertEqual((response.data['created'], response.data['failed']), (size, 1))
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_import_rejects_hours_outside_the_column(self):
+        content = '\n'.join(json.dumps(row) for row in [
+            {'title': 'Fits', 'timeEstimate': 999.99, 'timeSpent': '1.25'},
+            {'title': 'Too long', 'timeEstimate': 1000},
+            {'title': 'Too precise', 'timeSpent': 1.234},
+        ])
+        response = self.upload('tasks.ndjson', content)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 2))
+        self.assertEqual([e['row'] for e in response.data['errors']], [2, 3])
+        self.assertIn('time_estimate', response.data['errors'][0]['errors'])
+        self.assertIn('time_spent', response.data['errors'][1]['errors'])
+        task = Task.objects.get(title='Fits')
+        self.assertEqual((str(task.time_estimate), str(task.time_spent)), ('999.99', '1.25'))
+
+    def test_ndjson_import_rejects_dependency_cycles(self):
+        from django.db.models import F
+        from .models import TaskDependencyClosure
+        a, b, c = (uuid.uuid4() for _ in range(3))
+        content = '\n'.join(json.dumps(row) for row in [
+            {'id': str(a), 'title': 'A', 'blockedByIds': [str(b)]},
+            {'id': str(b), 'title': 'B', 'blockedByIds': [str(a)]},
+            {'id': str(c), 'title': 'C', 'blockedByIds': [str(c)]},
+        ])
+        response = self.upload('tasks.ndjson', content)
+        self.assertEqual((response.data['created'], response.data['failed']), (3, 0))
+        # A's forward reference to B is linked after B -> A, so it is the one that closes the cycle
+        errors = {e['row']: e['errors']['blocked_by_ids'] for e in response.data['errors']}
+        self.assertEqual(sorted(errors), [1, 3])
+        self.assertIn('cycle', errors[1])
+        self.assertEqual(errors[3], 'A task cannot block itself')
+
+        edges = set(Task.blocked_by.through.objects.values_list('from_task_id', 'to_task_id'))
+        self.assertEqual(edges, {(b, a)})
+        self.assertNotIn((c, c), edges)
+        self.assertFalse(TaskDependencyClosure.objects.filter(ancestor=F('descendant')).exists())
+
+    def test_import_command(self):
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write('title,priority\nFrom the shell,High\n')
+        out = StringIO()
+        call_command('import_tasks', handle.name, user='importer', stdout=out, stderr=StringIO())
+        self.assertIn('Imported 1 tasks', out.getvalue())
+        self.assertTrue(Task.objects.filter(title='From the shell', owner=self.user).exists())
+
+
+class TaskExportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='exporter', password='password123')
+        self.other = User.objects.create_user(username='other', password='password123')
+        self.tag = Tag.objects.create(name='Ops, infra', color='hsl(0 0% 50%)', owner=self.user)
+        self.url = reverse('task-export')
+        self.client.force_authenticate(user=self.user)
+
+        self.blocker = Task.objects.create(title='Blocker', owner=self.user, status='todo')
+        self.task = Task.objects.create(title='Deploy', owner=self.user, status='todo', story_points=5)
+        TaskTag.objects.create(task=self.task, tag=self.tag)
+        self.task.assignees.add(self.other)
+        self.task.blocked_by.add(self.blocker)
+        Task.objects.create(title='Done already', owner=self.user, status='done')
+        Task.objects.create(title='Not mine', owner=self.other, status='todo')
+
+    def download(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_export_applies_list_filters(self):
+        import csv
+        import io
+        response, body = self.download(format='csv', status='todo')
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        self.assertIn('attachment;', response['Content-Disposition'])
+
+        rows = {row['title']: row for row in csv.DictReader(io.StringIO(body.decode()))}
+        self.assertEqual(set(rows), {'Blocker', 'Deploy'})
+        deploy = rows['Deploy']
+        self.assertEqual(deploy['storyPoints'], '5')
+        self.assertEqual(deploy['tagIds'], str(self.tag.id))
+        self.assertEqual(deploy['tags'], 'Ops, infra')
+        self.assertEqual(deploy['assigneeIds'], str(self.other.id))
+        self.assertEqual(deploy['blockedByIds'], str(self.blocker.id))
+
+    @override_settings(TASK_EXPORT_CHUNK_SIZE=2)
+    def test_ndjson_export_loads_relations_per_chunk(self):
+        for i in range(4):
+            Task.objects.create(title=f'Extra {i}', owner=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response, body = self.download(format='ndjson')
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual(len(rows), 7)
+        self.assertNotIn('Not mine', [row['title'] for row in rows])
+        # One task query, then tags/assignees/blockers for each of the 4 chunks
+        task_queries = [q for q in queries.captured_queries if 'FROM "tasks_task" ' in q['sql']]
+        self.assertEqual(len(task_queries), 1)
+        self.assertEqual(len(queries) - len(task_queries), 3 * 4)
+
+    def test_gzip_json_export(self):
+        import gzip
+        response, body = self.download(format='json', compress='gzip', search='deploy')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertTrue(response['Content-Disposition'].endswith('.json.gz"'))
+        rows = json.loads(gzip.decompress(body))
+        self.assertEqual([row['title'] for row in rows], ['Deploy'])
+        self.assertEqual(rows[0]['tagIds'], [str(self.tag.id)])
+
+    def test_empty_json_export(self):
+        response, body = self.download(format='json', status='review')
+        self.assertEqual(json.loads(body), [])
+
+
+class DashboardStatsCacheTests(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user(username='dashboard', password='password123')
+        self.task = Task.objects.create(title='First', owner=self.user, priority='Low')
+        self.url = reverse('dashboard-stats')
+        self.client.force_authenticate(user=self.user)
+
+    def stats(self):
+        return self.client.get(self.url).data
+
+    def test_stats_are_one_query_then_cached(self):
+        with self.assertNumQueries(2):  # validators + the stats aggregate
+            data = self.client.get(self.url).data
+        self.assertEqual(data['tasks_by_priority'], {'Low': 1, 'Medium': 0, 'High': 0, 'Critical': 0})
+        self.assertEqual(data['tasks_by_status']['backlog'], 1)
+        with self.assertNumQueries(1):  # validators only
+            self.assertEqual(self.client.get(self.url).data, data)
+
+    def test_writes_invalidate_cached_stats(self):
+        self.assertEqual(self.stats()['total_tasks'], 1)
+
+        self.client.post(reverse('task-list'), {'title': 'Second', 'priority': 'High'}, format='json')
+        self.assertEqual(self.stats()['tasks_by_priority']['High'], 1)
+
+        # Bulk actions use QuerySet.update(), which sends no signals
+        self.client.post(reverse('task-bulk'), {'ids': [str(self.task.id)], 'action': 'complete'}, format='json')
+        data = self.stats()
+        self.assertEqual((data['completed_tasks'], data['pending_tasks']), (1, 1))
+        self.assertEqual(data['tasks_by_status']['done'], 1)
+
+        self.client.delete(reverse('task-detail', args=[self.task.id]))
+        self.assertEqual(self.stats()['total_tasks'], 1)
+
+        Task.objects.bulk_create([Task(title='Imported', owner=self.user, rank='0')])
+        self.assertEqual(self.stats()['total_tasks'], 2)
+
+    def test_stats_are_cached_per_user(self):
+        other = User.objects.create_user(username='someone', password='password123')
+        self.stats()
+        Task.objects.create(title='Theirs', owner=other)
+        self.assertEqual(self.stats()['total_tasks'], 1)
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.stats()['total_tasks'], 1)
+
+
+class CompletionRollupTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='finisher', password='password123')
+        self.project = Project.objects.create(name='Rollup', owner=self.user)
+        self.task = Task.objects.create(title='Ship it', owner=self.user, project=self.project)
+        self.url = reverse('productivity-trend')
+        self.client.force_authenticate(user=self.user)
+
+    def trend(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(row['date'], row['count']) for row in response.data]
+
+    def today(self):
+        return timezone.localdate().isoformat()
+
+    def test_transitions_update_the_rollup(self):
+        status_url = reverse('task-update-status', args=[self.task.id])
+        self.client.patch(status_url, {'status': 'done'}, format='json')
+        self.task.refresh_from_db()
+        self.assertIsNotNone(self.task.actual_completion_date)
+        self.assertEqual(self.trend(), [(self.today(), 1)])
+
+        # Later edits to a completed task are not completions
+        self.client.patch(reverse('task-detail', args=[self.task.id]), {'title': 'Shipped'}, format='json')
+        self.assertEqual(self.trend(), [(self.today(), 1)])
+
+        self.client.patch(status_url, {'status': 'in_progress'}, format='json')
+        self.task.refresh_from_db()
+        self.assertIsNone(self.task.actual_completion_date)
+        self.assertEqual(self.trend(), [])
+
+        others = Task.objects.bulk_create([Task(title=f'Bulk {i}', owner=self.user, rank=str(i + 1)) for i in range(3)])
+        ids = [str(task.id) for task in others]
+        self.client.post(reverse('task-bulk'), {'ids': ids, 'action': 'complete'}, format='json')
+        self.assertEqual(self.trend(), [(self.today(), 3)])
+        self.client.post(reverse('task-bulk'), {'ids': ids[:1], 'action': 'delete'}, format='json')
+        self.assertEqual(self.trend(project=str(self.project.id)), [])
+        self.assertEqual(self.trend(), [(self.today(), 2)])
+
+    def test_deltas_follow_the_stored_row(self):
+        from unittest import mock
+
+        stale = Task.objects.get(pk=self.task.pk)
+        Task.objects.filter(pk=self.task.pk).update(status='done')
+        self.assertEqual(self.trend(), [(self.today(), 1)])
+        # Saved from a copy loaded before the completion: it is still undone
+        stale.status = 'in_progress'
+        stale.save()
+        self.assertEqual(self.trend(), [])
+
+        # A failure while recording the deltas rolls the write back with them
+        with mock.patch('tasks.models.record_changes', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                Task.objects.filter(pk=self.task.pk).update(status='done')
+            stale.status = 'done'
+            with self.assertRaises(RuntimeError):
+                stale.save()
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.status, self.task.actual_completion_date), ('in_progress', None))
+        self.assertEqual(self.trend(), [])
+
+    def test_ranges(self):
+        long_ago = timezone.now() - timezone.timedelta(days=40)
+        Task.objects.create(title='Old', owner=self.user, is_completed=True, actual_completion_date=long_ago)
+        Task.objects.create(title='New', owner=self.user, status='done')
+        with self.assertNumQueries(1):
+            self.assertEqual(self.trend(days=30), [(self.today(), 1)])
+        self.assertEqual(len(self.trend(days=90)), 2)
+        self.assertEqual(len(self.trend(start=long_ago.date().isoformat(), end=long_ago.date().isoformat())), 1)
+        for params in ({'days': 'week'}, {'days': 0}, {'days': 1000}, {'start': '2026-02-30'}):
+            self.assertEqual(self.client.get(self.url, params).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_backfill_from_activity_log(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from django.db.models import QuerySet
+        from activity.models import ActivityLog
+        from .models import DailyCompletion
+
+        other = Task.objects.create(title='No history', owner=self.user, is_completed=True)
+        Task.objects.filter(pk=self.task.pk).update(status='done')
+        # Data from before the rollup existed: no completion dates, no rows
+        QuerySet.update(Task.objects.all(), actual_completion_date=None)
+        DailyCompletion.objects.all().delete()
+        done_at = timezone.now() - timezone.timedelta(days=10)
+        ActivityLog.objects.create(
+            actor=self.user, action='status_changed', target_type='task', target_id=str(self.task.id),
+            target_title=self.task.title, delta={'old_status': 'todo', 'new_status': 'done'}, description='',
+        )
+        ActivityLog.objects.filter(target_id=str(self.task.id)).update(created_at=done_at)
+
+        call_command('backfill_completion_rollup', stdout=StringIO())
+        self.task.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.task.actual_completion_date, done_at)
+        self.assertEqual(other.actual_completion_date, other.updated_at)
+        self.assertEqual(self.trend(days=30), [(done_at.date().isoformat(), 1), (self.today(), 1)])
+        self.assertEqual(DailyCompletion.objects.count(), 2)
+
+
+class CumulativeFlowTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='flower', password='password123')
+        self.project = Project.objects.create(name='Flow', owner=self.user)
+        self.task = Task.objects.create(title='Estimate', owner=self.user, project=self.project, story_points=5)
+        Task.objects.create(title='Small', owner=self.user, project=self.project, story_points=2)
+        self.flow_url = reverse('project-cumulative-flow', args=[self.project.id])
+        self.burn_up_url = reverse('project-burn-up', args=[self.project.id])
+        self.client.force_authenticate(user=self.user)
+
+    def today(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data[-1]
+
+    def test_transitions_update_the_flow(self):
+        self.assertEqual(self.today(self.flow_url)['backlog'], 2)
+        self.client.patch(reverse('task-update-status', args=[self.task.id]), {'status': 'done'}, format='json')
+        row = self.today(self.flow_url)
+        self.assertEqual((row['backlog'], row['done'], row['in_progress']), (1, 1, 0))
+        self.assertEqual(self.today(self.burn_up_url), {'date': timezone.localdate(), 'total_points': 7, 'completed_points': 5})
+
+        Task.objects.filter(pk=self.task.pk).update(story_points=8)
+        self.task.refresh_from_db()
+        self.task.delete()
+        self.assertEqual(self.today(self.burn_up_url)['total_points'], 2)
+        Task.objects.all_with_deleted().filter(pk=self.task.pk).delete()
+        self.assertEqual(self.today(self.burn_up_url)['total_points'], 2)
+
+    def test_access_and_ranges(self):
+        response = self.client.get(self.flow_url, {'days': 10})
+        self.assertEqual(len(response.data), 11)
+        self.assertEqual(self.client.get(self.flow_url, {'days': 'week'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+        stranger = User.objects.create_user(username='stranger', password='password123')
+        self.client.force_authenticate(user=stranger)
+        self.assertEqual(self.client.get(self.flow_url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_backfill_replays_activity_log(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from activity.models import ActivityLog
+        from .models import ProjectStatusFlow
+
+        created_at = timezone.now() - timezone.timedelta(days=5)
+        moved_at = timezone.now() - timezone.timedelta(days=2)
+        Task.objects.filter(project=self.project).update(created_at=created_at)
+        Task.objects.filter(pk=self.task.pk).update(status='in_progress')
+        ActivityLog.objects.create(
+            actor=self.user, action='status_changed', target_type='task', target_id=str(self.task.id),
+            target_title=self.task.title, delta={'old_status': 'backlog', 'new_status': 'in_progress'}, description='',
+        )
+        ActivityLog.objects.filter(target_id=str(self.task.id)).update(created_at=moved_at)
+        ProjectStatusFlow.objects.all().delete()
+
+        call_command('backfill_cumulative_flow', stdout=StringIO())
+        rows = self.client.get(self.flow_url, {'days': 6}).data
+        by_day = [(row['backlog'], row['in_progress']) for row in rows]
+        self.assertEqual(by_day, [(0, 0), (2, 0), (2, 0), (2, 0), (1, 1), (1, 1), (1, 1)])
+
+
+class ProjectPerformanceTests(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from projects.member_models import ProjectMember
+        cache.clear()
+        self.user = User.objects.create_user(username='performer', password='password123')
+        owner = User.objects.create_user(username='lead', password='password123')
+        self.own = Project.objects.create(name='Own', owner=self.user)
+        self.shared = Project.objects.create(name='Shared', owner=owner)
+        Project.objects.create(name='Hidden', owner=owner)
+        ProjectMember.objects.create(project=self.shared, user=self.user, role='viewer')
+
+        yesterday = timezone.now() - timezone.timedelta(days=1)
+        self.task = Task.objects.create(title='Late', owner=self.user, project=self.own, story_points=3, due_date=yesterday)
+        Task.objects.create(title='Done', owner=self.user, project=self.own, story_points=5, status='done', is_completed=True)
+        Task.objects.create(title='Gone', owner=self.user, project=self.own, story_points=8).delete()
+        Task.objects.create(title='Theirs', owner=owner, project=self.shared, story_points=1)
+        self.url = reverse('project-performance')
+        self.client.force_authenticate(user=self.user)
+
+    def performance(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {row['title']: row for row in response.data}
+
+    def test_counts_active_tasks_of_visible_projects(self):
+        data = self.performance()
+        self.assertEqual(set(data), {'Own', 'Shared'})
+        own = data['Own']
+        self.assertEqual(own['id'], str(self.own.id))
+        self.assertEqual(
+            (own['total_tasks'], own['completed_tasks'], own['pending_tasks'], own['overdue_tasks']), (2, 1, 1, 1),
+        )
+        self.assertEqual((own['total_points'], own['completed_points'], own['completion_rate']), (8, 5, 50.0))
+        self.assertEqual(data['Shared']['total_tasks'], 1)
+
+    def test_cached_per_project_and_invalidated_by_writes(self):
+        from django.db import connection
+        self.performance()
+        with CaptureQueriesContext(connection) as cached:
+            self.performance()
+        self.assertFalse([q for q in cached.captured_queries if 'tasks_task' in q['sql']])
+
+        self.client.patch(reverse('task-update-status', args=[self.task.id]), {'status': 'done'}, format='json')
+        self.assertEqual(self.performance()['Own']['overdue_tasks'], 0)
+
+        # update() sends no signals; moving a task changes both projects
+        with CaptureQueriesContext(connection) as stale:
+            Task.objects.filter(pk=self.task.pk).update(project=self.shared)
+            data = self.performance()
+        self.assertEqual((data['Own']['total_tasks'], data['Shared']['total_tasks']), (1, 2))
+        grouped = [q for q in stale.captured_queries if 'GROUP BY' in q['sql']]
+        self.assertEqual(len(grouped), 1)
+
+
+class DependencyGraphTests(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user(username='planner', password='password123')
+        self.project = Project.objects.create(name='Graph', owner=self.user)
+
+        def task(title, **kwargs):
+            return Task.objects.create(title=title, owner=self.user, project=self.project, **kwargs)
+        # design <- build <- ship, design <- docs <- ship; outside blocks docs
+        self.design = task('Design', time_estimate=2, story_points=3, status='done', is_completed=True)
+        self.build = task('Build', time_estimate=8, story_points=5)
+        self.docs = task('Docs', time_estimate=1, story_points=8)
+        self.ship = task('Ship', time_estimate=1, story_points=1)
+        self.outside = Task.objects.create(title='Legal', owner=self.user)
+        self.build.blocked_by.add(self.design)
+        self.docs.blocked_by.add(self.design, self.outside)
+        self.ship.blocked_by.add(self.build, self.docs)
+        self.url = reverse('project-dependencies', args=[self.project.id])
+        self.client.force_authenticate(user=self.user)
+
+    def graph(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_order_ready_and_critical_path(self):
+        data = self.graph()
+        order = [task['id'] for task in data['tasks']]
+        self.assertEqual(order[0], str(self.design.id))
+        self.assertEqual(order[-1], str(self.ship.id))
+        self.assertEqual(data['cyclic'], [])
+        self.assertEqual(data['ready'], [str(self.build.id)])
+        self.assertEqual(data['critical_path']['tasks'], [str(self.design.id), str(self.build.id), str(self.ship.id)])
+        self.assertEqual(data['critical_path']['length'], 9)
+
+        path = self.graph(weight='story_points')['critical_path']
+        self.assertEqual((path['tasks'], path['length']), ([str(self.design.id), str(self.docs.id), str(self.ship.id)], 9))
+        self.assertEqual(self.client.get(self.url, {'weight': 'title'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+        Task.objects.filter(pk=self.outside.pk).update(status='done')
+        self.assertEqual(sorted(self.graph()['ready']), sorted([str(self.build.id), str(self.docs.id)]))
+
+    def test_edges_are_cached_until_they_change(self):
+        self.graph()
+        with CaptureQueriesContext(connection) as cached:
+            self.graph()
+        self.assertFalse([q for q in cached.captured_queries if 'blocked_by' in q['sql']])
+
+        self.ship.blocked_by.remove(self.build)
+        self.assertEqual(self.graph()['critical_path']['tasks'], [str(self.design.id), str(self.build.id)])
+        # Removing from the blocker's side (reverse relation) too
+        self.design.blocking.clear()
+        self.assertEqual(self.graph()['ready'], [str(self.build.id)])
+
+        Task.objects.filter(pk=self.docs.pk).update(project=None)
+        self.assertNotIn(str(self.docs.id), [task['id'] for task in self.graph()['tasks']])
+
+    def test_writes_that_close_a_cycle_are_rejected(self):
+        detail = reverse('task-detail', args=[self.design.id])
+        response = self.client.patch(detail, {'blockedByIds': [str(self.ship.id)]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('blocked_by_ids', response.data)
+        self.assertFalse(self.design.blocked_by.exists())
+
+        # Through a blocker in another project
+        self.outside.blocked_by.add(self.ship)
+        response = self.client.patch(reverse('task-detail', args=[self.build.id]), {'blockedByIds': [str(self.outside.id)]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(detail, {'blockedByIds': [str(self.outside.id)]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.patch(reverse('task-detail', args=[self.ship.id]), {'blockedByIds': [str(self.design.id)]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(self.ship.blocked_by.all()), [self.design])
+
+
+class DependencyClosureTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='chainer', password='password123')
+        self.a, self.b, self.c, self.d = (Task.objects.create(title=title, owner=self.user) for title in 'ABCD')
+        # A <- B <- C <- D
+        self.b.blocked_by.add(self.a)
+        self.d.blocked_by.add(self.c)
+        self.c.blocked_by.add(self.b)
+        self.url = reverse('task-list')
+        self.client.force_authenticate(user=self.user)
+
+    def titles(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(task['title'] for task in response.data['results'])
+
+    def closure(self):
+        from .models import TaskDependencyClosure
+        return sorted(
+            (row.ancestor.title, row.descendant.title, row.depth)
+            for row in TaskDependencyClosure.objects.select_related('ancestor', 'descendant')
+        )
+
+    def test_closure_follows_edge_changes(self):
+        self.assertEqual(self.closure(), [
+            ('A', 'B', 1), ('A', 'C', 2), ('A', 'D', 3), ('B', 'C', 1), ('B', 'D', 2), ('C', 'D', 1),
+        ])
+        self.d.blocked_by.add(self.a)
+        self.assertIn(('A', 'D', 1), self.closure())
+
+        self.c.blocked_by.remove(self.b)
+        self.assertEqual(self.closure(), [('A', 'B', 1), ('A', 'D', 1), ('C', 'D', 1)])
+        self.a.blocking.clear()
+        self.assertEqual(self.closure(), [('C', 'D', 1)])
+        self.c.blocked_by.add(self.b)
+        self.d.blocked_by.clear()
+        self.assertEqual(self.closure(), [('B', 'C', 1)])
+
+    def test_hard_delete_breaks_chains_and_rebuild_matches(self):
+        from io import StringIO
+        from django.core.management import call_command
+        self.a.blocked_by.add(self.d)  # a cycle, from before writes were checked
+        expected = self.closure()
+        self.assertIn(('A', 'A', 4), expected)
+        call_command('rebuild_dependency_closure', stdout=StringIO())
+        self.assertEqual(self.closure(), expected)
+
+        Task.objects.filter(pk=self.b.pk).delete()
+        self.assertEqual(self.closure(), [('C', 'A', 2), ('C', 'D', 1), ('D', 'A', 1)])
+
+    def test_filters(self):
+        self.assertEqual(self.titles(transitively_blocked_by=str(self.a.id)), ['B', 'C', 'D'])
+        self.assertEqual(self.titles(transitively_blocked_by=str(self.c.id)), ['D'])
+        self.assertEqual(self.titles(unblocked='true'), ['A'])
+
+        Task.objects.filter(pk__in=[self.a.pk, self.b.pk]).update(status='done')
+        self.assertEqual(self.titles(unblocked='true'), ['A', 'B', 'C'])
+        self.assertEqual(self.titles(unblocked='false'), ['D'])
+        self.c.delete()
+        self.assertEqual(self.titles(unblocked='true'), ['A', 'B', 'D'])
+
+        self.assertEqual(self.client.get(self.url, {'transitively_blocked_by': 'nope'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(SUBTASK_ORDER_GAP=4)
+class SubtaskOrderTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='stepper', password='password123')
+        self.task = Task.objects.create(title='Steps', owner=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.list_url = reverse('task-subtasks-list', args=[self.task.id])
+        self.a, self.b, self.c = (
+            Subtask.objects.get(pk=self.client.post(self.list_url, {'title': title}, format='json').data['id'])
+            for title in 'ABC'
+        )
+
+    def orders(self):
+        return list(Subtask.objects.filter(parent_task=self.task).values_list('title', 'order'))
+
+    def move(self, subtask, **neighbours):
+        url = reverse('task-subtasks-move', args=[self.task.id, subtask.id])
+        return self.client.post(url, {key: str(value.id) for key, value in neighbours.items()}, format='json')
+
+    def test_creates_are_gapped_and_survive_deletes(self):
+        self.assertEqual(self.orders(), [('A', 4), ('B', 8), ('C', 12)])
+        self.b.delete()
+        self.client.post(self.list_url, {'title': 'D'}, format='json')
+        self.assertEqual(self.orders(), [('A', 4), ('C', 12), ('D', 16)])
+
+    def test_moves_write_one_row_until_neighbours_are_adjacent(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.move(self.c, after=self.a, before=self.b)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        writes = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE "tasks_subtask"')]
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(self.orders(), [('A', 4), ('C', 6), ('B', 8)])
+
+        self.move(self.b, after=self.a, before=self.c)
+        self.assertEqual(self.orders(), [('A', 4), ('B', 5), ('C', 6)])
+        self.move(self.c, after=self.a, before=self.b)  # no room: respaced
+        self.assertEqual(self.orders(), [('A', 4), ('C', 8), ('B', 12)])
+        self.move(self.b)
+        self.assertEqual(self.orders(), [('B', 1), ('A', 4), ('C', 8)])
+
+        self.assertEqual(self.move(self.a, after=self.c, before=self.b).status_code, status.HTTP_409_CONFLICT)
+        other = Task.objects.create(title='Other', owner=self.user)
+        stranger = Subtask.objects.create(parent_task=other, title='X')
+        self.assertEqual(self.move(self.a, after=stranger).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_reorder_is_one_statement(self):
+        url = reverse('task-subtasks-reorder', args=[self.task.id])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(url, {'order': [str(self.c.id), str(self.a.id)]}, format='json')
+        self.assertEqual([subtask['title'] for subtask in response.data], ['C', 'A', 'B'])
+        writes = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE "tasks_subtask"')]
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(self.orders(), [('C', 4), ('A', 8), ('B', 12)])
+        self.assertEqual(self.client.put(url, {'order': ['nope']}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(TASK_TOMBSTONE_RETENTION_DAYS=30, TASK_TOMBSTONE_PURGE_ASYNC=False)
+class TombstonePurgeTests(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user(username='sweeper', password='password123')
+        self.tag = Tag.objects.create(name='Old', color='hsl(0 100% 50%)', owner=self.user)
+        self.first, self.expired, self.last = (Task.objects.create(title=title, owner=self.user) for title in 'ABC')
+        # A <- expired <- C
+        self.expired.blocked_by.add(self.first)
+        self.last.blocked_by.add(self.expired)
+        Subtask.objects.create(parent_task=self.expired, title='Step')
+        TaskTag.objects.create(task=self.expired, tag=self.tag)
+
+        self.expired.delete()
+        self.recent = Task.objects.create(title='Recent', owner=self.user)
+        self.recent.delete()
+        Task.objects.all_with_deleted().filter(pk=self.expired.pk).update(deleted_at=timezone.now() - timezone.timedelta(days=31))
+        self.client.force_authenticate(user=self.user)
+
+    def purge(self, *args):
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('purge_deleted_tasks', *args, stdout=out)
+        return out.getvalue()
+
+    def test_purge_removes_expired_tombstones_and_their_rows(self):
+        from .models import TaskDependencyClosure
+        subtasks_url = reverse('task-subtasks-list', args=[self.expired.id])
+        self.assertEqual(self.client.get(subtasks_url).data['count'], 0)
+        self.assertIn('1 deleted tasks past retention', self.purge('--dry-run'))
+
+        self.assertIn('Purged 1 deleted tasks', self.purge('--batch-size', '1', '--pause', '0'))
+        remaining = set(Task.objects.all_with_deleted().values_list('title', flat=True))
+        self.assertEqual(remaining, {'A', 'C', 'Recent'})
+        self.assertFalse(Subtask.objects.exists())
+        self.assertFalse(TaskTag.objects.exists())
+        self.assertFalse(Task.blocked_by.through.objects.exists())
+        self.assertFalse(TaskDependencyClosure.objects.exists())
+
+        self.assertIn('Purged 1 deleted tasks', self.purge('--days', '0'))
+
+    def test_purge_batches(self):
+        from .tombstones import purge_tombstones
+        Task.objects.bulk_create([Task(title=f'Gone {i}', owner=self.user, rank=str(i + 1)) for i in range(5)])
+        Task.objects.filter(title__startswith='Gone').update(deleted_at=timezone.now() - timezone.timedelta(days=40))
+        calls = []
+        self.assertEqual(purge_tombstones(batch_size=2, pause=0, progress=lambda *p: calls.append(p)), 6)
+        self.assertEqual(calls, [(2, 4), (4, 2), (6, 0)])
+
+    def test_soft_deletes_schedule_a_throttled_purge(self):
+        from django.core.cache import cache
+        cache.clear()  # setUp's deletes took the throttle
+        doomed = Task.objects.create(title='Doomed', owner=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            doomed.delete()
+        self.assertFalse(Task.objects.all_with_deleted().filter(pk=self.expired.pk).exists())
+
+        # Within the interval, further deletes don't purge again
+        Task.objects.all_with_deleted().filter(pk=doomed.pk).update(deleted_at=timezone.now() - timezone.timedelta(days=31))
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.filter(pk=self.first.pk).update(deleted_at=timezone.now())
+        self.assertTrue(Task.objects.all_with_deleted().filter(pk=doomed.pk).exists())
+
+
+class TaskVisibilityTests(APITestCase):
+    def setUp(self):
+        from projects.member_models import ProjectMember
+
+        self.owner = User.objects.create_user(username='lead', password='password123')
+        self.viewer = User.objects.create_user(username='viewer', password='password123')
+        self.outsider = User.objects.create_user(username='outsider', password='password123')
+        self.project = Project.objects.create(name='Shared', owner=self.owner)
+        ProjectMember.objects.create(project=self.project, user=self.owner, role='owner')
+        ProjectMember.objects.create(project=self.project, user=self.viewer, role='viewer')
+        self.shared = Task.objects.create(title='Shared', owner=self.owner, project=self.project)
+        self.private = Task.objects.create(title='Private', owner=self.owner)
+        self.elsewhere = Task.objects.create(
+            title='Elsewhere', owner=self.outsider, project=Project.objects.create(name='Other', owner=self.outsider),
+        )
+        self.url = reverse('task-list')
+
+    def titles(self, user):
+        self.client.force_authenticate(user=user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(task['title'] for task in response.data['results'])
+
+    def test_members_see_project_tasks(self):
+        self.assertEqual(self.titles(self.owner), ['Private', 'Shared'])
+        self.assertEqual(self.titles(self.viewer), ['Shared'])
+        self.assertEqual(self.titles(self.outsider), ['Elsewhere'])
+
+    def test_project_owner_without_member_row(self):
+        # Projects created outside the API have no owner member row
+        project = Project.objects.create(name='Unlisted', owner=self.owner)
+        Task.objects.create(title='Filed by viewer', owner=self.viewer, project=project)
+        self.assertEqual(self.titles(self.owner), ['Filed by viewer', 'Private', 'Shared'])
+        self.assertEqual(self.titles(self.outsider), ['Elsewhere'])
+
+    def test_assigned_tasks_visible_once(self):
+        self.shared.assignees.add(self.viewer)
+        self.elsewhere.assignees.add(self.viewer)
+        self.assertEqual(self.titles(self.viewer), ['Elsewhere', 'Shared'])
+
+        # Assignees outside the project can open the task too
+        response = self.client.get(reverse('task-detail', kwargs={'pk': self.elsewhere.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_viewers_cannot_edit(self):
+        self.client.force_authenticate(user=self.viewer)
+        url = reverse('task-detail', kwargs={'pk': self.shared.id})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        response = self.client.patch(url, {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_list_validator_tracks_teammate_deletes(self):
+        self.client.force_authenticate(user=self.viewer)
+        etag = self.client.get(self.url)['ETag']
+        self.shared.delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
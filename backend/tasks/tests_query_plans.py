@@ -0,0 +1,123 @@
+"""
+Query-plan regression tests for the Task hot paths.
+
+Each test captures EXPLAIN output for a query issued by TaskViewSet,
+DashboardStatsView or the analytics views and fails unless tasks_task is
+read through the index in Task.Meta.indexes meant for it, with no
+sequential scan and, for the paginated lists, no separate sort step.
+"""
+import datetime
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase
+
+from projects.models import Project
+from .models import Task
+from .tombstones import retention_cutoff
+
+User = get_user_model()
+
+
+def full_table_scans(plan):
+    """Lines of an EXPLAIN plan that read tasks_task without an index."""
+    lines = plan.splitlines()
+    if connection.vendor == 'postgresql':
+        return [line for line in lines if 'Seq Scan on tasks_task ' in line + ' ']
+    # SQLite: "SCAN tasks_task" with no "USING ... INDEX" is a full table scan
+    return [
+        line for line in lines
+        if 'SCAN tasks_task' in line and 'INDEX' not in line and 'tasks_task_' not in line
+    ]
+
+
+def sorts(plan):
+    """Lines of an EXPLAIN plan that sort rows instead of reading them in index order."""
+    if connection.vendor == 'postgresql':
+        pattern = re.compile(r'(^|->)\s*(Incremental )?Sort\b')
+        return [line for line in plan.splitlines() if pattern.search(line)]
+    return [line for line in plan.splitlines() if 'TEMP B-TREE FOR ORDER BY' in line]
+
+
+class TaskQueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='planner', password='password123')
+        cls.project = Project.objects.create(name='Plans', owner=cls.user)
+        Task.objects.bulk_create([
+            Task(title=f'Task {i}', owner=cls.user, project=cls.project if i % 2 else None)
+            for i in range(50)
+        ])
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # Tiny test tables would always favour a seq scan; ask whether an index *can* be used
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, *indexes, ordered=False):
+        """
+        Each of `indexes` (a name, or a tuple of equally good alternatives)
+        must appear in the plan; `ordered` queries must not need a sort.
+        """
+        plan = queryset.explain()
+        self.assertEqual(full_table_scans(plan), [], f'Sequential scan on tasks_task:\n{plan}')
+        for index in indexes:
+            names = (index,) if isinstance(index, str) else index
+            self.assertTrue(any(name in plan for name in names), f'{" or ".join(names)} not used:\n{plan}')
+        if ordered:
+            self.assertEqual(sorts(plan), [], f'Sort step in an index-ordered query:\n{plan}')
+
+    def test_task_list(self):
+        tasks = Task.objects.filter(owner=self.user)
+        self.assertUsesIndex(tasks.order_by('-created_at', '-id')[:20], 'task_owner_created_live', ordered=True)
+        self.assertUsesIndex(
+            tasks.filter(status='todo').order_by('-created_at')[:20], 'task_owner_status_live', ordered=True,
+        )
+        self.assertUsesIndex(
+            tasks.filter(priority='High').order_by('-created_at')[:20], 'task_owner_priority_live', ordered=True,
+        )
+        self.assertUsesIndex(
+            tasks.filter(is_completed=False).order_by('-created_at')[:20], 'task_owner_created_live', ordered=True,
+        )
+        self.assertUsesIndex(
+            tasks.filter(project=self.project).order_by('-created_at')[:20], 'task_owner_created_live', ordered=True,
+        )
+
+        # Owned, assigned or in a member project: one indexed probe per OR
+        # branch. The branches' rows are merged, so this one does sort.
+        self.assertUsesIndex(
+            Task.objects.visible_to(self.user).order_by('-created_at', '-id')[:20], 'task_project_status_live',
+        )
+
+    def test_dashboard_stats(self):
+        tasks = Task.objects.filter(owner=self.user)
+        self.assertUsesIndex(tasks.values('status').annotate(count=Count('status')), 'task_owner_status_live')
+        self.assertUsesIndex(tasks.values('priority').annotate(count=Count('priority')), 'task_owner_priority_live')
+        # Either serves it: SQLite reads the owner's rows in created_at order
+        # to skip sorting them for Meta.ordering
+        self.assertUsesIndex(tasks.filter(is_completed=True), ('task_owner_completed_live', 'task_owner_created_live'))
+
+    def test_analytics(self):
+        since = datetime.date.today() - datetime.timedelta(days=7)
+        self.assertUsesIndex(
+            Task.objects.filter(owner=self.user, is_completed=True, updated_at__date__gte=since),
+            ('task_owner_completed_live', 'task_owner_created_live'),
+        )
+        self.assertUsesIndex(
+            Task.objects.filter(project=self.project).values('status').annotate(n=Count('id')),
+            'task_project_status_live',
+        )
+
+    def test_tombstones(self):
+        tombstones = Task.objects.all_with_deleted()
+        self.assertUsesIndex(
+            tombstones.filter(deleted_at__lt=retention_cutoff()).order_by('deleted_at').values('pk')[:500],
+            'task_tombstone_deleted', ordered=True,
+        )
+        self.assertUsesIndex(
+            tombstones.filter(owner=self.user, deleted_at__isnull=False).order_by('-deleted_at')[:1],
+            'task_owner_tombstone', ordered=True,
+        )
@@ -0,0 +1,99 @@
+"""
+Purging soft-deleted tasks.
+
+Task.delete() and bulk deletes only stamp deleted_at. Tombstones older
+than TASK_TOMBSTONE_RETENTION_DAYS are hard-deleted in small batches,
+each committed on its own with a pause in between, so the purge never
+holds locks for long and other writers get the table between batches.
+A hard delete cascades to the task's subtasks, tags, assignees,
+blocked_by edges and closure rows.
+
+The purge_deleted_tasks command runs it on demand. Soft deletes also
+schedule it in the background (see schedule_purge), at most once per
+TASK_TOMBSTONE_PURGE_INTERVAL seconds across processes.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETENTION_DAYS = 30
+DEFAULT_PURGE_BATCH_SIZE = 500
+DEFAULT_PURGE_PAUSE = 0.1  # seconds between batches
+DEFAULT_PURGE_INTERVAL = 3600
+
+PURGE_LOCK_KEY = 'tasks:tombstone-purge'
+
+
+def retention_cutoff(retention_days=None):
+    if retention_days is None:
+        retention_days = getattr(settings, 'TASK_TOMBSTONE_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+    return timezone.now() - timezone.timedelta(days=retention_days)
+
+
+def purge_tombstones(retention_days=None, batch_size=None, pause=None, progress=None):
+    """
+    Hard-delete tasks soft-deleted before the retention window, oldest
+    first, `batch_size` per transaction. `progress(purged, remaining)` is
+    called after every batch. Returns the number of tasks purged.
+    """
+    from .dependencies import deleting_tasks
+    from .models import Task
+    if batch_size is None:
+        batch_size = getattr(settings, 'TASK_TOMBSTONE_PURGE_BATCH_SIZE', DEFAULT_PURGE_BATCH_SIZE)
+    if pause is None:
+        pause = getattr(settings, 'TASK_TOMBSTONE_PURGE_PAUSE', DEFAULT_PURGE_PAUSE)
+
+    # Fixed once, so tasks deleted while the purge runs wait for the next one
+    expired = Task.objects.all_with_deleted().filter(deleted_at__lt=retention_cutoff(retention_days))
+    remaining = expired.count()
+    purged = 0
+    while remaining > 0:
+        with transaction.atomic():
+            ids = list(expired.order_by('deleted_at').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            with deleting_tasks(ids):
+                Task.objects.all_with_deleted().filter(pk__in=ids).delete()
+        purged += len(ids)
+        remaining = max(remaining - len(ids), 0)
+        if progress:
+            progress(purged, remaining)
+        if remaining and pause:
+            time.sleep(pause)
+    return purged
+
+
+def _purge_in_thread():
+    try:
+        purged = purge_tombstones()
+        if purged:
+            logger.info('Purged %s deleted tasks', purged)
+    except Exception:
+        logger.exception('Tombstone purge failed')
+    finally:
+        connections.close_all()
+
+
+def schedule_purge():
+    """
+    Purge expired tombstones once the current transaction commits, unless
+    a purge ran (or was scheduled) in the last TASK_TOMBSTONE_PURGE_INTERVAL
+    seconds. Runs in a daemon thread unless TASK_TOMBSTONE_PURGE_ASYNC is
+    False; an interval of 0 or None disables it.
+    """
+    interval = getattr(settings, 'TASK_TOMBSTONE_PURGE_INTERVAL', DEFAULT_PURGE_INTERVAL)
+    if not interval or not cache.add(PURGE_LOCK_KEY, timezone.now().isoformat(), interval):
+        return
+    if getattr(settings, 'TASK_TOMBSTONE_PURGE_ASYNC', True):
+        run = lambda: threading.Thread(target=_purge_in_thread, daemon=True).start()
+    else:
+        run = purge_tombstones
+    transaction.on_commit(run)
@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_nested import routers as nested_routers
-from .views import TaskViewSet, SubtaskViewSet, TaskBulkActionView, DashboardStatsView
+from .views import TaskViewSet, SubtaskViewSet, TaskBulkActionView, TaskImportView, DashboardStatsView
 from .analytics_views import TaskDistributionView, ProjectPerformanceView, ProductivityTrendView
 from tags.views import TaskTagViewSet
 from activity.views import TaskActivityViewSet
@@ -21,4 +21,5 @@ urlpatterns = [
     path('analytics/performance/', ProjectPerformanceView.as_view(), name='project-performance'),
     path('analytics/trend/', ProductivityTrendView.as_view(), name='productivity-trend'),
     path('bulk/', TaskBulkActionView.as_view(), name='task-bulk'),
+    path('import/', TaskImportView.as_view(), name='task-import'),
 ] + router.urls + tasks_router.urls
@@ -1,45 +1,89 @@
-from rest_framework import viewsets, permissions, filters, status, pagination
+from rest_framework import viewsets, permissions, filters, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.parsers import MultiPartParser
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Count
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Max, Subquery
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from .models import Task, Subtask
+from projects.models import Project
 from .serializers import TaskSerializer, SubtaskSerializer, BulkActionSerializer
+from .board import BoardLoader, parse_column_limit
+from .dependencies import CRITICAL_PATH_WEIGHTS, DependencyGraph, parse_blocked_by_depth
+from .export import EXPORT_RENDERER_CLASSES, export_stream
+from .filters import TaskFilter
+from .importer import TaskImporter, detect_format, iter_rows, text_stream
+from .ranking import (
+    column_filter, needs_rebalance, order_between, rank_between, respace_subtasks, schedule_rebalance, top_rank,
+)
+from .search import TaskSearchFilter
+from .stats import get_dashboard_stats
 
 from core.utils import log_grc_event
-from activity.signals import log_activity
-from core.mixins import PydanticValidationMixin
+from activity.signals import log_activity, log_activity_bulk
+from core.mixins import ConditionalGetMixin, PydanticValidationMixin
+from core.pagination import KeysetPagination
 from core.permissions import CanEditTask, IsProjectMember
-from .schemas import TaskCreateSchema, TaskUpdateSchema, StatusUpdateSchema, SubtaskCreateSchema, SubtaskUpdateSchema
+from .schemas import (
+    TaskCreateSchema, TaskUpdateSchema, StatusUpdateSchema, TaskMoveSchema,
+    SubtaskCreateSchema, SubtaskUpdateSchema, SubtaskMoveSchema, SubtaskReorderSchema,
+)
 
 
-class TaskViewSet(PydanticValidationMixin, viewsets.ModelViewSet):
+def tombstone_watermark(tasks):
+    """
+    Latest soft-delete time among `tasks` (a queryset over
+    Task.objects.all_with_deleted()), for conditional GET validators.
+    """
+    return Max(Subquery(
+        tasks.filter(deleted_at__isnull=False).order_by('-deleted_at').values('deleted_at')[:1]
+    ))
+
+
+class TaskViewSet(ConditionalGetMixin, PydanticValidationMixin, viewsets.ModelViewSet):
     serializer_class = TaskSerializer
-    pagination_class = pagination.PageNumberPagination
+    pagination_class = KeysetPagination
     permission_classes = [permissions.IsAuthenticated, IsProjectMember, CanEditTask]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, TaskSearchFilter]
     
     # Pydantic schemas for validation
     pydantic_create_schema = TaskCreateSchema
     pydantic_update_schema = TaskUpdateSchema
     
-    filterset_fields = ['is_completed', 'priority', 'project', 'status']
+    filterset_class = TaskFilter
     search_fields = ['title', 'description']
     ordering_fields = ['due_date', 'priority', 'created_at', 'status']
     ordering = ['-created_at']
 
-    def get_queryset(self):
-        queryset = Task.objects.filter(owner=self.request.user)
-        
+    def get_base_queryset(self):
+        # Owned, assigned, or in one of the user's projects
+        queryset = Task.objects.visible_to(self.request.user)
+
         # Filter by tag
         tag_id = self.request.query_params.get('tag')
         if tag_id:
             queryset = queryset.filter(task_tags__tag_id=tag_id)
-        
         return queryset
 
+    def get_queryset(self):
+        # Only pay for what the (possibly ?fields= pruned) serializer will render
+        return self.get_base_queryset().for_fields(
+            self.get_serializer().fields, parse_blocked_by_depth(self.request)
+        )
+
+    def get_conditional_queryset(self):
+        # Same rows as the list, without the serializer-driven annotations
+        return self.filter_queryset(self.get_base_queryset())
+
+    def get_conditional_aggregates(self):
+        return {'deleted': tombstone_watermark(Task.objects.all_with_deleted().visible_to(self.request.user))}
+
     def perform_create(self, serializer):
         task = serializer.save(owner=self.request.user)
         log_grc_event(self.request.user, 'CREATE', 'TASK', task.id)
@@ -98,6 +142,80 @@ class TaskViewSet(PydanticValidationMixin, viewsets.ModelViewSet):
         serializer = self.get_serializer(task)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['post'], url_path='move')
+    def move(self, request, pk=None):
+        """
+        Move a card on the board: optional new status plus the neighbours it
+        lands between (`after` = card above, `before` = card below). Only the
+        moved task's row is written.
+        """
+        try:
+            validated = TaskMoveSchema(**request.data)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        task = self.get_object()
+        old_status = task.status
+        new_status = validated.status or old_status
+        column = column_filter(task.project_id, task.owner_id, new_status)
+
+        neighbours = [pk for pk in (validated.after, validated.before) if pk is not None]
+        ranks = dict(
+            Task.objects.filter(pk__in=neighbours, **column).exclude(pk=task.pk).values_list('pk', 'rank')
+        )
+        if len(ranks) != len(neighbours):
+            return Response({'error': 'Neighbours must be other cards in the target column'}, status=status.HTTP_400_BAD_REQUEST)
+        if not neighbours:
+            rank = top_rank(task.project_id, task.owner_id, new_status)
+        else:
+            try:
+                rank = rank_between(ranks.get(validated.after), ranks.get(validated.before))
+            except ValueError:
+                return Response({'error': 'Neighbours are out of order; reload the column'}, status=status.HTTP_409_CONFLICT)
+
+        changes = {'rank': rank, 'status': new_status, 'updated_at': timezone.now()}
+        if new_status == 'done':
+            changes['is_completed'] = True
+        elif old_status == 'done':
+            changes['is_completed'] = False
+        Task.objects.filter(pk=task.pk).update(**changes)
+        for field, value in changes.items():
+            setattr(task, field, value)
+        if needs_rebalance(rank):
+            schedule_rebalance(task.project_id, task.owner_id, new_status)
+
+        if old_status != new_status:
+            log_grc_event(request.user, 'UPDATE', 'TASK', task.id)
+            log_activity(
+                request.user, 'status_changed', 'task', task.id, task.title,
+                delta={'old_status': old_status, 'new_status': new_status},
+                description=f"Task '{task.title}' moved to '{new_status}'"
+            )
+        return Response(self.get_serializer(task).data)
+
+    @action(detail=False, methods=['get'], url_path='export', renderer_classes=EXPORT_RENDERER_CLASSES)
+    def export(self, request):
+        """
+        Stream every task matching the list filters (?status=, ?tag=,
+        ?search=, ?ordering=, ...) as JSON, NDJSON or CSV, chosen with
+        ?format= or Accept. ?compress=gzip compresses the file on the fly.
+        """
+        file_format = request.accepted_renderer.format
+        gzip = request.query_params.get('compress') == 'gzip'
+        queryset = self.filter_queryset(self.get_base_queryset())
+
+        filename = f'tasks-{timezone.now():%Y%m%d}.{file_format}'
+        if gzip:
+            content_type, filename = 'application/gzip', filename + '.gz'
+        else:
+            content_type = f'{request.accepted_renderer.media_type}; charset=utf-8'
+        response = StreamingHttpResponse(export_stream(queryset, file_format, gzip), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        log_grc_event(request.user, 'EXPORT', 'TASK', 'export', {
+            'format': file_format, 'filters': request.query_params.dict(),
+        })
+        return response
+
 
 class SubtaskViewSet(PydanticValidationMixin, viewsets.ModelViewSet):
     """Nested ViewSet for subtasks under a task."""
@@ -110,21 +228,29 @@ class SubtaskViewSet(PydanticValidationMixin, viewsets.ModelViewSet):
 
     def get_queryset(self):
         task_id = self.kwargs.get('task_pk')
-        return Subtask.objects.filter(parent_task_id=task_id, parent_task__owner=self.request.user)
+        return Subtask.objects.filter(
+            parent_task_id=task_id, parent_task__owner=self.request.user, parent_task__deleted_at__isnull=True,
+        )
+
+    def lock_task(self, task_pk):
+        """The parent task, locked so concurrent writes to its subtask order serialize."""
+        return get_object_or_404(Task.objects.select_for_update(), pk=task_pk, owner=self.request.user)
 
     def perform_create(self, serializer):
         task_id = self.kwargs.get('task_pk')
-        task = get_object_or_404(Task, pk=task_id, owner=self.request.user)
-        
-        # Auto-set order to be last
-        max_order = Subtask.objects.filter(parent_task=task).count()
-        subtask = serializer.save(parent_task=task, order=max_order)
+        with transaction.atomic():
+            task = self.lock_task(task_id)
+            # New subtasks go last, one gap after the current last one
+            last = Subtask.objects.filter(parent_task=task).aggregate(last=Max('order'))['last']
+            subtask = serializer.save(parent_task=task, order=order_between(last, None))
+            Task.objects.filter(pk=task.pk).touch()
         
         log_grc_event(self.request.user, 'CREATE', 'SUBTASK', subtask.id)
         log_activity(self.request.user, 'created', 'subtask', subtask.id, subtask.title)
 
     def perform_update(self, serializer):
         subtask = serializer.save()
+        Task.objects.filter(pk=subtask.parent_task_id).touch()
         log_grc_event(self.request.user, 'UPDATE', 'SUBTASK', subtask.id)
         
         if subtask.is_completed:
@@ -136,20 +262,69 @@ class SubtaskViewSet(PydanticValidationMixin, viewsets.ModelViewSet):
         subtask_id = instance.id
         subtask_title = instance.title
         instance.delete()
+        Task.objects.filter(pk=instance.parent_task_id).touch()
         log_grc_event(self.request.user, 'DELETE', 'SUBTASK', subtask_id)
         log_activity(self.request.user, 'deleted', 'subtask', subtask_id, subtask_title)
 
+    @action(detail=True, methods=['post'], url_path='move')
+    def move(self, request, task_pk=None, pk=None):
+        """
+        Move a subtask between its new neighbours (`after` = subtask above,
+        `before` = subtask below; neither = to the top). Only the moved row
+        is written unless the neighbours have no room left between them.
+        """
+        try:
+            validated = SubtaskMoveSchema(**request.data)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            task = self.lock_task(task_pk)
+            subtask = get_object_or_404(Subtask, pk=pk, parent_task=task)
+            neighbours = [neighbour for neighbour in (validated.after, validated.before) if neighbour is not None]
+            siblings = Subtask.objects.filter(parent_task=task).exclude(pk=subtask.pk)
+            orders = dict(siblings.filter(pk__in=neighbours).values_list('pk', 'order'))
+            if len(orders) != len(neighbours):
+                return Response({'error': 'Neighbours must be other subtasks of this task'}, status=status.HTTP_400_BAD_REQUEST)
+            lower, upper = orders.get(validated.after), orders.get(validated.before)
+            if not neighbours:
+                upper = siblings.order_by('order').values_list('order', flat=True).first()
+
+            try:
+                order = order_between(lower, upper)
+            except ValueError:
+                return Response({'error': 'Neighbours are out of order; reload the subtasks'}, status=status.HTTP_409_CONFLICT)
+            if order is None:
+                # Adjacent orders: respace with the moved subtask in place
+                ids = list(siblings.values_list('pk', flat=True))
+                position = ids.index(validated.after) + 1 if validated.after else 0
+                ids.insert(position, subtask.pk)
+                respace_subtasks(task.pk, ids)
+            else:
+                Subtask.objects.filter(pk=subtask.pk).update(order=order)
+            Task.objects.filter(pk=task.pk).touch()
+
+        subtask.refresh_from_db()
+        return Response(SubtaskSerializer(subtask).data)
+
     @action(detail=False, methods=['put'], url_path='reorder')
     def reorder(self, request, task_pk=None):
-        """Reorder subtasks."""
-        task = get_object_or_404(Task, pk=task_pk, owner=request.user)
-        order_data = request.data.get('order', [])  # List of subtask IDs in new order
-        
-        for index, subtask_id in enumerate(order_data):
-            Subtask.objects.filter(pk=subtask_id, parent_task=task).update(order=index)
-        
-        subtasks = Subtask.objects.filter(parent_task=task)
-        serializer = SubtaskSerializer(subtasks, many=True)
+        """
+        Reorder subtasks: `order` lists subtask ids in their new order;
+        subtasks it leaves out (e.g. added meanwhile) follow in their
+        current order. Written in one statement.
+        """
+        try:
+            validated = SubtaskReorderSchema(**request.data)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            task = self.lock_task(task_pk)
+            subtasks = respace_subtasks(task.pk, validated.order)
+            Task.objects.filter(pk=task.pk).touch()
+
+        serializer = SubtaskSerializer(Subtask.objects.filter(pk__in=[subtask.pk for subtask in subtasks]), many=True)
         return Response(serializer.data)
 
 
@@ -164,69 +339,165 @@ class TaskBulkActionView(APIView):
         ids = serializer.validated_data['ids']
         action_type = serializer.validated_data['action']
         value = serializer.validated_data.get('value')
-        
-        tasks = Task.objects.filter(id__in=ids, owner=request.user)
-        count = tasks.count()
-        
-        if count == 0:
-            return Response({'error': 'No tasks found'}, status=status.HTTP_404_NOT_FOUND)
-        
-        if action_type == 'complete':
-            tasks.update(status='done', is_completed=True)
-            for task in tasks:
-                log_activity(request.user, 'completed', 'task', task.id, task.title)
-        elif action_type == 'delete':
-            for task in tasks:
-                task.delete()  # Soft delete
-                log_activity(request.user, 'deleted', 'task', task.id, task.title)
-        elif action_type == 'set_status':
-            if value not in dict(Task.STATUS_CHOICES):
-                return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
-            tasks.update(status=value)
-        elif action_type == 'set_priority':
-            if value not in dict(Task.PRIORITY_CHOICES):
-                return Response({'error': 'Invalid priority'}, status=status.HTTP_400_BAD_REQUEST)
-            tasks.update(priority=value)
-        elif action_type == 'move':
-            tasks.update(project_id=value)
-        
+
+        if action_type == 'set_status' and value not in dict(Task.STATUS_CHOICES):
+            return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
+        if action_type == 'set_priority' and value not in dict(Task.PRIORITY_CHOICES):
+            return Response({'error': 'Invalid priority'}, status=status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now()
+        changes = {
+            'complete': {'status': 'done', 'is_completed': True},
+            'delete': {'deleted_at': now},  # Soft delete
+            'set_status': {'status': value},
+            'set_priority': {'priority': value},
+            'move': {'project_id': value},
+        }[action_type]
+        logged_action = {'complete': 'completed', 'delete': 'deleted'}.get(action_type)
+
+        # One locked read (titles for the activity log), one UPDATE and
+        # batched activity INSERTs, however many ids are sent
+        with transaction.atomic():
+            tasks = Task.objects.filter(id__in=ids, owner=request.user)
+            targets = list(tasks.select_for_update().values_list('id', 'title'))
+            if not targets:
+                return Response({'error': 'No tasks found'}, status=status.HTTP_404_NOT_FOUND)
+
+            # .update() skips auto_now; conditional GET validators need the bump
+            tasks.update(**changes, updated_at=now)
+            if logged_action:
+                log_activity_bulk(request.user, logged_action, 'task', targets)
+
         log_grc_event(request.user, 'BULK_UPDATE', 'TASK', 'multiple', {'ids': ids, 'action': action_type})
-        
-        return Response({'updated': count, 'action': action_type})
+
+        return Response({'updated': len(targets), 'action': action_type})
 
 
-class DashboardStatsView(APIView):
+class TaskImportView(APIView):
+    """
+    Bulk import from an uploaded CSV or NDJSON file (multipart field `file`;
+    optional `format` when the file extension doesn't tell). Rows are
+    streamed and inserted in batches; invalid rows are reported, not fatal.
+    """
     permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'file': 'This field is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = detect_format(upload.name, request.data.get('format'))
+        if file_format is None:
+            return Response({'format': "Use 'csv' or 'ndjson'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        summary = TaskImporter(request.user).run(iter_rows(text_stream(upload.file), file_format))
+        log_grc_event(request.user, 'BULK_CREATE', 'TASK', 'import', {
+            'file': upload.name, 'created': summary['created'], 'failed': summary['failed'],
+        })
+        return Response(summary)
+
+
+class DashboardStatsView(ConditionalGetMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_conditional_queryset(self):
+        return Task.objects.filter(owner=self.request.user)
+
+    def get_conditional_aggregates(self):
+        return {'deleted': tombstone_watermark(Task.objects.all_with_deleted().filter(owner=self.request.user))}
 
     def get(self, request):
-        user = request.user
-        tasks = Task.objects.filter(owner=user)
-        
-        total_tasks = tasks.count()
-        completed_tasks = tasks.filter(is_completed=True).count()
-        pending_tasks = total_tasks - completed_tasks
-        
-        # Priority breakdown
-        priority_counts = tasks.values('priority').annotate(count=Count('priority'))
-        tasks_by_priority = {item['priority']: item['count'] for item in priority_counts}
-        
-        for priority, _ in Task.PRIORITY_CHOICES:
-            if priority not in tasks_by_priority:
-                tasks_by_priority[priority] = 0
+        return self.conditional_response(request, self.get_stats)
+
+    def get_stats(self, request):
+        # One aggregate query, cached per user until their tasks change (see tasks.stats)
+        return Response(get_dashboard_stats(request.user.pk))
+
+
+class ProjectBoardView(APIView):
+    """
+    Kanban board for a project: every visible column from the project's
+    board settings with its first tasks, total count and a `next` cursor.
+
+    ?limit=N sets tasks per column. ?column=<id>&cursor=<next> continues a
+    single column. ?fields= / ?omit= apply to the tasks.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        project = get_object_or_404(
+            Project.objects.visible_to(request.user),
+            pk=pk,
+        )
+        context = {'request': request, 'view': self}
+        fields = TaskSerializer(context=context).fields
+        loader = BoardLoader(
+            project, Task.objects.all().for_fields(fields, parse_blocked_by_depth(request)),
+        )
+
+        columns = loader.visible_columns()
+        column_id = request.query_params.get('column')
+        if column_id:
+            columns = [column for column in columns if str(column.get('id', column['status'])) == column_id]
+            if not columns:
+                return Response({'error': 'Unknown column'}, status=status.HTTP_400_BAD_REQUEST)
+
+        cursor = request.query_params.get('cursor')
+        if cursor and not column_id:
+            return Response({'error': 'cursor requires column'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            board = loader.load(
+                columns, parse_column_limit(request),
+                loader.decode_cursor(cursor) if cursor else None,
+            )
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound('Invalid cursor')
+
+        tasks = [task for column in board for task in column['tasks']]
+        data = TaskSerializer(tasks, many=True, context=context).data
+        offset = 0
+        for column in board:
+            size = len(column['tasks'])
+            column['tasks'] = data[offset:offset + size]
+            offset += size
+        return Response({'project': project.id, 'columns': board})
+
+
+class ProjectDependencyGraphView(APIView):
+    """
+    A project's dependency graph: its active tasks in topological order
+    (each with the ids of its blockers; tasks that can't be ordered because
+    of a cycle come last and are listed in `cyclic`), the tasks ready to
+    start and the critical path.
+
+    ?weight=time_estimate (default) or story_points weights the critical
+    path; done tasks weigh nothing, so it measures the remaining work.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        project = get_object_or_404(
+            Project.objects.visible_to(request.user),
+            pk=pk,
+        )
+        weight = request.query_params.get('weight', CRITICAL_PATH_WEIGHTS[0])
+        if weight not in CRITICAL_PATH_WEIGHTS:
+            return Response(
+                {'error': f"weight must be one of: {', '.join(CRITICAL_PATH_WEIGHTS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        graph = DependencyGraph(project.pk)
+        order, cyclic = graph.topological_order()
+        length, path = graph.critical_path(weight, order)
+        return Response({
+            'project': project.id,
+            'tasks': [
+                {**graph.nodes[task_id], 'blocked_by': graph.blockers[task_id]}
+                for task_id in order + cyclic
+            ],
+            'cyclic': cyclic,
+            'ready': graph.ready(),
+            'critical_path': {'weight': weight, 'length': length, 'tasks': path},
+        })
 
-        # Status breakdown (for Kanban)
-        status_counts = tasks.values('status').annotate(count=Count('status'))
-        tasks_by_status = {item['status']: item['count'] for item in status_counts}
-        
-        for status_choice, _ in Task.STATUS_CHOICES:
-            if status_choice not in tasks_by_status:
-                tasks_by_status[status_choice] = 0
-
-        data = {
-            "total_tasks": total_tasks,
-            "completed_tasks": completed_tasks,
-            "pending_tasks": pending_tasks,
-            "tasks_by_priority": tasks_by_priority,
-            "tasks_by_status": tasks_by_status
-        }
-        return Response(data)